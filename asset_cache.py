@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+# Static subresources worth keeping; documents, XHR and media streams always go to the network.
+CACHEABLE_TYPES = frozenset({"stylesheet", "script", "font", "image"})
+# Stored bodies are decoded; wire-level and per-client headers must not be replayed.
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive",
+                 "set-cookie", "date", "age"}
+_MAX_AGE = re.compile(r"(?:s-maxage|max-age)\s*=\s*(\d+)")
+
+
+def freshness(status: int, headers: dict, default_ttl: float) -> float | None:
+    """Seconds a response may be reused, or None if it must not be stored.
+
+    Only plain 200s without cookies are kept. no-store/no-cache/private and Vary on anything
+    but encoding opt out. Explicit max-age wins, `immutable` gets a year, and anything else
+    gets `default_ttl`.
+    """
+    if status != 200:
+        return None
+    h = {k.lower(): v for k, v in headers.items()}
+    if "set-cookie" in h:
+        return None
+    vary = {v.strip().lower() for v in h.get("vary", "").split(",") if v.strip()}
+    if vary - {"accept-encoding", "origin"}:
+        return None
+    cc = h.get("cache-control", "").lower()
+    if any(d in cc for d in ("no-store", "no-cache", "private")):
+        return None
+    if "immutable" in cc:
+        return 365 * 86400
+    m = _MAX_AGE.search(cc)
+    if m:
+        return int(m.group(1)) or None
+    return default_ttl
+
+
+class AssetCache:
+    """Disk cache for static subresources (CSS, JS, fonts, images), shared by every browser
+    context and by later runs pointed at the same directory.
+
+    Entries are partitioned by the site of the page being scraped, like browser cache
+    partitioning, so one site never sees that another was visited. Responses that set cookies
+    are never stored, so cookies and storage stay per context. Bodies live in files named by
+    key digest; an sqlite index keeps size and last use for LRU eviction past `max_bytes`.
+    Methods are blocking; the backend calls them via asyncio.to_thread.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 ** 2, default_ttl: float = 86400, logger=None):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.dir / "index.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, site TEXT, url TEXT, status INTEGER,"
+            " headers TEXT, size INTEGER, expires REAL, used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+        self.total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+        self.bytes_served = 0
+        self._host_hits: Counter = Counter()
+        self._host_misses: Counter = Counter()
+
+    @staticmethod
+    def _key(site: str, url: str) -> str:
+        return hashlib.blake2b(f"{site}\n{url}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.dir / key[:2] / key
+
+    def get(self, site: str, url: str) -> tuple[int, dict, bytes] | None:
+        key = self._key(site, url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT status, headers, size, expires FROM entries WHERE key = ?", (key,)).fetchone()
+            body = None
+            if row is not None and row[3] > now:
+                try:
+                    body = self._path(key).read_bytes()
+                except OSError:
+                    body = None
+            if body is None:
+                if row is not None:
+                    self._delete(key, row[2])
+                self.misses += 1
+                self._host_misses[site] += 1
+                return None
+            self._conn.execute("UPDATE entries SET used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            self._host_hits[site] += 1
+            self.bytes_served += len(body)
+            return row[0], json.loads(row[1]), body
+
+    def put(self, site: str, url: str, status: int, headers: dict, body: bytes) -> bool:
+        ttl = freshness(status, headers, self.default_ttl)
+        if ttl is None or len(body) > self.max_bytes // 4:
+            return False
+        key = self._key(site, url)
+        kept = {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS}
+        path = self._path(key)
+        now = time.time()
+        with self._lock:
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, path)
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self.total_bytes += len(body) - (old[0] if old else 0)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, site, url, status, json.dumps(kept), len(body), now + ttl, now),
+            )
+            self.stored += 1
+            if self.total_bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+            self._conn.commit()
+        return True
+
+    def _delete(self, key: str, size: int):
+        self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self.total_bytes -= size
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def _evict(self, target: int):
+        """Drop least recently used entries until the cache fits in `target` bytes."""
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY used").fetchall()
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            self._delete(key, size)
+            self.evicted += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "served_mb": round(self.bytes_served / 1e6, 2),
+            "stored": self.stored,
+            "evicted": self.evicted,
+            "size_mb": round(self.total_bytes / 1e6, 2),
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+        if self.logger:
+            sites = sorted(set(self._host_hits) | set(self._host_misses),
+                           key=lambda s: -(self._host_hits[s] + self._host_misses[s]))[:5]
+            per_site = ", ".join(f"{s} {self._host_hits[s]}/{self._host_hits[s] + self._host_misses[s]}" for s in sites)
+            self.logger.info(f"[CACHE] {self.stats()} in {self.dir}" + (f"; hits per site: {per_site}" if per_site else ""))
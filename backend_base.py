@@ -1,10 +1,29 @@
 from abc import ABC, abstractmethod
 
+
+class RetryLater(Exception):
+    """Raised by a backend when an attempt should be retried after `delay` seconds.
+
+    Callers release their concurrency slot and re-submit `task` (already carrying the
+    next attempt number) through a delayed queue instead of sleeping inside the slot.
+    `data` holds the failed attempt's result for logging/metrics.
+    """
+
+    def __init__(self, task, delay: float, data: dict | None = None, reason: str = ""):
+        super().__init__(reason or f"retry attempt {task.attempt} in {delay:.1f}s")
+        self.task = task
+        self.delay = delay
+        self.data = data or {}
+
+
 class BrowserBackend(ABC):
     @abstractmethod
     async def grab(self, task, timeout_ms: int, gather_links: bool = False) -> dict:
         ...
 
+    async def warm(self):
+        """Start the browser ahead of the first task (long-lived processes such as the server)."""
+
     @abstractmethod
     async def close(self):
         ...
@@ -1,10 +1,24 @@
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from config import UA_PROFILES  # for alternative profiles
+from block_detector import BlockDetector
+from readiness import ReadinessStrategy
+from extraction import EXTRACT_JS, compile_specs
+from warc import WarcWriter
+from asset_cache import AssetCache, CACHEABLE_TYPES
 import random
 import asyncio
+import time
+from dataclasses import replace
+from urllib.parse import urlparse
+from backend_base import RetryLater
+from logging_utils import log_fields
+
+# Returns at most n characters of serialized markup so large pages never cross the driver boundary whole.
+_HTML_WINDOW_JS = "n => { const d = document.documentElement; return d ? d.outerHTML.slice(0, n) : ''; }"
+
 
 class PlaywrightBackend:
-    def __init__(self, cfg, logger, proxy_settings: dict | None, tor_rotator=None):
+    def __init__(self, cfg, logger, proxy_settings: dict | None, tor_rotator=None, replay=None):
         self.cfg = cfg
         self.logger = logger
         self.proxy = proxy_settings
@@ -13,128 +27,185 @@ class PlaywrightBackend:
         self._browser_name = None
         self.tor_rotator = tor_rotator
         self._last_ua = cfg.user_agent
+        self._launch_lock = asyncio.Lock()
+        self.block_detector = BlockDetector(window_chars=getattr(cfg, 'block_window_chars', 16384))
+        # WARC capture of every response (--warc) and/or offline replay from a WarcIndex (--replay).
+        warc_dir = getattr(cfg, 'warc_dir', '')
+        self.warc = WarcWriter(warc_dir, max_bytes=getattr(cfg, 'warc_max_mb', 1024) * 1024 * 1024, logger=logger) if warc_dir else None
+        self.replay = replay
+        # Persistent static-asset cache shared by all contexts (--cache-dir); replay never hits the network anyway.
+        cache_dir = getattr(cfg, 'cache_dir', '')
+        self.cache = None
+        if cache_dir and replay is None:
+            self.cache = AssetCache(
+                cache_dir,
+                max_bytes=getattr(cfg, 'cache_max_mb', 512) * 1024 * 1024,
+                default_ttl=getattr(cfg, 'cache_ttl_s', 86400),
+                logger=logger,
+            )
 
-    async def _launch(self):
-        if not self._pw:
-            self._pw = await async_playwright().start()
+    def _launcher(self):
         browser_name = (self.cfg.playwright_browser or "firefox").lower()
         if browser_name not in ("firefox", "chromium", "webkit"):
             self.logger.warning(f"Unknown Playwright browser '{browser_name}', defaulting to firefox")
             browser_name = "firefox"
-        launcher = getattr(self._pw, browser_name)
-        self._browser = await launcher.launch(headless=self.cfg.headless, proxy=self.proxy)
         self._browser_name = browser_name
+        return getattr(self._pw, browser_name)
+
+    async def _launch(self):
+        if not self._pw:
+            self._pw = await async_playwright().start()
+        self._browser = await self._launcher().launch(headless=self.cfg.headless, proxy=self.proxy)
 
     async def _ensure(self):
-        if not self._browser:
-            await self._launch()
+        async with self._launch_lock:
+            if not self._browser:
+                await self._launch()
 
-    async def _relaunch_for_retry(self):
-        try:
-            if self._browser:
-                await self._browser.close()
-        except Exception:
-            pass
-        self._browser = None
-        await self._launch()
+    async def warm(self):
+        """Launch the shared browser now instead of inside the first task."""
+        await self._ensure()
+
+    async def _launch_isolated(self):
+        """Dedicated short-lived browser for one retrying task; the shared browser is never touched."""
+        return await self._launcher().launch(headless=self.cfg.headless, proxy=self.proxy)
+
+    async def _wait_ready(self, page, strategy: ReadinessStrategy, timeout_ms: int):
+        """Extra waiting after goto for strategies Playwright's wait_until cannot express."""
+        if strategy.kind == "networkidle":
+            cap = min(strategy.cap_ms or timeout_ms, timeout_ms)
+            try:
+                await page.wait_for_load_state("networkidle", timeout=cap)
+            except PlaywrightTimeoutError:
+                pass  # capped: proceed with whatever has rendered
+        elif strategy.kind == "selector":
+            await page.wait_for_selector(strategy.arg, timeout=timeout_ms)
+        elif strategy.kind == "js":
+            await page.wait_for_function(strategy.arg, timeout=timeout_ms)
 
     async def grab(self, task, timeout_ms: int, gather_links: bool = False) -> dict:
+        """Run one attempt (task.attempt) and return its data.
+
+        A blocked/failed attempt with antibot attempts left raises RetryLater carrying the
+        next-attempt task, so the caller can release its slot while the backoff elapses.
+        """
         await self._ensure()
         attempts = self.cfg.antibot_retry_limit if getattr(self.cfg, 'antibot_enable', False) else 1
         delay = getattr(self.cfg, 'antibot_backoff_seconds', 2.0)
-        attempt = 0
-        last_data = {}
+        attempt = max(1, getattr(task, 'attempt', 1))
         base_mobile_allowed = (self.cfg.device_type == "mobile") and ((self.cfg.playwright_browser or '').lower() != 'firefox')
-        while attempt < attempts:
-            attempt += 1
-            # Fresh browser & Tor rotation on retries
-            if attempt > 1:
-                if self.cfg.antibot_fresh_browser:
-                    self.logger.info(f"[ANTIBOT] Relaunching browser for attempt {attempt}")
-                    await self._relaunch_for_retry()
-                if self.cfg.antibot_force_tor and self.tor_rotator:
-                    self.logger.info(f"[ANTIBOT] Forcing Tor circuit rotation before attempt {attempt}")
-                    try:
-                        await self.tor_rotator.force_rotate()
-                        # small pause to let circuit establish
-                        await asyncio.sleep(1.0)
-                    except Exception:
-                        pass
-            # Decide profile (rerandomize if enabled & attempt > 1)
-            if attempt > 1 and self.cfg.antibot_rerandomize:
-                candidates = [p for p in UA_PROFILES if p.user_agent != self._last_ua]
-                if candidates:
-                    prof = random.choice(candidates)
-                    user_agent = prof.user_agent
-                    viewport_tuple = random.choice(prof.viewports)
-                    locale = prof.accept_languages[0].split(',')[0]
-                    timezone_id = random.choice(prof.timezones)
-                    is_mobile_profile = (prof.device_type == 'mobile') and (self._browser_name != 'firefox')
-                else:
-                    user_agent = self.cfg.user_agent
-                    viewport_tuple = self.cfg.viewport
-                    locale = self.cfg.locale
-                    timezone_id = self.cfg.timezone
-                    is_mobile_profile = base_mobile_allowed
+        browser = self._browser
+        isolated = None
+        if attempt > 1 and self.cfg.antibot_fresh_browser:
+            self.logger.info(f"[ANTIBOT] Dedicated browser for {task.url} attempt {attempt}")
+            isolated = browser = await self._launch_isolated()
+        try:
+            data = await self._attempt(browser, task, timeout_ms, gather_links, attempt, attempts, base_mobile_allowed)
+        finally:
+            if isolated:
+                try:
+                    await isolated.close()
+                except Exception:
+                    pass
+        if data.get('__blocked__') and attempt < attempts:
+            if self.cfg.antibot_force_tor and self.tor_rotator:
+                # Rotate now so the new circuit establishes during the backoff, outside any slot.
+                self.logger.info(f"[ANTIBOT] Forcing Tor circuit rotation before attempt {attempt + 1}")
+                try:
+                    await self.tor_rotator.force_rotate()
+                except Exception:
+                    pass
+            raise RetryLater(replace(task, attempt=attempt + 1), delay, data)
+        return data
+
+    async def _attempt(self, browser, task, timeout_ms: int, gather_links: bool, attempt: int, attempts: int,
+                       base_mobile_allowed: bool) -> dict:
+        # Decide profile (rerandomize if enabled & attempt > 1)
+        if attempt > 1 and self.cfg.antibot_rerandomize:
+            candidates = [p for p in UA_PROFILES if p.user_agent != self._last_ua]
+            if candidates:
+                prof = random.choice(candidates)
+                user_agent = prof.user_agent
+                viewport_tuple = random.choice(prof.viewports)
+                locale = prof.accept_languages[0].split(',')[0]
+                timezone_id = random.choice(prof.timezones)
+                is_mobile_profile = (prof.device_type == 'mobile') and (self._browser_name != 'firefox')
             else:
                 user_agent = self.cfg.user_agent
                 viewport_tuple = self.cfg.viewport
                 locale = self.cfg.locale
                 timezone_id = self.cfg.timezone
                 is_mobile_profile = base_mobile_allowed
-            self._last_ua = user_agent
-            mobile_kwargs = {}
-            if is_mobile_profile and self._browser_name != "firefox":
-                mobile_kwargs = {"is_mobile": True, "has_touch": True, "device_scale_factor": 3}
-            context = await self._browser.new_context(
-                user_agent=user_agent,
-                locale=locale,
-                timezone_id=timezone_id,
-                viewport={"width": viewport_tuple[0], "height": viewport_tuple[1]},
-                **mobile_kwargs,
+        else:
+            user_agent = self.cfg.user_agent
+            viewport_tuple = self.cfg.viewport
+            locale = self.cfg.locale
+            timezone_id = self.cfg.timezone
+            is_mobile_profile = base_mobile_allowed
+        self._last_ua = user_agent
+        mobile_kwargs = {}
+        if is_mobile_profile and self._browser_name != "firefox":
+            mobile_kwargs = {"is_mobile": True, "has_touch": True, "device_scale_factor": 3}
+        context = await browser.new_context(
+            user_agent=user_agent,
+            locale=locale,
+            timezone_id=timezone_id,
+            viewport={"width": viewport_tuple[0], "height": viewport_tuple[1]},
+            **mobile_kwargs,
+        )
+        if self.replay is not None:
+            await context.route("**/*", self._replay_route)
+        elif self.cache:
+            site = urlparse(task.url).netloc.lower()
+            await context.route("**/*", lambda route: self._cache_route(route, site))
+        page = await context.new_page()
+        page.set_default_timeout(timeout_ms)
+        captures = []
+        if self.warc:
+            page.on("response", lambda r: captures.append(asyncio.ensure_future(self._capture(r, page))))
+        data = {}
+        blocked = False
+        html_snapshot = ""
+        started = time.monotonic()
+        try:
+            self.logger.info(f"[PW] goto {task.url} (attempt {attempt}/{attempts})", extra=log_fields(url=task.url, attempt=attempt, stage="goto"))
+            strategy = ReadinessStrategy.parse(task.ready)
+            ready_started = time.monotonic()
+            response = await page.goto(task.url, timeout=timeout_ms, wait_until=strategy.goto_wait_until)
+            # Status/headers first: free, and lets challenge pages skip the selector wait.
+            verdict = self.block_detector.check_response(
+                response.status if response else None,
+                response.headers if response else None,
             )
-            page = await context.new_page()
-            page.set_default_timeout(timeout_ms)
-            data = {}
-            blocked = False
-            html_snapshot = ""
-            try:
-                self.logger.info(f"[PW] goto {task.url} (attempt {attempt}/{attempts})")
-                await page.goto(task.url, timeout=timeout_ms)
+            block_ms = verdict.elapsed_ms
+            ready_ms = None
+            if not verdict.blocked:
+                await self._wait_ready(page, strategy, timeout_ms)
+                ready_ms = (time.monotonic() - ready_started) * 1000
                 if task.wait_selector:
                     await page.wait_for_selector(task.wait_selector, timeout=timeout_ms)
                 try:
-                    html_snapshot = await page.content()
+                    html_snapshot = await page.evaluate(_HTML_WINDOW_JS, self.block_detector.window_chars)
                 except Exception:
                     html_snapshot = ""
-                low = html_snapshot.lower() if html_snapshot else ""
-                patterns = [
-                    'cf-browser-verification', 'attention required! | cloudflare', '/cdn-cgi/challenge-platform/',
-                    'just a moment...', 'captcha', 'access denied', '_incapsula_resource', 'akamai bot manager',
-                    'request unsuccessful. inappropriate content', 'blocked because of unusual activity'
-                ]
-                for pat in patterns:
-                    if pat in low:
-                        blocked = True
-                        break
-                for sel in task.selectors:
-                    try:
-                        els = await page.query_selector_all(sel)
-                        records = []
-                        for el in els:
-                            try:
-                                raw_text = (await el.inner_text()).strip()
-                            except Exception:
-                                raw_text = ""
-                            try:
-                                raw_html = await el.inner_html()
-                            except Exception:
-                                raw_html = ""
-                            if raw_text or raw_html:
-                                records.append({"text": " ".join(raw_text.split()) if raw_text else "", "html": raw_html})
-                        data[sel] = records
-                    except PlaywrightTimeoutError:
-                        self.logger.warning(f"[PW] selector timeout {sel}")
+                verdict = self.block_detector.check_text(html_snapshot, task.block_patterns)
+                block_ms += verdict.elapsed_ms
+            blocked = verdict.blocked
+            data['__timings__'] = {
+                'block_check_ms': round(block_ms, 3),
+                'ready': strategy.spec,
+                'ready_ms': round(ready_ms, 1) if ready_ms is not None else None,
+            }
+            if blocked:
+                data['__block_reason__'] = verdict.reason
+            else:
+                try:
+                    extracted = await page.evaluate(EXTRACT_JS, list(compile_specs(tuple(task.selectors))))
+                    data.update(extracted['data'])
+                    for key, err in extracted['errors'].items():
+                        self.logger.warning(f"[PW] extraction failed {key}: {err}")
+                except Exception as e:
+                    self.logger.warning(f"[PW] extraction failed: {e}")
                 if gather_links:
                     try:
                         anchor_els = await page.query_selector_all('a')
@@ -146,36 +217,99 @@ class PlaywrightBackend:
                         data['__links__'] = links
                     except Exception as e:
                         self.logger.warning(f"[PW] link collection failed: {e}")
-                data['__page_html__'] = html_snapshot
-                data['__blocked__'] = blocked
-                data['__attempt__'] = attempt
-                data['__fingerprint__'] = {
-                    'user_agent': user_agent,
-                    'locale': locale,
-                    'timezone': timezone_id,
-                    'viewport': viewport_tuple,
-                    'mobile': is_mobile_profile,
-                    'browser': self._browser_name,
-                }
-                last_data = data
-                if not blocked:
-                    await context.close()
-                    return data
-                else:
-                    self.logger.warning(f"[ANTIBOT] Block heuristic matched attempt {attempt}")
-            except Exception as e:
-                self.logger.warning(f"[PW] error attempt {attempt}: {e}")
-                last_data = {"__error__": str(e), "__blocked__": True, "__attempt__": attempt}
-            finally:
-                try:
-                    await context.close()
-                except Exception:
-                    pass
-            if attempt < attempts:
-                await asyncio.sleep(delay)
-        return last_data
+                # Full document only on request; otherwise the bounded window already scanned.
+                if task.include_html or getattr(self.cfg, 'include_html', False):
+                    try:
+                        html_snapshot = await page.content()
+                    except Exception:
+                        pass
+            data['__page_html__'] = html_snapshot
+            data['__blocked__'] = blocked
+            data['__attempt__'] = attempt
+            data['__fingerprint__'] = {
+                'user_agent': user_agent,
+                'locale': locale,
+                'timezone': timezone_id,
+                'viewport': viewport_tuple,
+                'mobile': is_mobile_profile,
+                'browser': self._browser_name,
+            }
+            if blocked:
+                self.logger.warning(
+                    f"[ANTIBOT] Block heuristic matched attempt {attempt}",
+                    extra=log_fields(url=task.url, attempt=attempt, stage="blocked", duration=time.monotonic() - started),
+                )
+            return data
+        except Exception as e:
+            self.logger.warning(
+                f"[PW] error attempt {attempt}: {e}",
+                extra=log_fields(url=task.url, attempt=attempt, stage="error", duration=time.monotonic() - started),
+            )
+            return {"__error__": str(e), "__blocked__": True, "__attempt__": attempt}
+        finally:
+            if captures:
+                # Bodies are only readable while the context is open.
+                await asyncio.gather(*captures, return_exceptions=True)
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    async def _capture(self, response, page):
+        try:
+            body = await response.body()
+        except Exception:
+            body = b""  # redirects and aborted requests have no body
+        request = response.request
+        is_page = request.is_navigation_request() and request.frame == page.main_frame
+        try:
+            await self.warc.write_response(response.url, response.status, response.headers, body, page=is_page)
+        except Exception as e:
+            self.logger.warning(f"[WARC] capture failed for {response.url}: {e}")
+
+    async def _replay_route(self, route):
+        hit = await asyncio.to_thread(self.replay.lookup, route.request.url)
+        if hit is None:
+            await route.abort()
+            return
+        status, headers, body = hit
+        merged: dict[str, str] = {}
+        for k, v in headers:
+            # Playwright expects repeated headers (set-cookie) joined with newlines.
+            merged[k] = f"{merged[k]}\n{v}" if k in merged else v
+        await route.fulfill(status=status, headers=merged, body=body)
+
+    async def _cache_route(self, route, site: str):
+        request = route.request
+        if request.method != "GET" or request.resource_type not in CACHEABLE_TYPES:
+            await route.continue_()
+            return
+        hit = await asyncio.to_thread(self.cache.get, site, request.url)
+        if hit is not None:
+            status, headers, body = hit
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+        try:
+            # Fetched through the context (same proxy and cookies) so the response can be kept.
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            await route.continue_()
+            return
+        await route.fulfill(response=response, body=body)
+        try:
+            await asyncio.to_thread(self.cache.put, site, request.url, response.status, response.headers, body)
+        except Exception as e:
+            self.logger.warning(f"[CACHE] store failed for {request.url}: {e}")
 
     async def close(self):
+        self.logger.info(f"[BLOCK] detector stats: {self.block_detector.stats()}")
+        if self.cache:
+            self.cache.close()
+        if self.warc:
+            self.warc.close()
+        if self.replay is not None:
+            self.logger.info(f"[REPLAY] served {self.replay.hits} response(s) from WARC, {self.replay.misses} not archived")
         if self._browser:
             try:
                 await self._browser.close()
@@ -1,14 +1,20 @@
 import asyncio
+import time
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.firefox.options import Options as FxOptions
 from selenium.webdriver.chrome.options import Options as ChOptions
+from logging_utils import log_fields
+from readiness import PAGE_LOAD_STRATEGY, PHASES, ReadinessStrategy
+from extraction import EXTRACT_JS, compile_specs
 
 class SeleniumBackend:
-    def __init__(self, cfg, logger, proxy_settings: dict | None):
+    def __init__(self, cfg, logger, proxy_settings: dict | None, phase: str = "load"):
         self.cfg = cfg
         self.logger = logger
         self.proxy = proxy_settings
+        # pageLoadStrategy is fixed per driver: `get` returns at this phase, later phases are polled.
+        self.phase = phase
         self.driver = None
 
     async def _ensure(self):
@@ -29,6 +35,7 @@ class SeleniumBackend:
                 opts.set_preference("network.proxy.socks_port", int(port))
                 opts.set_preference("network.proxy.socks_remote_dns", True)
             opts.set_preference("general.useragent.override", self.cfg.user_agent)
+            opts.page_load_strategy = PAGE_LOAD_STRATEGY[self.phase]
             self.driver = webdriver.Firefox(options=opts)
         else:
             opts = ChOptions()
@@ -44,41 +51,52 @@ class SeleniumBackend:
                     "userAgent": self.cfg.user_agent,
                     "deviceMetrics": {"width": w, "height": h, "pixelRatio": 3}
                 })
+            opts.page_load_strategy = PAGE_LOAD_STRATEGY[self.phase]
             self.driver = webdriver.Chrome(options=opts)
 
         w, h = self.cfg.viewport
         if self.cfg.device_type == "desktop":
             self.driver.set_window_size(w, h)
 
+    async def warm(self):
+        """Start the driver now instead of inside the first task."""
+        await self._ensure()
+
     async def grab(self, task, timeout_ms: int, gather_links: bool = False) -> dict:
         await self._ensure()
-        self.logger.info(f"[SE] get {task.url}")
+        self.logger.info(f"[SE] get {task.url}", extra=log_fields(url=task.url, stage="goto"))
         self.driver.set_page_load_timeout(timeout_ms / 1000)
+        strategy = ReadinessStrategy.parse(task.ready)
+        want = strategy.phase
+        ready_started = time.monotonic()
+        if self.phase == "commit":
+            # pageLoadStrategy 'none' may return while the old document is still current; tag it.
+            try:
+                self.driver.execute_script("window.__scraperPrev = true;")
+            except Exception:
+                pass
         self.driver.get(task.url)
+        if self.phase == "commit" or PHASES.index(want) > PHASES.index(self.phase):
+            await self._wait_phase(want, timeout_ms)
+        reached = max(want, self.phase, key=PHASES.index)
+        applied = strategy.spec if strategy.kind in ("selector", "js") or reached == want else reached
+        if strategy.kind == "selector":
+            await self._wait_css(strategy.arg, timeout_ms)
+        elif strategy.kind == "js":
+            await self._wait_js(strategy.arg, timeout_ms)
+        ready_ms = (time.monotonic() - ready_started) * 1000
         if task.wait_selector:
             await self._wait_css(task.wait_selector, timeout_ms)
-        data = {}
-        for sel in task.selectors:
-            try:
-                elements = self.driver.find_elements(By.CSS_SELECTOR, sel)
-                records = []
-                for el in elements:
-                    try:
-                        txt = (el.text or '').strip()
-                    except Exception:
-                        txt = ''
-                    try:
-                        html = el.get_attribute('innerHTML') or ''
-                    except Exception:
-                        html = ''
-                    if txt or html:
-                        records.append({
-                            "text": " ".join(txt.split()) if txt else "",
-                            "html": html
-                        })
-                data[sel] = records
-            except Exception as e:
-                self.logger.warning(f"[SE] selector fail {sel}: {e}")
+        data = {'__timings__': {'ready': applied, 'ready_ms': round(ready_ms, 1)}}
+        try:
+            extracted = self.driver.execute_script(
+                f"return ({EXTRACT_JS})(arguments[0]);", list(compile_specs(tuple(task.selectors)))
+            )
+            data.update(extracted['data'])
+            for key, err in extracted['errors'].items():
+                self.logger.warning(f"[SE] selector fail {key}: {err}")
+        except Exception as e:
+            self.logger.warning(f"[SE] extraction failed: {e}")
         if gather_links:
             try:
                 anchors = self.driver.find_elements(By.TAG_NAME, 'a')
@@ -92,6 +110,15 @@ class SeleniumBackend:
                 self.logger.warning(f"[SE] link collection failed: {e}")
         return data
 
+    async def _wait_phase(self, phase: str, timeout_ms: int):
+        checks = ["!window.__scraperPrev"] if self.phase == "commit" else []
+        if phase == "domcontentloaded":
+            checks.append("document.readyState !== 'loading'")
+        elif phase == "load":
+            checks.append("document.readyState === 'complete'")
+        if checks:
+            await self._wait_js(" && ".join(checks), timeout_ms)
+
     async def _wait_css(self, selector: str, timeout_ms: int):
         end = asyncio.get_event_loop().time() + (timeout_ms / 1000)
         while asyncio.get_event_loop().time() < end:
@@ -100,6 +127,20 @@ class SeleniumBackend:
             await asyncio.sleep(0.1)
         self.logger.warning(f"[SE] wait timeout {selector}")
 
+    async def _wait_js(self, predicate: str, timeout_ms: int):
+        expr = predicate.strip()
+        # Accept both plain expressions and function literals, like Playwright's wait_for_function.
+        script = f"return !!(({expr})());" if ("=>" in expr or expr.startswith("function")) else f"return !!({expr});"
+        end = asyncio.get_event_loop().time() + (timeout_ms / 1000)
+        while asyncio.get_event_loop().time() < end:
+            try:
+                if self.driver.execute_script(script):
+                    return
+            except Exception:
+                pass
+            await asyncio.sleep(0.1)
+        self.logger.warning(f"[SE] wait timeout js predicate {predicate}")
+
     async def close(self):
         if self.driver:
             self.driver.quit()
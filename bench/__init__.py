@@ -0,0 +1 @@
+"""Local benchmark harness: synthetic site, SOCKS pass-through, fake Tor control port."""
@@ -0,0 +1,66 @@
+import asyncio
+
+
+class FakeTorControl:
+    """Just enough of the Tor control protocol for stem's Controller.from_port/authenticate/signal.
+
+    Every SIGNAL NEWNYM is counted so the harness can report rotations per job.
+    """
+
+    VERSION = "0.4.8.9"
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.newnym = 0
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def _reply(self, line: str) -> str:
+        parts = line.split()
+        cmd = parts[0].upper() if parts else ""
+        if cmd == "PROTOCOLINFO":
+            return (
+                "250-PROTOCOLINFO 1\r\n250-AUTH METHODS=NULL\r\n"
+                f"250-VERSION Tor=\"{self.VERSION}\"\r\n250 OK\r\n"
+            )
+        if cmd == "GETINFO":
+            lines = []
+            for key in parts[1:]:
+                value = self.VERSION if key == "version" else ""
+                lines.append(f"250-{key}={value}\r\n")
+            return "".join(lines) + "250 OK\r\n"
+        if cmd == "GETCONF":
+            keys = parts[1:] or ["OK"]
+            body = "".join(f"250-{k}\r\n" for k in keys[:-1])
+            return body + f"250 {keys[-1]}\r\n"
+        if cmd == "SIGNAL" and len(parts) > 1 and parts[1].upper() == "NEWNYM":
+            self.newnym += 1
+        if cmd == "QUIT":
+            return "250 closing connection\r\n"
+        return "250 OK\r\n"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                line = raw.decode("latin-1").strip()
+                writer.write(self._reply(line).encode("latin-1"))
+                await writer.drain()
+                if line.upper().startswith("QUIT"):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,157 @@
+"""Single benchmark job: builds the same pipeline as main.py and reports timings as JSON on stdout.
+
+Run by bench.run in a fresh process per (engine, mode, concurrency) so RSS and CPU
+numbers are not polluted by earlier jobs. Tor host/ports come from the usual env vars.
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+
+from config import Config
+from logging_utils import LoggerFactory
+from tor_proxy import TorProxyManager
+from tor_rotation import TorRotator
+from models import ScrapeTask
+from cleaner import DataCleaner
+from storage import DataStorage
+from scraper import Scraper
+from backend_base import RetryLater
+from crawler import Crawler
+from concurrency import ConcurrencyController
+from retry_queue import RetryScheduler
+from url_runner import UrlRunner
+
+
+class TimedScraper(Scraper):
+    """Scraper recording wall time of every run_task call (fetch + clean + save)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.blocked = 0
+
+    async def run_task(self, task, timeout_ms: int, gather_links: bool = False):
+        start = time.perf_counter()
+        try:
+            result = await super().run_task(task, timeout_ms, gather_links=gather_links)
+        except RetryLater:
+            self.blocked += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        self.latencies.append(time.perf_counter() - start)
+        if result[1].get('__blocked__'):
+            self.blocked += 1
+        return result
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+async def run_job(args) -> dict:
+    cfg = Config.from_env()
+    cfg.engine = args.engine
+    cfg.max_concurrency = max(1, args.concurrency)
+    logger = LoggerFactory.create()
+
+    proxy_settings = TorProxyManager(cfg.tor_socks_host, cfg.tor_socks_port, logger).playwright_proxy_settings()
+    if not proxy_settings:
+        raise SystemExit("SOCKS pass-through unreachable")
+    tor_rotator = TorRotator(
+        host=cfg.tor_socks_host,
+        control_port=cfg.tor_control_port,
+        password=cfg.tor_control_password,
+        min_interval_s=cfg.tor_rotation_min_interval_s,
+        request_threshold=cfg.tor_request_threshold,
+        logger=logger,
+    )
+    if cfg.engine == "playwright":
+        from backend_playwright import PlaywrightBackend
+        backend = PlaywrightBackend(cfg, logger, proxy_settings)
+    else:
+        from backend_selenium import SeleniumBackend
+        backend = SeleniumBackend(cfg, logger, proxy_settings)
+    scraper = TimedScraper(backend, DataCleaner(), DataStorage(cfg.storage_dir, logger), logger, tor_rotator=tor_rotator)
+
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    pages = 0
+    try:
+        if args.mode == "crawl":
+            crawler = Crawler(scraper, logger, cfg.timeout_ms)
+            aggregated = await crawler.crawl(
+                seeds=[args.seed],
+                selectors=args.selector,
+                wait_selector=args.wait,
+                stem="bench",
+                max_pages=args.max_pages,
+                max_depth=args.max_depth,
+                same_domain=True,
+                allow_subdomains=False,
+                include_patterns=None,
+                exclude_patterns=None,
+                concurrency=cfg.max_concurrency,
+            )
+            pages = len(aggregated)
+        else:
+            urls = [u for u in Path(args.url_file).read_text(encoding="utf-8").splitlines() if u.strip()]
+            urls = urls[:args.max_pages]
+            runner = UrlRunner(
+                scraper, logger, ConcurrencyController(cfg.max_concurrency), RetryScheduler(logger=logger),
+                timeout_ms=cfg.timeout_ms,
+            )
+            stats = await runner.run(
+                ScrapeTask(url=u, selectors=args.selector, wait_selector=args.wait, stem="bench") for u in urls
+            )
+            pages = stats["succeeded"]
+    finally:
+        elapsed = time.perf_counter() - start
+        await scraper.close()
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    lat = scraper.latencies
+    return {
+        "pages": pages,
+        "errors": scraper.errors,
+        "blocked": scraper.blocked,
+        "elapsed_s": round(elapsed, 4),
+        "pages_per_sec": round(pages / elapsed, 4) if elapsed > 0 else None,
+        "latency_p50_ms": round(_percentile(lat, 0.50) * 1000, 2) if lat else None,
+        "latency_p95_ms": round(_percentile(lat, 0.95) * 1000, 2) if lat else None,
+        "self_cpu_s": round(time.process_time() - cpu_start, 4),
+        "self_max_rss_mb": round(usage.ru_maxrss / 1024, 2),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Run one benchmark job (invoked by bench.run)")
+    p.add_argument("--engine", choices=["playwright", "selenium"], default="playwright")
+    p.add_argument("--mode", choices=["crawl", "multi"], default="crawl")
+    p.add_argument("--concurrency", type=int, default=1)
+    p.add_argument("--seed", help="Crawl seed URL")
+    p.add_argument("--url-file", help="URL list for multi mode")
+    p.add_argument("--max-pages", type=int, default=50)
+    p.add_argument("--max-depth", type=int, default=3)
+    p.add_argument("-s", "--selector", action="append", default=None)
+    p.add_argument("--wait")
+    args = p.parse_args()
+    args.selector = args.selector or ["h1", ".item"]
+    random.seed(0)
+    report = asyncio.run(run_job(args))
+    sys.stdout.write(json.dumps(report) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Benchmark runner.
+
+Starts the synthetic site, a SOCKS pass-through and a fake Tor control port, then runs
+bench.job in a fresh process for every engine x mode x concurrency combination and
+writes a JSON report. Two reports can be compared with --compare.
+
+    python -m bench.run --engines playwright --concurrency 1,4,8 --out bench_report.json
+    python -m bench.run --compare old.json new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench.site import SyntheticSite
+from bench.socks import Socks5PassThrough
+from bench.fake_tor import FakeTorControl
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+METRICS = ("pages_per_sec", "latency_p50_ms", "latency_p95_ms", "peak_rss_mb", "cpu_s")
+# For these metrics a lower value is better; used to flag regressions in --compare.
+LOWER_IS_BETTER = {"latency_p50_ms", "latency_p95_ms", "peak_rss_mb", "cpu_s"}
+# Browsers never proxy loopback addresses; serve the site under a name only the SOCKS relay resolves.
+SITE_HOST = "bench-site.test"
+
+
+def _tree_rss_bytes(root_pid: int) -> int | None:
+    """Sum RSS of root_pid and all descendants (Linux /proc only)."""
+    proc = Path("/proc")
+    if not proc.exists():
+        return None
+    children: dict[int, list[int]] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # ppid is the second field after the parenthesised comm
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+    page = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        try:
+            total += int(Path(f"/proc/{pid}/statm").read_text().split()[1]) * page
+        except (OSError, IndexError, ValueError):
+            pass
+        stack.extend(children.get(pid, []))
+    return total
+
+
+async def _run_one(cmd: list[str], env: dict, cwd: str, sample_interval: float) -> tuple[dict, int | None, float, str]:
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, env=env, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    peak: int | None = None
+
+    async def sample():
+        nonlocal peak
+        while proc.returncode is None:
+            rss = _tree_rss_bytes(proc.pid)
+            if rss is not None:
+                peak = max(peak or 0, rss)
+            await asyncio.sleep(sample_interval)
+
+    sampler = asyncio.create_task(sample())
+    stdout, stderr = await proc.communicate()
+    sampler.cancel()
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    report = {}
+    lines = stdout.decode("utf-8", "replace").strip().splitlines()
+    if proc.returncode == 0 and lines:
+        report = json.loads(lines[-1])
+    return report, peak, cpu, stderr.decode("utf-8", "replace")[-2000:]
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_matrix(args) -> dict:
+    lat = tuple(float(x) for x in args.latency_ms.split(","))
+    site = SyntheticSite(
+        pages=args.site_pages,
+        fanout=args.fanout,
+        page_bytes=args.page_bytes,
+        latency_ms=(lat[0], lat[-1]),
+        js_fraction=args.js_fraction,
+        seed=args.seed,
+        url_host=SITE_HOST,
+    )
+    socks = Socks5PassThrough(hosts={SITE_HOST: "127.0.0.1"})
+    tor = FakeTorControl()
+    for server in (site, socks, tor):
+        await server.start()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench_") as work:
+            url_file = Path(work) / "urls.txt"
+            url_file.write_text("\n".join(site.url_list()), encoding="utf-8")
+            env = dict(os.environ)
+            env.update({
+                "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")])),
+                "TOR_SOCKS_HOST": "127.0.0.1",
+                "TOR_SOCKS_PORT": str(socks.port),
+                "TOR_CONTROL_PORT": str(tor.port),
+                "SCRAPER_RANDOMIZE": "0",
+                "SCRAPER_STORAGE": str(Path(work) / "data"),
+            })
+            for engine in args.engines.split(","):
+                for mode in args.modes.split(","):
+                    for conc in (int(c) for c in args.concurrency.split(",")):
+                        for rep in range(args.repeat):
+                            cmd = [
+                                sys.executable, "-m", "bench.job",
+                                "--engine", engine, "--mode", mode, "--concurrency", str(conc),
+                                "--seed", site.page_url(0), "--url-file", str(url_file),
+                                "--max-pages", str(args.max_pages), "--max-depth", str(args.max_depth),
+                            ]
+                            req0, newnym0, conn0 = site.requests, tor.newnym, socks.connections
+                            started = time.perf_counter()
+                            report, peak, cpu, stderr = await _run_one(cmd, env, work, args.sample_interval)
+                            entry = {
+                                "engine": engine,
+                                "mode": mode,
+                                "concurrency": conc,
+                                "repeat": rep,
+                                "ok": bool(report),
+                                "wall_s": round(time.perf_counter() - started, 4),
+                                "peak_rss_mb": round(peak / 1_048_576, 2) if peak else None,
+                                "cpu_s": round(cpu, 4),
+                                "site_requests": site.requests - req0,
+                                "tor_newnym": tor.newnym - newnym0,
+                                "proxy_connections": socks.connections - conn0,
+                                **report,
+                            }
+                            if not report:
+                                entry["stderr_tail"] = stderr
+                            elif not entry["proxy_connections"]:
+                                entry["ok"] = False
+                                entry["error"] = "no traffic went through the SOCKS proxy"
+                            print(
+                                f"[BENCH] {engine}/{mode}/c{conc}#{rep}: "
+                                f"{entry.get('pages_per_sec')} pages/s p50={entry.get('latency_p50_ms')}ms "
+                                f"p95={entry.get('latency_p95_ms')}ms rss={entry['peak_rss_mb']}MB cpu={entry['cpu_s']}s "
+                                f"proxied={entry['proxy_connections']}{' (' + entry['error'] + ')' if 'error' in entry else ''}",
+                                file=sys.stderr,
+                            )
+                            results.append(entry)
+    finally:
+        for server in (site, socks, tor):
+            await server.stop()
+    return {
+        "meta": {
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "site": {
+                "pages": args.site_pages,
+                "fanout": args.fanout,
+                "page_bytes": args.page_bytes,
+                "latency_ms": list(lat),
+                "js_fraction": args.js_fraction,
+                "seed": args.seed,
+            },
+            "max_pages": args.max_pages,
+            "max_depth": args.max_depth,
+        },
+        "results": results,
+    }
+
+
+def _summaries(report: dict) -> dict[tuple, dict]:
+    """Average repeats per (engine, mode, concurrency)."""
+    grouped: dict[tuple, list[dict]] = {}
+    for r in report.get("results", []):
+        if r.get("ok"):
+            grouped.setdefault((r["engine"], r["mode"], r["concurrency"]), []).append(r)
+    out = {}
+    for key, rows in grouped.items():
+        out[key] = {}
+        for m in METRICS:
+            vals = [r[m] for r in rows if r.get(m) is not None]
+            out[key][m] = sum(vals) / len(vals) if vals else None
+    return out
+
+
+def compare(old_path: str, new_path: str, threshold_pct: float) -> int:
+    old = _summaries(json.loads(Path(old_path).read_text(encoding="utf-8")))
+    new = _summaries(json.loads(Path(new_path).read_text(encoding="utf-8")))
+    regressions = 0
+    for key in sorted(set(old) & set(new)):
+        cells = []
+        for m in METRICS:
+            a, b = old[key][m], new[key][m]
+            if a is None or b is None or a == 0:
+                cells.append(f"{m}=n/a")
+                continue
+            delta = (b - a) / a * 100
+            worse = delta > threshold_pct if m in LOWER_IS_BETTER else delta < -threshold_pct
+            regressions += int(worse)
+            cells.append(f"{m}={b:.2f} ({delta:+.1f}%{' !' if worse else ''})")
+        print(f"{'/'.join(map(str, key))}: " + " ".join(cells))
+    print(f"{regressions} metric(s) regressed beyond {threshold_pct}%")
+    return 1 if regressions else 0
+
+
+def main():
+    p = argparse.ArgumentParser(description="Reproducible scraper benchmark against a local synthetic site")
+    p.add_argument("--engines", default="playwright", help="Comma-separated backends")
+    p.add_argument("--modes", default="crawl,multi", help="Comma-separated job modes (crawl, multi)")
+    p.add_argument("--concurrency", default="1,4", help="Comma-separated concurrency levels")
+    p.add_argument("--repeat", type=int, default=1, help="Runs per combination")
+    p.add_argument("--max-pages", type=int, default=50)
+    p.add_argument("--max-depth", type=int, default=3)
+    p.add_argument("--site-pages", type=int, default=200, help="Synthetic site size")
+    p.add_argument("--fanout", type=int, default=5, help="Links per page")
+    p.add_argument("--page-bytes", type=int, default=20_000, help="Approximate page body size")
+    p.add_argument("--latency-ms", default="0", help="Injected latency 'ms' or 'min,max'")
+    p.add_argument("--js-fraction", type=float, default=0.2, help="Share of JS-rendered pages")
+    p.add_argument("--seed", type=int, default=1, help="Site graph RNG seed")
+    p.add_argument("--sample-interval", type=float, default=0.1, help="RSS sampling period seconds")
+    p.add_argument("--out", default="bench_report.json", help="Report path")
+    p.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two reports and exit")
+    p.add_argument("--threshold", type=float, default=10.0, help="Regression threshold percent for --compare")
+    args = p.parse_args()
+    if args.compare:
+        sys.exit(compare(args.compare[0], args.compare[1], args.threshold))
+    report = asyncio.run(run_matrix(args))
+    Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"[BENCH] report written: {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
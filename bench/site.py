@@ -0,0 +1,144 @@
+import asyncio
+import random
+from urllib.parse import urlsplit
+
+
+class SyntheticSite:
+    """Deterministic synthetic website served over a minimal asyncio HTTP/1.1 server.
+
+    Pages are numbered 0..pages-1 and reachable under /p/<n>. Every page links to
+    `fanout` other pages chosen from a seeded RNG, is padded to roughly `page_bytes`
+    and is delayed by a per-page latency drawn from `latency_ms`. A `js_fraction`
+    share of pages ship an empty body and render heading, items and links from JS.
+    URLs use `url_host` when given, so they only resolve through a proxy mapping that name.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        pages: int = 200,
+        fanout: int = 5,
+        page_bytes: int = 20_000,
+        latency_ms: tuple[float, float] = (0.0, 0.0),
+        js_fraction: float = 0.0,
+        seed: int = 1,
+        url_host: str | None = None,
+    ):
+        self.host = host
+        self.url_host = url_host
+        self.port = port
+        self.pages = max(1, pages)
+        self.fanout = fanout
+        self.page_bytes = page_bytes
+        self.latency_ms = latency_ms
+        self.js_fraction = js_fraction
+        self.seed = seed
+        self.requests = 0
+        self.bytes_sent = 0
+        self._server: asyncio.AbstractServer | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.url_host or self.host}:{self.port}"
+
+    def page_url(self, n: int) -> str:
+        return f"{self.base_url}/p/{n}"
+
+    def url_list(self) -> list[str]:
+        return [self.page_url(n) for n in range(self.pages)]
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def _page_spec(self, n: int) -> tuple[list[int], float, bool]:
+        rng = random.Random(self.seed * 1_000_003 + n)
+        links = [rng.randrange(self.pages) for _ in range(self.fanout)]
+        lo, hi = self.latency_ms
+        latency = rng.uniform(lo, hi) if hi > lo else lo
+        is_js = rng.random() < self.js_fraction
+        return links, latency / 1000.0, is_js
+
+    def _render(self, n: int) -> tuple[bytes, float]:
+        links, latency, is_js = self._page_spec(n)
+        item = f"<div class=\"item\"><p>Synthetic item text for page {n}.</p></div>"
+        count = max(1, self.page_bytes // len(item))
+        if is_js:
+            hrefs = ",".join(f"\"/p/{t}\"" for t in links)
+            body = (
+                "<div id=\"app\"></div><script>"
+                "document.addEventListener('DOMContentLoaded',function(){"
+                "var app=document.getElementById('app');"
+                f"var h=document.createElement('h1');h.textContent='Page {n}';app.appendChild(h);"
+                f"for(var i=0;i<{count};i++){{var d=document.createElement('div');d.className='item';"
+                f"d.innerHTML='<p>Synthetic item text for page {n}.</p>';app.appendChild(d);}}"
+                f"[{hrefs}].forEach(function(u){{var a=document.createElement('a');a.href=u;a.textContent=u;app.appendChild(a);}});"
+                "});</script>"
+            )
+        else:
+            anchors = "".join(f"<a href=\"/p/{t}\">page {t}</a>" for t in links)
+            body = f"<h1>Page {n}</h1>{item * count}<nav>{anchors}</nav>"
+        html = (
+            "<!doctype html><html><head><meta charset=\"utf-8\">"
+            f"<title>Synthetic {n}</title><link rel=\"stylesheet\" href=\"/static/site.css\">"
+            f"</head><body>{body}</body></html>"
+        )
+        return html.encode("utf-8"), latency
+
+    async def _respond(self, path: str) -> tuple[int, str, bytes, float]:
+        if path.startswith("/p/"):
+            try:
+                n = int(path[3:])
+            except ValueError:
+                n = -1
+            if 0 <= n < self.pages:
+                body, latency = self._render(n)
+                return 200, "text/html; charset=utf-8", body, latency
+        elif path == "/static/site.css":
+            return 200, "text/css", b".item{margin:2px}", 0.0
+        elif path == "/":
+            return 200, "text/html; charset=utf-8", b"<!doctype html><a href=\"/p/0\">start</a>", 0.0
+        return 404, "text/plain", b"not found", 0.0
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode("latin-1").split()
+                keep_alive = True
+                while True:
+                    line = await reader.readline()
+                    if not line or line in (b"\r\n", b"\n"):
+                        break
+                    if line.lower().startswith(b"connection:") and b"close" in line.lower():
+                        keep_alive = False
+                if len(parts) < 2:
+                    break
+                method, target = parts[0], parts[1]
+                self.requests += 1
+                status, ctype, body, latency = await self._respond(urlsplit(target).path)
+                if latency:
+                    await asyncio.sleep(latency)
+                head = (
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Not Found'}\r\n"
+                    f"Content-Type: {ctype}\r\nContent-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                ).encode("latin-1")
+                writer.write(head if method == "HEAD" else head + body)
+                self.bytes_sent += len(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,80 @@
+import asyncio
+import ipaddress
+import struct
+
+
+class Socks5PassThrough:
+    """Minimal SOCKS5 (no-auth, CONNECT only) relay standing in for the Tor SOCKS port.
+
+    `hosts` maps names to addresses before connecting, like Tor resolving on the exit side.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, hosts: dict[str, str] | None = None):
+        self.host = host
+        self.port = port
+        self.hosts = hosts or {}
+        self.connections = 0
+        self.bytes_relayed = 0
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    break
+                self.bytes_relayed += len(chunk)
+                writer.write(chunk)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            ver, nmethods = await reader.readexactly(2)
+            await reader.readexactly(nmethods)
+            if ver != 5:
+                writer.close()
+                return
+            writer.write(b"\x05\x00")
+            _ver, cmd, _rsv, atyp = await reader.readexactly(4)
+            if atyp == 1:
+                addr = str(ipaddress.IPv4Address(await reader.readexactly(4)))
+            elif atyp == 3:
+                length = (await reader.readexactly(1))[0]
+                addr = (await reader.readexactly(length)).decode("idna")
+            elif atyp == 4:
+                addr = str(ipaddress.IPv6Address(await reader.readexactly(16)))
+            else:
+                writer.close()
+                return
+            port = struct.unpack("!H", await reader.readexactly(2))[0]
+            addr = self.hosts.get(addr, addr)
+            if cmd != 1:
+                writer.write(b"\x05\x07\x00\x01" + b"\x00" * 6)
+                writer.close()
+                return
+            try:
+                up_reader, up_writer = await asyncio.open_connection(addr, port)
+            except OSError:
+                writer.write(b"\x05\x05\x00\x01" + b"\x00" * 6)
+                writer.close()
+                return
+            self.connections += 1
+            writer.write(b"\x05\x00\x00\x01" + b"\x00" * 6)
+            await writer.drain()
+            await asyncio.gather(self._pipe(reader, up_writer), self._pipe(up_reader, writer))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
@@ -0,0 +1,79 @@
+import re
+import time
+from dataclasses import dataclass
+
+DEFAULT_BLOCK_PATTERNS: tuple[str, ...] = (
+    'cf-browser-verification', 'attention required! | cloudflare', '/cdn-cgi/challenge-platform/',
+    'just a moment...', 'captcha', 'access denied', '_incapsula_resource', 'akamai bot manager',
+    'request unsuccessful. inappropriate content', 'blocked because of unusual activity',
+)
+
+# Response headers that only show up on bot-mitigation responses.
+_CHALLENGE_HEADERS = ("cf-mitigated", "x-datadome", "x-dd-b", "x-amzn-waf-action")
+# Vendors whose 403/503 responses are almost always challenges rather than real errors.
+_VENDOR_SERVERS = ("cloudflare", "akamaighost", "ddos-guard", "sucuri")
+
+
+@dataclass
+class BlockVerdict:
+    blocked: bool
+    reason: str | None = None
+    elapsed_ms: float = 0.0
+
+
+class BlockDetector:
+    """Cheap anti-bot page classification.
+
+    Order of checks: HTTP status + headers (free, available right after goto), then a
+    single case-insensitive regex over at most `window_chars` of the document. Compiled
+    matchers are cached per pattern set so per-job patterns cost nothing after first use.
+    """
+
+    def __init__(self, patterns: tuple[str, ...] | list[str] | None = None, window_chars: int = 16384):
+        self.default_patterns = tuple(patterns) if patterns else DEFAULT_BLOCK_PATTERNS
+        self.window_chars = window_chars
+        self._compiled: dict[tuple[str, ...], re.Pattern] = {}
+        self.checks = 0
+        self.blocked = 0
+        self.total_ms = 0.0
+
+    def matcher(self, patterns: tuple[str, ...] | list[str] | None = None) -> re.Pattern:
+        key = tuple(patterns) if patterns else self.default_patterns
+        rx = self._compiled.get(key)
+        if rx is None:
+            rx = self._compiled[key] = re.compile("|".join(re.escape(p) for p in key), re.IGNORECASE)
+        return rx
+
+    def _count(self, verdict: BlockVerdict, started: float) -> BlockVerdict:
+        verdict.elapsed_ms = (time.perf_counter() - started) * 1000
+        self.checks += 1
+        self.total_ms += verdict.elapsed_ms
+        if verdict.blocked:
+            self.blocked += 1
+        return verdict
+
+    def check_response(self, status: int | None, headers: dict | None) -> BlockVerdict:
+        started = time.perf_counter()
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        reason = None
+        if status == 429:
+            reason = "status:429"
+        elif any(h in headers for h in _CHALLENGE_HEADERS):
+            reason = "header:" + next(h for h in _CHALLENGE_HEADERS if h in headers)
+        elif status in (403, 503):
+            server = headers.get("server", "").lower()
+            if any(v in server for v in _VENDOR_SERVERS):
+                reason = f"status:{status}:{server}"
+        return self._count(BlockVerdict(reason is not None, reason), started)
+
+    def check_text(self, text: str | None, patterns: tuple[str, ...] | list[str] | None = None) -> BlockVerdict:
+        started = time.perf_counter()
+        m = self.matcher(patterns).search(text[:self.window_chars]) if text else None
+        return self._count(BlockVerdict(m is not None, f"pattern:{m.group(0).lower()}" if m else None), started)
+
+    def stats(self) -> dict:
+        return {
+            "checks": self.checks,
+            "blocked": self.blocked,
+            "avg_ms": round(self.total_ms / self.checks, 4) if self.checks else 0.0,
+        }
@@ -1,27 +1,78 @@
+import hashlib
+import json
+from typing import Iterable, Iterator
+
+from extraction import compile_specs
+
+
+def _record_key(record: dict) -> bytes:
+    # 16-byte digest instead of keeping whole records alive for the whole list.
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+# Plan for results without specs: the classic {text, html} records of a plain CSS selector.
+_DEFAULT_PLAN = {"mode": "both"}
+_MARKUP = {"mode": "html"}
+
+
+def _child_plan(plan: dict | None, key: str) -> dict | None:
+    """Plan of `key` inside a record extracted with `plan` (see extraction.compile_specs)."""
+    if plan is None:
+        return None
+    if plan.get("fields"):
+        return plan["fields"].get(key)
+    if key == "html" and plan.get("mode") in ("html", "both"):
+        return _MARKUP
+    return None
+
+
+def _clean_value(value, plan: dict | None):
+    if isinstance(value, str):
+        # Markup from html-mode fields is kept verbatim; text, attributes and the rest get whitespace-collapsed.
+        if plan is not None and plan.get("mode") == "html":
+            return value
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {k: _clean_value(v, _child_plan(plan, k)) for k, v in value.items()}
+    if isinstance(value, list):
+        if value and isinstance(value[0], dict):
+            return list(DataCleaner().iter_clean_records(value, plan))
+        return [_clean_value(v, plan) for v in value]
+    return '' if value is None else value
+
+
 class DataCleaner:
-    def normalize(self, raw: dict) -> dict:
+    def iter_clean_records(self, records: Iterable[dict], plan: dict | None = _DEFAULT_PLAN) -> Iterator[dict]:
+        """Streaming whitespace-normalise + de-duplicate of extracted records (dedup by hash).
+
+        Records may be the classic {text, html} pairs, text-/html-only, attribute maps or
+        template items with nested lists; `plan` is the compiled spec that produced them and
+        decides which values are markup. Only the keys that were extracted are kept.
+        """
+        seen: set[bytes] = set()
+        for rec in records:
+            if not isinstance(rec, dict):
+                continue
+            cleaned = {k: _clean_value(v, _child_plan(plan, k)) for k, v in rec.items()}
+            key = _record_key(cleaned)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield cleaned
+
+    def normalize(self, raw: dict, specs=None) -> dict:
+        """Clean every extracted key; `specs` (the task's -s values) tell markup fields from text."""
+        plans = {p["key"]: p for p in compile_specs(tuple(specs))} if specs else None
         out = {}
         for k, vals in raw.items():
             if not isinstance(vals, list):
                 out[k] = vals
                 continue
-            # Detect record dicts with text/html
-            if vals and isinstance(vals[0], dict) and {'text', 'html'} <= set(vals[0].keys()):
-                seen = set()
-                cleaned_records = []
-                for rec in vals:
-                    text = rec.get('text', '')
-                    html = rec.get('html', '')
-                    norm_text = " ".join(text.split()) if isinstance(text, str) else ''
-                    key = (norm_text, html)
-                    if key in seen:
-                        continue
-                    seen.add(key)
-                    cleaned_records.append({
-                        'text': norm_text,
-                        'html': html
-                    })
-                out[k] = cleaned_records
+            # Detect record dicts (text/html, attributes or template items)
+            if vals and isinstance(vals[0], dict):
+                plan = plans.get(k) if plans is not None else _DEFAULT_PLAN
+                out[k] = list(self.iter_clean_records(vals, plan))
             else:
                 # Assume list of strings
                 seen = set()
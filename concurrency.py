@@ -0,0 +1,185 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+def is_timeout(error) -> bool:
+    """Best-effort timeout detection across Playwright, Selenium and asyncio errors."""
+    if error is None:
+        return False
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    return "timeout" in type(error).__name__.lower() or "timeout" in str(error).lower()
+
+
+def classify_outcome(result: dict | None, error=None) -> tuple[bool, bool, bool]:
+    """Map a run_task result/exception to (ok, blocked, timeout) feedback signals."""
+    if error is not None:
+        return False, False, is_timeout(error)
+    result = result or {}
+    err = result.get('__error__')
+    return err is None, bool(result.get('__blocked__')) and err is None, is_timeout(err) if err else False
+
+
+class _AimdLimit:
+    """One AIMD window: additive increase on healthy completions, multiplicative decrease on trouble."""
+
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(self.maximum, max(self.minimum, initial)))
+        self.inflight = 0
+        self.baseline: float | None = None
+        self._last_decrease = 0.0
+
+    @property
+    def value(self) -> int:
+        return int(self.limit)
+
+    def healthy(self, latency: float, latency_factor: float, target: float | None) -> bool:
+        if target:
+            return latency <= target
+        if self.baseline is None:
+            return True
+        return latency <= self.baseline * latency_factor
+
+    def observe_latency(self, latency: float):
+        # Slowly rising floor: follows drops immediately, drifts up 1% per sample.
+        if self.baseline is None or latency < self.baseline:
+            self.baseline = latency
+        else:
+            self.baseline += (latency - self.baseline) * 0.01
+
+    def increase(self):
+        self.limit = min(self.maximum, self.limit + 1.0 / max(1.0, self.limit))
+
+    def decrease(self, factor: float, cooldown: float) -> bool:
+        now = time.monotonic()
+        if now - self._last_decrease < cooldown:
+            return False
+        self._last_decrease = now
+        self.limit = max(float(self.minimum), self.limit * factor)
+        return True
+
+
+class ConcurrencyController:
+    """Global + per-host concurrency gate.
+
+    With adaptive=False it behaves like a fixed asyncio.Semaphore(initial) (plus an optional
+    per-host cap). With adaptive=True both the global and each host's limit follow AIMD:
+    +1 per window of healthy completions, x`decrease` on timeouts, blocks, errors or latency
+    above `latency_factor` x the observed baseline (or above `latency_target` seconds if set).
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        *,
+        minimum: int = 1,
+        maximum: int | None = None,
+        per_host_max: int | None = None,
+        adaptive: bool = False,
+        latency_factor: float = 3.0,
+        latency_target: float | None = None,
+        decrease: float = 0.5,
+        cooldown_s: float = 2.0,
+        logger=None,
+    ):
+        initial = max(1, initial)
+        self.adaptive = adaptive
+        if not adaptive:
+            minimum = maximum = initial
+        maximum = maximum or max(initial, initial * 4)
+        self.per_host_max = per_host_max
+        self.latency_factor = latency_factor
+        self.latency_target = latency_target
+        self.decrease_factor = decrease
+        self.cooldown_s = cooldown_s
+        self.logger = logger
+        self._global = _AimdLimit(initial, minimum, maximum)
+        self._hosts: dict[str, _AimdLimit] = {}
+        self._cond = asyncio.Condition()
+        # Wake-up tasks scheduled from the synchronous record(); held so they are not collected early.
+        self._notifies: set[asyncio.Task] = set()
+
+    @property
+    def limit(self) -> int:
+        return self._global.value
+
+    @property
+    def maximum(self) -> int:
+        return self._global.maximum
+
+    def _host(self, host: str) -> _AimdLimit | None:
+        if not (self.per_host_max or self.adaptive):
+            return None
+        h = self._hosts.get(host)
+        if h is None:
+            # Adaptive hosts get their own AIMD window even without a fixed per-host cap.
+            cap = self.per_host_max or self._global.maximum
+            start = min(cap, self._global.value) if self.adaptive else cap
+            h = self._hosts[host] = _AimdLimit(start, 1 if self.adaptive else cap, cap)
+        return h
+
+    def _free(self, host_limit: _AimdLimit | None) -> bool:
+        if self._global.inflight >= self._global.value:
+            return False
+        return host_limit is None or host_limit.inflight < host_limit.value
+
+    @asynccontextmanager
+    async def slot(self, host: str = ""):
+        host_limit = self._host(host)
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._free(host_limit))
+            self._global.inflight += 1
+            if host_limit:
+                host_limit.inflight += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._global.inflight -= 1
+                if host_limit:
+                    host_limit.inflight -= 1
+                self._cond.notify_all()
+
+    def record(self, host: str, latency: float, ok: bool = True, blocked: bool = False, timeout: bool = False):
+        """Feed back one completed request; adjusts limits when adaptive."""
+        if not self.adaptive:
+            return
+        before = self._global.value
+        targets = [self._global]
+        host_limit = self._host(host)
+        if host_limit:
+            targets.append(host_limit)
+        raised = False
+        for lim in targets:
+            prev = lim.value
+            good = ok and not blocked and not timeout and lim.healthy(latency, self.latency_factor, self.latency_target)
+            if ok and not blocked and not timeout:
+                lim.observe_latency(latency)
+            if good:
+                lim.increase()
+            else:
+                lim.decrease(self.decrease_factor, self.cooldown_s)
+            raised = raised or lim.value > prev
+        after = self._global.value
+        if after != before and self.logger:
+            reason = "timeout" if timeout else "blocked" if blocked else "error" if not ok else "latency" if after < before else "healthy"
+            self.logger.info(f"[AIMD] global limit {before} -> {after} ({reason}, host={host or '-'} latency={latency:.2f}s)")
+        if raised:
+            # Wake waiters that may fit under a raised limit.
+            task = asyncio.ensure_future(self._notify())
+            self._notifies.add(task)
+            task.add_done_callback(self._notifies.discard)
+
+    async def _notify(self):
+        async with self._cond:
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        return {
+            "global": self._global.value,
+            "inflight": self._global.inflight,
+            "hosts": {h: lim.value for h, lim in self._hosts.items()},
+        }
@@ -73,10 +73,53 @@ class Config:
     antibot_fresh_browser: bool = True
     antibot_force_tor: bool = True
     antibot_rerandomize: bool = True
+    # Block detection: max characters of markup scanned for challenge markers
+    block_window_chars: int = 16384
+    # Store the full rendered document with each result instead of just the scanned window
+    include_html: bool = False
     max_concurrency: int = 1
+    # Adaptive (AIMD) concurrency; max_concurrency is the starting point
+    adaptive_concurrency: bool = False
+    adaptive_min: int = 1
+    adaptive_max: int = 0  # 0 = 4x max_concurrency
+    per_host_max: int = 0  # 0 = no per-host cap
+    adaptive_latency_factor: float = 3.0
     rate_max_per_interval: int | None = None
     rate_interval_seconds: float = 60.0
     rate_min_delay_seconds: float = 0.0
+    # Post-processing (clean + serialise) in a process pool; 0 = inline on the event loop
+    postprocess_workers: int = 0
+    postprocess_batch: int = 8
+    # Per-host adaptive timeouts: p<quantile> of recent latencies x factor, clamped to [min, max] (max 0 = 4x timeout_ms)
+    adaptive_timeout: bool = False
+    timeout_quantile: float = 0.99
+    timeout_factor: float = 3.0
+    timeout_min_ms: int = 2000
+    timeout_max_ms: int = 0
+    # Wall-clock budget for the whole run in seconds (0 = unlimited)
+    time_budget_s: float = 0.0
+    # In-memory URL dedup spills to a temporary sqlite file past this many URLs (0 = never)
+    seen_memory_max: int = 1_000_000
+    # Diagnostics: log event-loop stalls above this many ms (0 = off); --profile sampling interval
+    loop_lag_ms: float = 250
+    profile_interval_ms: float = 10
+    # Crawl: classify links before navigation; optional header probe and download sink for non-HTML targets
+    skip_non_html: bool = False
+    probe_links: bool = False
+    link_probe_timeout_s: float = 10.0
+    non_html_dir: str = ""
+    non_html_max_mb: int = 50
+    # Persistent static-asset cache shared across contexts and runs ('' = off)
+    cache_dir: str = ""
+    cache_max_mb: int = 512
+    cache_ttl_s: float = 86400
+    # WARC capture of every fetched response ('' = off); files rotate at warc_max_mb
+    warc_dir: str = ""
+    warc_max_mb: int = 1024
+    # Logging: JSON lines, background queue listener, per-module sampling ("crawler=0.1,...")
+    log_json: bool = False
+    log_async: bool = False
+    log_sample: str = ""
 
     @classmethod
     def from_env(cls) -> "Config":
@@ -96,6 +139,11 @@ class Config:
             tor_request_threshold=int(os.getenv("TOR_ROTATE_REQ_THRESHOLD", "5")),
             playwright_browser=os.getenv("SCRAPER_PW_BROWSER", "firefox"),
             max_concurrency=int(os.getenv("SCRAPER_MAX_CONCURRENCY", "1")),
+            adaptive_concurrency=os.getenv("SCRAPER_ADAPTIVE", "0") == "1",
+            adaptive_min=int(os.getenv("SCRAPER_ADAPTIVE_MIN", "1")),
+            adaptive_max=int(os.getenv("SCRAPER_ADAPTIVE_MAX", "0")),
+            per_host_max=int(os.getenv("SCRAPER_PER_HOST_MAX", "0")),
+            adaptive_latency_factor=float(os.getenv("SCRAPER_ADAPTIVE_LATENCY_FACTOR", "3")),
             rate_max_per_interval=(int(os.getenv("SCRAPER_RATE_MAX", "0")) or None),
             rate_interval_seconds=float(os.getenv("SCRAPER_RATE_INTERVAL", "60")),
             rate_min_delay_seconds=float(os.getenv("SCRAPER_RATE_MIN_DELAY", "0")),
@@ -105,6 +153,32 @@ class Config:
             antibot_fresh_browser=os.getenv("SCRAPER_ANTIBOT_FRESH_BROWSER", "1") == "1",
             antibot_force_tor=os.getenv("SCRAPER_ANTIBOT_FORCE_TOR", "1") == "1",
             antibot_rerandomize=os.getenv("SCRAPER_ANTIBOT_RERANDOMIZE", "1") == "1",
+            block_window_chars=int(os.getenv("SCRAPER_BLOCK_WINDOW", "16384")),
+            include_html=os.getenv("SCRAPER_INCLUDE_HTML", "0") == "1",
+            postprocess_workers=int(os.getenv("SCRAPER_POSTPROCESS_WORKERS", "0")),
+            postprocess_batch=int(os.getenv("SCRAPER_POSTPROCESS_BATCH", "8")),
+            adaptive_timeout=os.getenv("SCRAPER_ADAPTIVE_TIMEOUT", "0") == "1",
+            timeout_quantile=float(os.getenv("SCRAPER_TIMEOUT_QUANTILE", "0.99")),
+            timeout_factor=float(os.getenv("SCRAPER_TIMEOUT_FACTOR", "3.0")),
+            timeout_min_ms=int(os.getenv("SCRAPER_TIMEOUT_MIN_MS", "2000")),
+            timeout_max_ms=int(os.getenv("SCRAPER_TIMEOUT_MAX_MS", "0")),
+            time_budget_s=float(os.getenv("SCRAPER_TIME_BUDGET", "0")),
+            seen_memory_max=int(os.getenv("SCRAPER_SEEN_MEMORY_MAX", "1000000")),
+            loop_lag_ms=float(os.getenv("SCRAPER_LOOP_LAG_MS", "250")),
+            profile_interval_ms=float(os.getenv("SCRAPER_PROFILE_INTERVAL_MS", "10")),
+            skip_non_html=os.getenv("SCRAPER_SKIP_NON_HTML", "0") == "1",
+            probe_links=os.getenv("SCRAPER_PROBE_LINKS", "0") == "1",
+            link_probe_timeout_s=float(os.getenv("SCRAPER_LINK_PROBE_TIMEOUT", "10")),
+            non_html_dir=os.getenv("SCRAPER_NON_HTML_DIR", ""),
+            non_html_max_mb=int(os.getenv("SCRAPER_NON_HTML_MAX_MB", "50")),
+            cache_dir=os.getenv("SCRAPER_CACHE_DIR", ""),
+            cache_max_mb=int(os.getenv("SCRAPER_CACHE_MAX_MB", "512")),
+            cache_ttl_s=float(os.getenv("SCRAPER_CACHE_TTL", "86400")),
+            warc_dir=os.getenv("SCRAPER_WARC_DIR", ""),
+            warc_max_mb=int(os.getenv("SCRAPER_WARC_MAX_MB", "1024")),
+            log_json=os.getenv("SCRAPER_LOG_JSON", "0") == "1",
+            log_async=os.getenv("SCRAPER_LOG_ASYNC", "0") == "1",
+            log_sample=os.getenv("SCRAPER_LOG_SAMPLE", ""),
         )
         if cfg.randomize:
             profile = random.choice(UA_PROFILES)
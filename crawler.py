@@ -1,8 +1,14 @@
 import re
-from collections import deque
 from urllib.parse import urljoin, urldefrag, urlparse
 from models import ScrapeTask
+from extraction import output_keys
+from logging_utils import log_fields
+from concurrency import ConcurrencyController, classify_outcome
+from readiness import ReadinessRules, ReadinessTuner
+from retry_queue import RetryScheduler
+from backend_base import RetryLater
 import asyncio
+import time
 from typing import Optional
 
 class Crawler:
@@ -25,98 +31,222 @@ class Crawler:
         exclude_patterns: list[str] | None,
         concurrency: int = 1,
         rate_limiter: Optional[object] = None,
+        controller: Optional[ConcurrencyController] = None,
+        block_patterns: list[str] | None = None,
+        readiness: ReadinessRules | None = None,
+        tuner: ReadinessTuner | None = None,
+        retry_scheduler: RetryScheduler | None = None,
+        on_page=None,
+        budget=None,
+        link_classifier=None,
+        include_html: bool = False,
     ) -> dict:
         if not seeds:
             return {}
-        start_netloc = urlparse(seeds[0]).netloc.lower()
-        root_domain = start_netloc.split(':')[0]
-        # Very naive root for subdomain matching (split first label off if >2 parts)
-        parts = root_domain.split('.')
-        if len(parts) > 2:
-            root_suffix = '.'.join(parts[-2:])
-        else:
-            root_suffix = root_domain
-
-        inc_res = [re.compile(p) for p in (include_patterns or [])]
-        exc_res = [re.compile(p) for p in (exclude_patterns or [])]
-
-        def allowed(url: str) -> bool:
-            parsed = urlparse(url)
-            if parsed.scheme not in ("http", "https"):
-                return False
-            netloc = parsed.netloc.lower()
-            if exc_res and any(r.search(url) for r in exc_res):
-                return False
-            if inc_res and not any(r.search(url) for r in inc_res):
-                return False
-            if not same_domain:
-                return True
-            if allow_subdomains:
-                return netloc.endswith(root_suffix)
-            return netloc == start_netloc
+        allowed = make_url_filter(seeds, same_domain, allow_subdomains, include_patterns, exclude_patterns)
 
         visited: set[str] = set()
+        skipped: set[str] = set()  # non-HTML targets diverted before navigation
         aggregated: dict = {}
-        q = deque([(seed, 0) for seed in seeds])
+        q: asyncio.Queue = asyncio.Queue()
+        for seed in seeds:
+            q.put_nowait((seed, 0, None))
+        if controller is None:
+            controller = ConcurrencyController(concurrency, logger=self.logger)
 
-        async def fetch(url: str, depth: int):
-            norm = self._normalize(url)
-            if norm in visited or not allowed(norm):
-                return []
-            visited.add(norm)
-            self.logger.info(f"[CRAWL] Depth {depth} ({len(visited)}/{max_pages}): {norm}")
-            if rate_limiter:
-                await rate_limiter.acquire()
-            task = ScrapeTask(url=norm, selectors=selectors, wait_selector=wait_selector, stem=stem)
-            try:
-                _path, cleaned, links = await self.scraper.run_task(task, self.timeout_ms, gather_links=True)
-                aggregated[norm] = cleaned
-                new_links = []
-                if depth < max_depth:
-                    for link in links:
-                        full = self._resolve(norm, link)
-                        if full and full not in visited and allowed(full):
-                            new_links.append((full, depth + 1))
-                return new_links
-            except Exception as e:  # noqa
-                self.logger.warning(f"[CRAWL] Error {norm}: {e}")
-                return []
+        if retry_scheduler is None:
+            retry_scheduler = RetryScheduler(logger=self.logger)  # no retries for errors, defers RetryLater only
+        retries = retry_scheduler.queue
 
-        while q and len(visited) < max_pages:
-            batch = []
-            while q and len(batch) < concurrency and len(visited) + len(batch) < max_pages:
-                batch.append(q.popleft())
-            if not batch:
-                break
-            if concurrency == 1:
-                # Sequential
-                for (url, depth) in batch:
-                    new_links = await fetch(url, depth)
-                    for item in new_links:
-                        if len(visited) < max_pages:
-                            q.append(item)
+        async def fetch(url: str, depth: int, retry_task: ScrapeTask | None = None):
+            """Fetch one page; returns new frontier items, or None if deferred to the retry queue."""
+            if budget and budget.exhausted:
+                return []
+            if retry_task is None:
+                norm = self._normalize(url)
+                if norm in visited or norm in skipped or not allowed(norm) or len(visited) >= max_pages:
+                    return []
+                visited.add(norm)
+                if link_classifier:
+                    # Before taking a browser slot; diverted targets do not count against max_pages.
+                    verdict = await link_classifier.classify(norm)
+                    if not verdict.html:
+                        visited.discard(norm)
+                        skipped.add(norm)
+                        link_classifier.divert(norm, verdict)
+                        self.logger.info(
+                            f"[LINKS] skip {norm}: {verdict.reason} {verdict.content_type or ''}".rstrip(),
+                            extra=log_fields(url=norm, stage="link_skipped"),
+                        )
+                        return []
             else:
-                tasks = [fetch(url, depth) for (url, depth) in batch]
-                results = await asyncio.gather(*tasks)
-                for new_links in results:
-                    for item in new_links:
+                norm = retry_task.url
+            host = urlparse(norm).netloc.lower()
+            async with controller.slot(host):
+                self.logger.info(f"[CRAWL] Depth {depth} ({len(visited)}/{max_pages}): {norm}", extra=log_fields(url=norm, stage="crawl"))
+                if rate_limiter:
+                    await rate_limiter.acquire()
+                if retry_task is not None:
+                    task = retry_task
+                else:
+                    ready = readiness.explicit_for(norm) if readiness else None
+                    if ready is None:
+                        ready = tuner.pick(host) if tuner else (readiness.default if readiness else None)
+                    task = ScrapeTask(
+                        url=norm, selectors=selectors, wait_selector=wait_selector, stem=stem,
+                        block_patterns=block_patterns, ready=ready, include_html=include_html,
+                    )
+                started = time.monotonic()
+                try:
+                    _path, cleaned, links = await self.scraper.run_task(task, self.timeout_ms, gather_links=True)
+                except RetryLater as r:
+                    controller.record(host, time.monotonic() - started, blocked=True)
+                    if budget and budget.exhausted:
+                        return []
+                    self.logger.info(
+                        f"[CRAWL] {norm} deferred: attempt {r.task.attempt} in {r.delay:.1f}s",
+                        extra=log_fields(url=norm, attempt=r.task.attempt, stage="retry_scheduled"),
+                    )
+                    retry_scheduler.defer((norm, depth, r.task), r.delay)
+                    return None
+                except Exception as e:  # noqa
+                    controller.record(host, time.monotonic() - started, *classify_outcome(None, e))
+                    self.logger.warning(f"[CRAWL] Error {norm}: {e}", extra=log_fields(url=norm, stage="crawl_error"))
+                    if budget and budget.exhausted:
+                        return []
+                    delay = retry_scheduler.schedule(norm, host, (norm, depth, task))
+                    if delay is not None:
+                        self.logger.info(f"[CRAWL] Retrying {norm} in {delay:.2f}s", extra=log_fields(url=norm, stage="retry_scheduled"))
+                        return None
+                    return []
+                retry_scheduler.forget(norm)
+                controller.record(host, time.monotonic() - started, *classify_outcome(cleaned))
+                if link_classifier:
+                    error = str(cleaned.get('__error__') or '')
+                    if 'Download is starting' in error:
+                        link_classifier.learn(norm, False)
+                    elif not error:
+                        link_classifier.learn(norm, True)
+                if tuner and task.ready:
+                    timings = cleaned.get('__timings__') or {}
+                    nonempty = any(isinstance(cleaned.get(key), list) and cleaned.get(key) for key in output_keys(selectors))
+                    tuner.record(host, task.ready, timings.get('ready_ms'), nonempty)
+            aggregated[norm] = cleaned
+            if on_page:
+                on_page(norm, cleaned)
+            new_links = []
+            if depth < max_depth:
+                for link in links:
+                    full = self._resolve(norm, link)
+                    if full and full not in visited and full not in skipped and allowed(full):
+                        new_links.append((full, depth + 1, None))
+            return new_links
+
+        async def worker():
+            while True:
+                url, depth, retry_task = await q.get()
+                new_items = []
+                try:
+                    new_items = await fetch(url, depth, retry_task)
+                    for item in new_items or []:
                         if len(visited) < max_pages:
-                            q.append(item)
+                            q.put_nowait(item)
+                finally:
+                    # Deferred items stay unfinished until the pump re-queues them, so join() keeps waiting.
+                    if new_items is not None:
+                        q.task_done()
+
+        async def retry_pump():
+            while True:
+                item = await retries.get()
+                q.put_nowait(item)
+                q.task_done()
+
+        async def budget_watch():
+            await budget.wait()
+            # Deferred items were never marked done; queued ones are skipped by fetch().
+            dropped = retries.drain()
+            for _ in dropped:
+                q.task_done()
+            self.logger.warning(
+                f"[BUDGET] {budget.seconds:g}s job budget spent; stopping crawl "
+                f"({len(dropped)} pending retries and {q.qsize()} queued page(s) skipped)"
+            )
+
+        # Pool sized to the controller ceiling; the controller decides how many run at once.
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, controller.maximum))]
+        workers.append(asyncio.create_task(retry_pump()))
+        if budget:
+            workers.append(asyncio.create_task(budget_watch()))
+        try:
+            await q.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        if tuner:
+            self.logger.info(f"[READY] strategy report: {tuner.report()}")
         return aggregated
 
     def _normalize(self, url: str) -> str:
-        url, _frag = urldefrag(url)
-        # Remove trailing slash (except root)
-        if url.endswith('/') and len(url) > len('https://x.xx/'):
-            url = url.rstrip('/')
-        return url
+        return normalize_url(url)
 
     def _resolve(self, base: str, link: str) -> str | None:
-        if not link:
-            return None
-        if link.startswith('javascript:') or link.startswith('mailto:') or link.startswith('#'):
-            return None
-        try:
-            return self._normalize(urljoin(base, link))
-        except Exception:  # noqa
-            return None
+        return resolve_link(base, link)
+
+
+def normalize_url(url: str) -> str:
+    url, _frag = urldefrag(url)
+    # Remove trailing slash (except root)
+    if url.endswith('/') and len(url) > len('https://x.xx/'):
+        url = url.rstrip('/')
+    return url
+
+
+def resolve_link(base: str, link: str) -> str | None:
+    if not link:
+        return None
+    if link.startswith('javascript:') or link.startswith('mailto:') or link.startswith('#'):
+        return None
+    try:
+        return normalize_url(urljoin(base, link))
+    except Exception:  # noqa
+        return None
+
+
+def make_url_filter(
+    seeds: list[str],
+    same_domain: bool,
+    allow_subdomains: bool,
+    include_patterns: list[str] | None,
+    exclude_patterns: list[str] | None,
+):
+    """Crawl scope predicate (scheme, seed domain, include/exclude regexes) anchored on seeds[0]."""
+    start_netloc = urlparse(seeds[0]).netloc.lower() if seeds else ''
+    root_domain = start_netloc.split(':')[0]
+    # Very naive root for subdomain matching (split first label off if >2 parts)
+    parts = root_domain.split('.')
+    if len(parts) > 2:
+        root_suffix = '.'.join(parts[-2:])
+    else:
+        root_suffix = root_domain
+
+    inc_res = [re.compile(p) for p in (include_patterns or [])]
+    exc_res = [re.compile(p) for p in (exclude_patterns or [])]
+
+    def allowed(url: str) -> bool:
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            return False
+        netloc = parsed.netloc.lower()
+        if exc_res and any(r.search(url) for r in exc_res):
+            return False
+        if inc_res and not any(r.search(url) for r in inc_res):
+            return False
+        if not same_domain:
+            return True
+        if allow_subdomains:
+            return netloc.endswith(root_suffix)
+        return netloc == start_netloc
+
+    return allowed
@@ -0,0 +1,400 @@
+import asyncio
+import itertools
+import json
+import os
+import socket
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+from backend_base import RetryLater
+from concurrency import classify_outcome
+from crawler import normalize_url, resolve_link
+from logging_utils import log_fields
+from models import ScrapeTask
+from retry_queue import RetryScheduler
+
+# Protocol: newline-delimited JSON over TCP, one reply per request, all ops sent by the worker:
+#   hello  {worker}                          -> {job, lease_ttl}
+#   lease  {worker, max}                     -> {tasks: [{lease, url, depth, attempt, ready}], done, wait}
+#   renew  {leases: [...]}                   -> {renewed: n}
+#   result {lease, url, data, links}         -> {ok}
+#   fail   {lease, url, error}               -> {ok}
+#   defer  {lease, url, attempt, delay}      -> {ok}      (anti-bot RetryLater)
+_LINE_LIMIT = 64 * 1024 * 1024  # results carry page data; asyncio's default 64 KiB line cap is too small
+
+
+def parse_address(value: str) -> tuple[str, int]:
+    host, sep, port = value.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Expected HOST:PORT, got '{value}'")
+    return host or "127.0.0.1", int(port)
+
+
+def _host(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+class CrawlCoordinator:
+    """Owns a distributed crawl: frontier, visited set, max_pages budget and per-host politeness.
+
+    Workers lease tasks and must report (or renew) within `lease_ttl` seconds; expired leases
+    go back to the front of their host's queue, at most `max_requeues` times per URL. Failures
+    and anti-bot deferrals go through a RetryScheduler exactly like the local crawler.
+    """
+
+    def __init__(self, seeds: list[str], job: dict, *, url_filter, max_pages: int, max_depth: int,
+                 lease_ttl: float = 60.0, host_delay: float = 0.0, per_host_max: int = 0,
+                 max_requeues: int = 3, readiness=None, retry_scheduler: RetryScheduler | None = None,
+                 logger=None):
+        self.job = job
+        self.allowed = url_filter
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.lease_ttl = lease_ttl
+        self.host_delay = host_delay
+        self.per_host_max = per_host_max
+        self.max_requeues = max_requeues
+        self.readiness = readiness
+        self.retry_scheduler = retry_scheduler if retry_scheduler is not None else RetryScheduler(logger=logger)
+        self.logger = logger
+        self.visited: set[str] = set()
+        self.aggregated: dict = {}
+        self._done: set[str] = set()
+        self._frontier: dict[str, deque] = {}  # host -> items; dict order doubles as round robin
+        self._leases: dict[str, tuple[dict, str, float]] = {}
+        self._host_inflight: dict[str, int] = {}
+        self._host_next: dict[str, float] = {}
+        self._lease_ids = itertools.count(1)
+        self._finished = asyncio.Event()
+        self._clients = 0
+        self.stats = {"leased": 0, "succeeded": 0, "failed": 0, "expired": 0, "workers": 0}
+        for seed in seeds:
+            self._enqueue(normalize_url(seed), 0)
+
+    # -- frontier -------------------------------------------------------------------------
+    def _enqueue(self, url: str, depth: int):
+        if url in self.visited or len(self.visited) >= self.max_pages or not self.allowed(url):
+            return
+        self.visited.add(url)
+        self._push({"url": url, "depth": depth, "attempt": 1, "lost": 0})
+
+    def _push(self, item: dict, front: bool = False):
+        q = self._frontier.setdefault(_host(item["url"]), deque())
+        if front:
+            q.appendleft(item)
+        else:
+            q.append(item)
+
+    def _host_ready(self, host: str, now: float) -> bool:
+        if self.per_host_max and self._host_inflight.get(host, 0) >= self.per_host_max:
+            return False
+        return now >= self._host_next.get(host, 0.0)
+
+    def _drain_retries(self):
+        while (item := self.retry_scheduler.queue.get_ready_nowait()) is not None:
+            self._push(item)
+
+    def _expire(self, now: float):
+        for lease_id, (item, worker, expires) in list(self._leases.items()):
+            if expires > now:
+                continue
+            del self._leases[lease_id]
+            self._release(_host(item["url"]))
+            self.stats["expired"] += 1
+            item["lost"] += 1
+            if item["lost"] > self.max_requeues:
+                self._resolve(item["url"], ok=False)
+                self._warn(f"[COORD] {item['url']} lost {item['lost']} times (worker {worker}); giving up")
+            else:
+                self._warn(f"[COORD] lease {lease_id} on {item['url']} expired (worker {worker}); re-queued")
+                self._push(item, front=True)
+
+    def _release(self, host: str):
+        self._host_inflight[host] = max(0, self._host_inflight.get(host, 0) - 1)
+
+    def _resolve(self, url: str, ok: bool):
+        self._done.add(url)
+        self.retry_scheduler.forget(url)
+        self.stats["succeeded" if ok else "failed"] += 1
+
+    def finished(self) -> bool:
+        return not self._frontier and not self._leases and not len(self.retry_scheduler)
+
+    def _check_finished(self):
+        if self.finished():
+            self._finished.set()
+
+    # -- ops ------------------------------------------------------------------------------
+    def lease(self, worker: str, n: int) -> dict:
+        now = time.monotonic()
+        self._expire(now)
+        self._drain_retries()
+        tasks = []
+        progress = True
+        while len(tasks) < n and progress:
+            progress = False
+            for host in list(self._frontier):
+                if len(tasks) >= n:
+                    break
+                if not self._host_ready(host, now):
+                    continue
+                q = self._frontier.pop(host)
+                item = q.popleft()
+                if q:
+                    self._frontier[host] = q  # re-insert at the end: next host goes first next time
+                progress = True
+                if item["url"] in self._done:
+                    continue
+                lease_id = f"{worker}-{next(self._lease_ids)}"
+                self._leases[lease_id] = (item, worker, now + self.lease_ttl)
+                self._host_inflight[host] = self._host_inflight.get(host, 0) + 1
+                self._host_next[host] = now + self.host_delay
+                self.stats["leased"] += 1
+                tasks.append({
+                    "lease": lease_id, "url": item["url"], "depth": item["depth"], "attempt": item["attempt"],
+                    "ready": self.readiness.for_url(item["url"]) if self.readiness else None,
+                })
+        self._check_finished()
+        return {"tasks": tasks, "done": self._finished.is_set(), "wait": self._wait_hint(now)}
+
+    def _wait_hint(self, now: float) -> float:
+        """How long an idle worker should wait before asking again."""
+        if self._frontier:
+            # Only blocked by politeness/per-host caps: poll soon so slots are shared fairly.
+            due = min(self._host_next.get(h, 0.0) for h in self._frontier) - now
+            return min(1.0, max(0.05, due))
+        wait = self.retry_scheduler.queue.ready_in()
+        return min(1.0, max(0.05, wait)) if wait is not None else 0.5
+
+    def renew(self, leases: list[str]) -> dict:
+        expires = time.monotonic() + self.lease_ttl
+        renewed = 0
+        for lease_id in leases:
+            entry = self._leases.get(lease_id)
+            if entry:
+                self._leases[lease_id] = (entry[0], entry[1], expires)
+                renewed += 1
+        return {"renewed": renewed}
+
+    def _take(self, msg: dict) -> dict | None:
+        entry = self._leases.pop(msg.get("lease"), None)
+        if entry is None:
+            return None
+        self._release(_host(entry[0]["url"]))
+        return entry[0]
+
+    def result(self, msg: dict) -> dict:
+        item = self._take(msg)
+        url = msg["url"]
+        if url in self._done:
+            return {"ok": True, "duplicate": True}
+        # A result for an expired lease still counts; the re-queued copy is skipped at lease time.
+        self._resolve(url, ok=True)
+        self.aggregated[url] = msg.get("data")
+        depth = item["depth"] if item else msg.get("depth", self.max_depth)
+        if depth < self.max_depth:
+            for link in msg.get("links") or []:
+                full = resolve_link(url, link)
+                if full:
+                    self._enqueue(full, depth + 1)
+        self._check_finished()
+        return {"ok": True}
+
+    def fail(self, msg: dict) -> dict:
+        item = self._take(msg)
+        url = msg["url"]
+        if item is None or url in self._done:
+            return {"ok": True}
+        delay = self.retry_scheduler.schedule(url, _host(url), item)
+        if delay is None:
+            self._resolve(url, ok=False)
+            self._warn(f"[COORD] {url} failed: {msg.get('error')}")
+        self._check_finished()
+        return {"ok": True}
+
+    def defer(self, msg: dict) -> dict:
+        item = self._take(msg)
+        if item is None or msg["url"] in self._done:
+            return {"ok": True}
+        item["attempt"] = int(msg.get("attempt", item["attempt"] + 1))
+        self.retry_scheduler.defer(item, float(msg.get("delay", 0.0)))
+        return {"ok": True}
+
+    def _dispatch(self, msg: dict) -> dict:
+        op = msg.get("op")
+        if op == "hello":
+            self.stats["workers"] += 1
+            if self.logger:
+                self.logger.info(f"[COORD] worker {msg.get('worker')} connected")
+            return {"job": self.job, "lease_ttl": self.lease_ttl}
+        if op == "lease":
+            return self.lease(str(msg.get("worker")), max(0, int(msg.get("max", 1))))
+        if op == "renew":
+            return self.renew(msg.get("leases") or [])
+        if op == "result":
+            return self.result(msg)
+        if op == "fail":
+            return self.fail(msg)
+        if op == "defer":
+            return self.defer(msg)
+        return {"error": f"unknown op {op!r}"}
+
+    async def _handle(self, reader, writer):
+        self._clients += 1
+        try:
+            while line := await reader.readline():
+                try:
+                    reply = self._dispatch(json.loads(line))
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {"error": f"bad request: {e}"}
+                writer.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError as e:
+            self._warn(f"[COORD] worker connection lost: {e}")
+        finally:
+            self._clients -= 1
+            writer.close()
+
+    def _warn(self, msg: str):
+        if self.logger:
+            self.logger.warning(msg)
+
+    async def serve(self, host: str, port: int, linger_s: float = 5.0) -> dict:
+        """Serve leases until the crawl is finished; returns the aggregated results."""
+        server = await asyncio.start_server(self._handle, host, port, limit=_LINE_LIMIT)
+        if self.logger:
+            self.logger.info(f"[COORD] serving {len(self.visited)} seed(s) on {host}:{port} (max_pages={self.max_pages})")
+        async with server:
+            while not self._finished.is_set():
+                try:
+                    await asyncio.wait_for(self._finished.wait(), timeout=max(0.1, self.lease_ttl / 4))
+                except asyncio.TimeoutError:
+                    self._expire(time.monotonic())
+                    self._check_finished()
+            # Let polling workers see done=true before the socket goes away.
+            end = time.monotonic() + linger_s
+            while self._clients and time.monotonic() < end:
+                await asyncio.sleep(0.1)
+        if self.logger:
+            self.logger.info(f"[COORD] crawl finished: {self.stats}")
+        return self.aggregated
+
+
+class CrawlWorker:
+    """Runs leased tasks from a CrawlCoordinator on the local Scraper/backend stack."""
+
+    def __init__(self, scraper, logger, controller, *, timeout_ms: int, rate_limiter=None,
+                 worker_id: str | None = None):
+        self.scraper = scraper
+        self.logger = logger
+        self.controller = controller
+        self.timeout_ms = timeout_ms
+        self.rate_limiter = rate_limiter
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = asyncio.Lock()
+        self._reader = None
+        self._writer = None
+        self.job: dict = {}
+        self.succeeded = 0
+        self.failed = 0
+
+    async def _call(self, msg: dict) -> dict:
+        async with self._lock:
+            self._writer.write(json.dumps(msg, ensure_ascii=False).encode("utf-8") + b"\n")
+            await self._writer.drain()
+            line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("coordinator closed the connection")
+        reply = json.loads(line)
+        if "error" in reply:
+            raise RuntimeError(f"coordinator: {reply['error']}")
+        return reply
+
+    async def _connect(self, host: str, port: int, wait_s: float):
+        end = time.monotonic() + wait_s
+        while True:
+            try:
+                self._reader, self._writer = await asyncio.open_connection(host, port, limit=_LINE_LIMIT)
+                return
+            except OSError:
+                if time.monotonic() >= end:
+                    raise
+                await asyncio.sleep(0.5)
+
+    async def _execute(self, t: dict):
+        url = t["url"]
+        host = _host(url)
+        task = ScrapeTask(
+            url=url, selectors=self.job["selectors"], wait_selector=self.job.get("wait_selector"),
+            stem=self.job.get("stem", "scrape"), block_patterns=self.job.get("block_patterns"),
+            ready=t.get("ready"), attempt=t.get("attempt", 1), include_html=self.job.get("include_html", False),
+        )
+        async with self.controller.slot(host):
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
+            started = time.monotonic()
+            try:
+                _path, cleaned, links = await self.scraper.run_task(task, self.timeout_ms, gather_links=True)
+            except RetryLater as r:
+                self.controller.record(host, time.monotonic() - started, blocked=True)
+                await self._call({"op": "defer", "lease": t["lease"], "url": url, "attempt": r.task.attempt, "delay": r.delay})
+                return
+            except Exception as e:  # noqa
+                self.controller.record(host, time.monotonic() - started, *classify_outcome(None, e))
+                self.failed += 1
+                self.logger.warning(f"[WORKER] Error {url}: {e}", extra=log_fields(url=url, attempt=task.attempt, stage="error"))
+                await self._call({"op": "fail", "lease": t["lease"], "url": url, "error": str(e)})
+                return
+            self.controller.record(host, time.monotonic() - started, *classify_outcome(cleaned))
+        self.succeeded += 1
+        self.logger.info(
+            f"[WORKER] Success {url}",
+            extra=log_fields(url=url, attempt=task.attempt, stage="success", duration=time.monotonic() - started),
+        )
+        await self._call({"op": "result", "lease": t["lease"], "url": url, "depth": t["depth"], "data": cleaned, "links": links})
+
+    async def _heartbeat(self, active: dict, every: float):
+        while True:
+            await asyncio.sleep(every)
+            if active:
+                await self._call({"op": "renew", "leases": list(active)})
+
+    async def run(self, host: str, port: int, connect_wait_s: float = 30.0) -> dict:
+        await self._connect(host, port, connect_wait_s)
+        hello = await self._call({"op": "hello", "worker": self.worker_id})
+        self.job = hello["job"]
+        self.logger.info(f"[WORKER] {self.worker_id} joined coordinator {host}:{port}")
+        active: dict[str, asyncio.Task] = {}
+        heartbeat = asyncio.create_task(self._heartbeat(active, max(0.5, hello.get("lease_ttl", 60.0) / 3)))
+        try:
+            while True:
+                if heartbeat.done():
+                    # Renewals stopped, so our leases will expire and be handed to other workers.
+                    self.logger.error(f"[WORKER] lease heartbeat failed: {heartbeat.exception()!r}; stopping")
+                    raise heartbeat.exception()
+                for lease_id, fut in list(active.items()):
+                    if fut.done():
+                        del active[lease_id]
+                        if fut.exception():
+                            raise fut.exception()
+                free = self.controller.limit - len(active)
+                if free <= 0:
+                    await asyncio.wait([*active.values(), heartbeat], return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                reply = await self._call({"op": "lease", "worker": self.worker_id, "max": free})
+                for t in reply["tasks"]:
+                    active[t["lease"]] = asyncio.create_task(self._execute(t))
+                if reply["tasks"]:
+                    continue
+                if reply.get("done") and not active:
+                    break
+                await asyncio.wait([*active.values(), heartbeat], timeout=reply.get("wait", 0.5),
+                                   return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            heartbeat.cancel()
+            for fut in active.values():
+                fut.cancel()
+            await asyncio.gather(heartbeat, *active.values(), return_exceptions=True)
+            self._writer.close()
+        return {"succeeded": self.succeeded, "failed": self.failed}
@@ -0,0 +1,173 @@
+import json
+from functools import lru_cache
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+_MODES = ("text", "html", "attr")
+
+# Evaluated in the page by both backends (one round trip for all specs). Takes the compiled
+# plans and returns {"data": {key: [records]}, "errors": {key: message}}.
+EXTRACT_JS = r"""
+(plans) => {
+  const clean = s => (s || '').replace(/\s+/g, ' ').trim();
+  const text = el => clean(el.innerText !== undefined ? el.innerText : el.textContent);
+  const nonEmpty = r => Object.values(r).some(v => Array.isArray(v) ? v.length : !!v);
+  const within = (root, sel) => sel ? Array.from(root.querySelectorAll(sel)) : [root];
+  const pick = (el, p) => {
+    if (p.fields) {
+      const o = {};
+      for (const [name, f] of Object.entries(p.fields)) o[name] = field(el, f);
+      return o;
+    }
+    if (p.mode === 'text') return {text: text(el)};
+    if (p.mode === 'html') return {html: el.innerHTML};
+    if (p.mode === 'attr') {
+      const o = {};
+      for (const a of p.attrs) o[a] = el.getAttribute(a) || '';
+      return o;
+    }
+    return {text: text(el), html: el.innerHTML};
+  };
+  const field = (root, f) => {
+    if (f.fields) return within(root, f.sel).map(el => pick(el, f)).filter(nonEmpty);
+    const el = f.sel ? root.querySelector(f.sel) : root;
+    if (!el) return '';
+    const r = pick(el, f);
+    const vals = Object.values(r);
+    return vals.length === 1 ? vals[0] : r;
+  };
+  const data = {}, errors = {};
+  for (const p of plans) {
+    try {
+      data[p.key] = within(document, p.sel).map(el => pick(el, p)).filter(nonEmpty);
+    } catch (e) {
+      errors[p.key] = String(e);
+    }
+  }
+  return {data, errors};
+}
+"""
+
+
+def _compile_field(spec) -> dict:
+    """Plan for one spec: a string ('css', '@text css', '@html css', '@attr:a,b css') or a template dict."""
+    if isinstance(spec, dict):
+        fields = spec.get("fields")
+        if not isinstance(fields, dict) or not fields:
+            raise ValueError(f"Template needs a non-empty 'fields' object: {spec}")
+        return {
+            "sel": spec.get("container") or spec.get("sel") or "",
+            "fields": {name: _compile_field(f) for name, f in fields.items()},
+        }
+    if not isinstance(spec, str):
+        raise ValueError(f"Unsupported extraction spec: {spec!r}")
+    spec = spec.strip()
+    # '@' cannot start a CSS selector, so mode prefixes never shadow selectors like 'html:lang(en) p'.
+    if not spec.startswith("@"):
+        return {"sel": spec, "mode": "both"}
+    head, _, css = spec[1:].partition(" ")
+    mode, _, names = head.partition(":")
+    mode = mode.lower()
+    if mode not in _MODES:
+        raise ValueError(f"Unknown extraction mode '@{mode}' in '{spec}' (use @text, @html or @attr:NAME[,NAME])")
+    if mode == "attr":
+        attrs = [a.strip() for a in names.split(",") if a.strip()]
+        if not attrs:
+            raise ValueError(f"Attribute spec must look like @attr:<name>[,<name>...] <css>, got '{spec}'")
+        return {"sel": css.strip(), "mode": "attr", "attrs": attrs}
+    if names:
+        raise ValueError(f"'@{mode}' takes no arguments: '{spec}'")
+    return {"sel": css.strip(), "mode": mode}
+
+
+def _parse(spec: str) -> tuple[str, dict]:
+    if spec.lstrip().startswith("{"):
+        try:
+            tpl = json.loads(spec)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid template JSON '{spec}': {e}") from e
+        plan = _compile_field(tpl)
+        if not plan["sel"]:
+            raise ValueError(f"Template needs a 'container' selector: {spec}")
+        return tpl.get("name") or plan["sel"], plan
+    plan = _compile_field(spec)
+    if not plan["sel"]:
+        raise ValueError(f"Empty selector in extraction spec '{spec}'")
+    return spec, plan
+
+
+@lru_cache(maxsize=256)
+def compile_specs(specs: tuple[str, ...]) -> tuple[dict, ...]:
+    """Parse `-s` values into plans for EXTRACT_JS; each plan carries its output `key`.
+
+    Plain CSS keeps the old {text, html} records keyed by the selector. '@text '/'@html ' return
+    only that field, '@attr:href,title ' only those attributes, and a JSON template
+    {"name", "container", "fields": {name: spec | template}} returns one record per container
+    with each field taken from its first match inside it (nested templates give lists).
+    """
+    plans = []
+    for spec in specs:
+        key, plan = _parse(spec)
+        plans.append({"key": key, **plan})
+    return tuple(plans)
+
+
+def output_keys(specs) -> list[str]:
+    """Result keys produced for the given specs, in order."""
+    return [p["key"] for p in compile_specs(tuple(specs))]
+
+
+def _py_text(el) -> str:
+    return " ".join(el.get_text(" ").split())
+
+
+def _py_attr(el, name: str) -> str:
+    v = el.get(name)
+    if isinstance(v, list):  # bs4 splits multi-valued attributes such as class
+        return " ".join(v)
+    return v or ""
+
+
+def _py_nonempty(rec: dict) -> bool:
+    return any(v for v in rec.values())
+
+
+def _py_pick(el, p: dict) -> dict:
+    if p.get("fields"):
+        return {name: _py_field(el, f) for name, f in p["fields"].items()}
+    mode = p.get("mode")
+    if mode == "text":
+        return {"text": _py_text(el)}
+    if mode == "html":
+        return {"html": el.decode_contents()}
+    if mode == "attr":
+        return {a: _py_attr(el, a) for a in p["attrs"]}
+    return {"text": _py_text(el), "html": el.decode_contents()}
+
+
+def _py_field(root, f: dict):
+    if f.get("fields"):
+        els = root.select(f["sel"]) if f["sel"] else [root]
+        return [r for r in (_py_pick(el, f) for el in els) if _py_nonempty(r)]
+    el = root.select_one(f["sel"]) if f["sel"] else root
+    if el is None:
+        return ""
+    r = _py_pick(el, f)
+    return next(iter(r.values())) if len(r) == 1 else r
+
+
+def extract_html(html: str, specs) -> dict:
+    """EXTRACT_JS equivalent over static markup (offline replay); needs the optional bs4 package."""
+    if BeautifulSoup is None:
+        raise RuntimeError("HTML parser extraction needs beautifulsoup4 (pip install beautifulsoup4)")
+    soup = BeautifulSoup(html, "html.parser")
+    data, errors = {}, {}
+    for p in compile_specs(tuple(specs)):
+        try:
+            data[p["key"]] = [r for r in (_py_pick(el, p) for el in soup.select(p["sel"])) if _py_nonempty(r)]
+        except Exception as e:  # noqa - invalid selectors surface per key, like the in-page version
+            errors[p["key"]] = str(e)
+    return {"data": data, "errors": errors}
@@ -0,0 +1,201 @@
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import List
+
+from crawler import Crawler
+from extraction import compile_specs
+from models import ScrapeTask
+from readiness import ReadinessRules
+from retry_queue import RetryScheduler
+from url_runner import UrlRunner
+
+
+class FairShare:
+    """Splits the shared concurrency limit across active jobs.
+
+    Each active job gets an equal share of the (possibly adaptive) global limit, capped by its
+    quota, with capacity a capped job leaves unused split among the rest. A big crawl cannot
+    starve a small ad-hoc job, and an otherwise idle server gives one job everything.
+    """
+
+    def __init__(self, controller):
+        self.controller = controller
+        self._inflight: dict[str, int] = {}
+        self._quota: dict[str, int] = {}
+        self._cond = asyncio.Condition()
+
+    def add(self, job_id: str, quota: int):
+        self._inflight[job_id] = 0
+        self._quota[job_id] = quota
+
+    async def remove(self, job_id: str):
+        self._inflight.pop(job_id, None)
+        self._quota.pop(job_id, None)
+        async with self._cond:
+            self._cond.notify_all()  # remaining jobs get a larger share
+
+    def share(self, job_id: str) -> int:
+        # Water-filling: capacity a quota-capped job cannot use is split among the others.
+        remaining = self.controller.limit
+        caps = sorted(q or remaining for q in self._quota.values())
+        fair = remaining
+        for n_left, cap in zip(range(len(caps), 0, -1), caps):
+            fair = -(-remaining // n_left)
+            if cap >= fair:
+                break
+            remaining -= cap
+        quota = self._quota.get(job_id) or fair
+        return max(1, min(quota, fair))
+
+    @asynccontextmanager
+    async def slot(self, job_id: str):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._inflight[job_id] < self.share(job_id))
+            self._inflight[job_id] += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                if job_id in self._inflight:
+                    self._inflight[job_id] -= 1
+                self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        return {job: {"inflight": n, "share": self.share(job)} for job, n in self._inflight.items()}
+
+
+class JobController:
+    """ConcurrencyController view for one job: fair-share gate first, then the shared host/global limits."""
+
+    def __init__(self, shared, fair: FairShare, job_id: str, quota: int):
+        self.shared = shared
+        self.fair = fair
+        self.job_id = job_id
+        self.quota = quota
+
+    @property
+    def limit(self) -> int:
+        return self.fair.share(self.job_id)
+
+    @property
+    def maximum(self) -> int:
+        return min(self.quota, self.shared.maximum) if self.quota else self.shared.maximum
+
+    @asynccontextmanager
+    async def slot(self, host: str = ""):
+        async with self.fair.slot(self.job_id):
+            async with self.shared.slot(host):
+                yield
+
+    def record(self, *args, **kwargs):
+        self.shared.record(*args, **kwargs)
+
+
+@dataclass
+class JobSpec:
+    """One scrape/crawl job (server request body or manifest group)."""
+    urls: List[str]
+    selectors: List[str]
+    wait: str | None = None
+    stem: str = "scrape"
+    crawl: bool = False
+    max_pages: int = 50
+    max_depth: int = 3
+    cross_domain: bool = False
+    allow_subdomains: bool = False
+    include: List[str] | None = None
+    exclude: List[str] | None = None
+    ready: str | None = None
+    ready_for: List[List[str]] | None = None
+    block_patterns: List[str] | None = None
+    retries: int = 1
+    concurrency: int = 0
+    include_html: bool = False
+    name: str | None = None
+
+    @classmethod
+    def from_dict(cls, body: dict, defaults: dict) -> "JobSpec":
+        if not isinstance(body, dict):
+            raise ValueError("job body must be a JSON object")
+        known = set(cls.__dataclass_fields__)
+        unknown = set(body) - known
+        if unknown:
+            raise ValueError(f"unknown job field(s): {', '.join(sorted(unknown))}")
+        merged = {**{k: v for k, v in defaults.items() if v is not None}, **body}
+        if isinstance(merged.get("urls"), str):
+            merged["urls"] = [merged["urls"]]
+        if not merged.get("urls"):
+            raise ValueError("job needs at least one URL in 'urls'")
+        if not merged.get("selectors"):
+            raise ValueError("job needs 'selectors' (no server default set)")
+        spec = cls(**{k: v for k, v in merged.items() if k in known})
+        compile_specs(tuple(spec.selectors))
+        return spec
+
+
+class JobRunner:
+    """Runs JobSpecs concurrently on one warm Scraper, sharing its controller and rate limiter.
+
+    Used by the scrape server (one job per request) and manifest runs (one job per group).
+    """
+
+    def __init__(self, scraper, logger, controller, *, timeout_ms: int, rate_limiter=None, job_quota: int = 0,
+                 budget=None):
+        self.scraper = scraper
+        self.logger = logger
+        self.controller = controller
+        self.timeout_ms = timeout_ms
+        self.rate_limiter = rate_limiter
+        self.job_quota = job_quota
+        self.budget = budget
+        self.fair = FairShare(controller)
+        self._ids = itertools.count(1)
+        self.completed = 0
+
+    async def run(self, spec: JobSpec, emit) -> dict:
+        """Run one job on the warm pipeline, calling emit(dict) per page; returns stats."""
+        job_id = f"{spec.name or 'job'}-{next(self._ids)}"
+        quotas = [q for q in (spec.concurrency, self.job_quota) if q]
+        quota = min(quotas) if quotas else 0
+        controller = JobController(self.controller, self.fair, job_id, quota)
+        readiness = ReadinessRules.from_args(spec.ready, spec.ready_for)
+        scheduler = RetryScheduler(max_attempts=spec.retries, logger=self.logger)
+
+        def on_page(url: str, cleaned: dict, _links=None):
+            if not spec.include_html:
+                cleaned = {k: v for k, v in cleaned.items() if k != '__page_html__'}
+            emit({"event": "result", "job": job_id, "url": url, "data": cleaned})
+
+        self.fair.add(job_id, quota)
+        self.logger.info(f"[JOB] {job_id} started: {len(spec.urls)} url(s) crawl={spec.crawl} quota={quota or 'fair'}")
+        try:
+            if spec.crawl:
+                pages = await Crawler(self.scraper, self.logger, self.timeout_ms).crawl(
+                    seeds=spec.urls, selectors=spec.selectors, wait_selector=spec.wait, stem=spec.stem,
+                    max_pages=spec.max_pages, max_depth=spec.max_depth, same_domain=not spec.cross_domain,
+                    allow_subdomains=spec.allow_subdomains, include_patterns=spec.include,
+                    exclude_patterns=spec.exclude, rate_limiter=self.rate_limiter, controller=controller,
+                    block_patterns=spec.block_patterns, readiness=readiness, retry_scheduler=scheduler,
+                    on_page=on_page, budget=self.budget, include_html=spec.include_html,
+                )
+                stats = {"pages": len(pages), "retries_scheduled": scheduler.scheduled}
+            else:
+                runner = UrlRunner(
+                    self.scraper, self.logger, controller, scheduler,
+                    timeout_ms=self.timeout_ms, rate_limiter=self.rate_limiter, on_result=on_page,
+                    budget=self.budget,
+                )
+                tasks = (
+                    ScrapeTask(url=u, selectors=spec.selectors, wait_selector=spec.wait, stem=spec.stem,
+                               block_patterns=spec.block_patterns, ready=readiness.for_url(u),
+                               include_html=spec.include_html)
+                    for u in spec.urls
+                )
+                stats = await runner.run(tasks)
+        finally:
+            await self.fair.remove(job_id)
+        self.completed += 1
+        self.logger.info(f"[JOB] {job_id} finished: {stats}")
+        return {"job": job_id, **stats}
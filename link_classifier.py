@@ -0,0 +1,302 @@
+import asyncio
+import hashlib
+import json
+import re
+import ssl
+import struct
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+# Extensions that never render as a page our selectors can use.
+BINARY_EXTENSIONS = frozenset({
+    "pdf", "zip", "gz", "tgz", "bz2", "xz", "rar", "7z", "tar", "exe", "msi", "dmg", "pkg", "deb", "rpm", "apk",
+    "iso", "img", "bin", "jpg", "jpeg", "png", "gif", "webp", "avif", "svg", "ico", "bmp", "tif", "tiff",
+    "mp3", "m4a", "wav", "ogg", "flac", "aac", "mp4", "m4v", "webm", "avi", "mov", "mkv", "wmv", "flv",
+    "doc", "docx", "xls", "xlsx", "ppt", "pptx", "odt", "ods", "odp", "rtf", "epub", "csv", "json", "xml",
+    "rss", "atom", "txt", "css", "js", "mjs", "map", "woff", "woff2", "ttf", "otf", "eot", "torrent",
+})
+# Extensions that are served as HTML often enough to navigate without asking.
+HTML_EXTENSIONS = frozenset({"html", "htm", "xhtml", "shtml", "php", "asp", "aspx", "jsp", "jspx", "cfm", "cgi", "pl"})
+_HTML_TYPES = ("text/html", "application/xhtml+xml")
+_DIGITS = re.compile(r"\d+")
+
+
+def url_extension(url: str) -> str:
+    """Lower-case extension of the last path segment ('' if none)."""
+    last = urlparse(url).path.rsplit("/", 1)[-1]
+    stem, dot, ext = last.rpartition(".")
+    return ext.lower() if dot and stem and ext.isalnum() and len(ext) <= 5 else ""
+
+
+def is_html_type(content_type: str | None) -> bool:
+    """True for HTML content types and for unknown ones (navigation will tell)."""
+    if not content_type:
+        return True
+    return content_type.split(";", 1)[0].strip().lower() in _HTML_TYPES
+
+
+def url_pattern(url: str) -> tuple[str, str]:
+    """(host, path shape) used to generalise verdicts: digits become '#', the last segment '*'."""
+    p = urlparse(url)
+    head = p.path.rsplit("/", 1)[0] if "/" in p.path else ""
+    ext = url_extension(url)
+    return p.netloc.lower(), f"{_DIGITS.sub('#', head)}/*" + (f".{ext}" if ext else "")
+
+
+@dataclass
+class LinkVerdict:
+    html: bool
+    reason: str
+    content_type: str | None = None
+
+
+class SocksHttp:
+    """Tiny HTTP/1.0 client over the Tor SOCKS5 port for header probes and plain downloads.
+
+    HTTP/1.0 with `Connection: close` keeps responses unchunked, so bodies are read to EOF.
+    Hostnames are resolved by the proxy, as the browser does.
+    """
+
+    def __init__(self, proxy_host: str, proxy_port: int, user_agent: str, timeout: float = 10.0):
+        self.proxy_host = proxy_host
+        self.proxy_port = proxy_port
+        self.user_agent = user_agent
+        self.timeout = timeout
+
+    async def _connect(self, host: str, port: int):
+        reader, writer = await asyncio.open_connection(self.proxy_host, self.proxy_port)
+        try:
+            writer.write(b"\x05\x01\x00")
+            await writer.drain()
+            ver, method = await reader.readexactly(2)
+            if ver != 5 or method != 0:
+                raise ConnectionError("SOCKS5 proxy refused no-auth")
+            name = host.encode("idna")
+            writer.write(b"\x05\x01\x00\x03" + bytes([len(name)]) + name + struct.pack("!H", port))
+            await writer.drain()
+            _ver, rep, _rsv, atyp = await reader.readexactly(4)
+            if rep != 0:
+                raise ConnectionError(f"SOCKS5 connect to {host}:{port} failed (code {rep})")
+            addr_len = {1: 4, 4: 16}.get(atyp) or (await reader.readexactly(1))[0]
+            await reader.readexactly(addr_len + 2)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def _request(self, url: str, method: str, headers: dict | None = None):
+        """Send one request; returns (status, lower-cased headers, reader, writer) after the header block."""
+        p = urlparse(url)
+        https = p.scheme == "https"
+        port = p.port or (443 if https else 80)
+        reader, writer = await self._connect(p.hostname or "", port)
+        try:
+            if https:
+                await writer.start_tls(ssl.create_default_context(), server_hostname=p.hostname)
+            target = (p.path or "/") + (f"?{p.query}" if p.query else "")
+            lines = [f"{method} {target} HTTP/1.0", f"Host: {p.netloc}", f"User-Agent: {self.user_agent}",
+                     "Accept: */*", "Connection: close"]
+            lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+        except BaseException:
+            writer.close()
+            raise
+        status_line, *header_lines = head.decode("iso-8859-1").split("\r\n")
+        parts = status_line.split(" ", 2)
+        status = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+        out = {}
+        for line in header_lines:
+            k, sep, v = line.partition(":")
+            if sep:
+                out[k.strip().lower()] = v.strip()
+        return status, out, reader, writer
+
+    async def probe(self, url: str, max_redirects: int = 3) -> tuple[int, str | None, str]:
+        """(status, content type, final url) from headers only: HEAD, falling back to a 1-byte GET."""
+
+        async def run():
+            target = url
+            for _ in range(max_redirects + 1):
+                status, headers, _r, writer = await self._request(target, "HEAD")
+                writer.close()
+                if status in (403, 405, 501):  # HEAD not allowed here; ask for one byte instead
+                    status, headers, _r, writer = await self._request(target, "GET", {"Range": "bytes=0-0"})
+                    writer.close()
+                if status in (301, 302, 303, 307, 308) and headers.get("location"):
+                    target = urljoin(target, headers["location"])
+                    continue
+                return status, headers.get("content-type"), target
+            return status, headers.get("content-type"), target
+
+        return await asyncio.wait_for(run(), self.timeout)
+
+    async def download(self, url: str, path: Path, max_bytes: int) -> tuple[int, str | None, int]:
+        """Stream a GET body to `path` (aborting past `max_bytes`); returns (status, content type, size)."""
+        status, headers, reader, writer = await asyncio.wait_for(self._request(url, "GET"), self.timeout)
+        size = 0
+        tmp = path.with_suffix(path.suffix + ".part")
+        try:
+            with tmp.open("wb") as f:
+                while chunk := await asyncio.wait_for(reader.read(1 << 16), self.timeout):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ValueError(f"larger than {max_bytes} bytes")
+                    f.write(chunk)
+            tmp.replace(path)
+        finally:
+            writer.close()
+            tmp.unlink(missing_ok=True)
+        return status, headers.get("content-type"), size
+
+
+class DownloadSink:
+    """Receives non-HTML crawl targets instead of the browser.
+
+    Every URL is appended to `<dir>/index.jsonl`. With an `http` client the body is also
+    downloaded in the background over the SOCKS proxy, `concurrency` at a time.
+    """
+
+    def __init__(self, directory: str, http: SocksHttp | None = None, max_bytes: int = 50 * 1024 ** 2,
+                 concurrency: int = 2, logger=None):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.http = http
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self._sem = asyncio.Semaphore(max(1, concurrency))
+        self._tasks: set[asyncio.Task] = set()
+        self._index = (self.dir / "index.jsonl").open("a", encoding="utf-8")
+        self.recorded = 0
+        self.downloaded = 0
+        self.failed = 0
+        self.bytes = 0
+
+    def add(self, url: str, verdict: LinkVerdict):
+        self._index.write(json.dumps({"url": url, "reason": verdict.reason, "content_type": verdict.content_type,
+                                      "ts": round(time.time(), 3)}) + "\n")
+        self.recorded += 1
+        if self.http:
+            task = asyncio.ensure_future(self._download(url))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _target(self, url: str) -> Path:
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", urlparse(url).path.rsplit("/", 1)[-1])[-80:] or "index"
+        return self.dir / f"{hashlib.blake2b(url.encode('utf-8'), digest_size=8).hexdigest()}_{name}"
+
+    async def _download(self, url: str):
+        async with self._sem:
+            try:
+                status, _ctype, size = await self.http.download(url, self._target(url), self.max_bytes)
+                self.downloaded += 1
+                self.bytes += size
+                if self.logger:
+                    self.logger.info(f"[LINKS] downloaded {url} ({status}, {size} bytes)")
+            except Exception as e:  # noqa
+                self.failed += 1
+                if self.logger:
+                    self.logger.warning(f"[LINKS] download failed {url}: {e}")
+
+    async def close(self):
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        self._index.close()
+        if self.logger:
+            msg = f"[LINKS] sink {self.dir}: {self.recorded} recorded"
+            if self.http:
+                msg += f", {self.downloaded} downloaded ({self.bytes / 1e6:.1f} MB), {self.failed} failed"
+            self.logger.info(msg)
+
+
+class LinkClassifier:
+    """Decides before navigation whether a crawl target is an HTML page worth a browser slot.
+
+    1. Extension: known binary extensions are skipped, known page extensions navigate.
+    2. Learned per-host patterns: (host, path shape) verdicts from earlier probes and
+       navigations; `min_samples` agreeing outcomes (>= 90%) settle a pattern.
+    3. Optional header probe (HEAD or a 1-byte GET) over the SOCKS proxy for the rest.
+    Anything still unknown, including failed probes, is navigated so no page is lost.
+    """
+
+    def __init__(self, *, http: SocksHttp | None = None, sink: DownloadSink | None = None, min_samples: int = 3,
+                 probe_concurrency: int = 4, logger=None):
+        self.http = http
+        self.sink = sink
+        self.min_samples = max(1, min_samples)
+        self.logger = logger
+        self._probe_sem = asyncio.Semaphore(max(1, probe_concurrency))
+        self._patterns: dict[tuple[str, str], list[int]] = {}  # pattern -> [html, other]
+        self._probed: dict[str, LinkVerdict] = {}
+        self.avoided: Counter = Counter()
+        self.probes = 0
+        self.probe_errors = 0
+
+    def learn(self, url: str, html: bool):
+        counts = self._patterns.setdefault(url_pattern(url), [0, 0])
+        counts[0 if html else 1] += 1
+
+    def _learned(self, url: str) -> bool | None:
+        counts = self._patterns.get(url_pattern(url))
+        if not counts or sum(counts) < self.min_samples:
+            return None
+        html, other = counts
+        if html >= 0.9 * (html + other):
+            return True
+        if other >= 0.9 * (html + other):
+            return False
+        return None
+
+    async def classify(self, url: str) -> LinkVerdict:
+        ext = url_extension(url)
+        if ext in BINARY_EXTENSIONS:
+            return LinkVerdict(False, "extension")
+        if ext in HTML_EXTENSIONS:
+            return LinkVerdict(True, "extension")
+        learned = self._learned(url)
+        if learned is not None:
+            return LinkVerdict(learned, "pattern")
+        if self.http is None:
+            return LinkVerdict(True, "unknown")
+        cached = self._probed.get(url)
+        if cached is not None:
+            return cached
+        async with self._probe_sem:
+            self.probes += 1
+            try:
+                status, ctype, _final = await self.http.probe(url)
+            except Exception as e:  # noqa
+                self.probe_errors += 1
+                if self.logger:
+                    self.logger.debug(f"[LINKS] probe failed {url}: {e}")
+                return LinkVerdict(True, "probe_failed")
+        verdict = LinkVerdict(is_html_type(ctype), "probe", ctype)
+        if status < 400:
+            self.learn(url, verdict.html)
+        self._probed[url] = verdict
+        return verdict
+
+    def divert(self, url: str, verdict: LinkVerdict):
+        """Count a navigation avoided and hand the target to the sink, if any."""
+        self.avoided[verdict.reason] += 1
+        if self.sink:
+            self.sink.add(url, verdict)
+
+    def stats(self) -> dict:
+        return {
+            "navigations_avoided": sum(self.avoided.values()),
+            "by_reason": dict(self.avoided),
+            "probes": self.probes,
+            "probe_errors": self.probe_errors,
+            "patterns": sum(1 for counts in self._patterns.values() if sum(counts) >= self.min_samples),
+        }
+
+    async def close(self):
+        if self.sink:
+            await self.sink.close()
+        if self.logger:
+            self.logger.info(f"[LINKS] {self.stats()}")
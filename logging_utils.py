@@ -1,22 +1,147 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlparse
+
+# Structured fields picked up from `extra=` and emitted as top-level JSON keys.
+STRUCTURED_FIELDS = ("url", "host", "attempt", "stage", "duration")
+
+
+def log_fields(url: str | None = None, attempt: int | None = None, stage: str | None = None,
+               duration: float | None = None, **extra) -> dict:
+    """Build an `extra=` dict for structured logging; host is derived from url."""
+    out = {k: v for k, v in extra.items() if v is not None}
+    if url is not None:
+        out["url"] = url
+        out["host"] = urlparse(url).netloc.lower()
+    if attempt is not None:
+        out["attempt"] = attempt
+    if stage is not None:
+        out["stage"] = stage
+    if duration is not None:
+        out["duration"] = round(duration, 4)
+    return out
+
+
+def parse_sample_rates(spec) -> dict[str, float]:
+    """Parse 'crawler=0.1,backend_playwright=0.5' (or a list of such items) into {module: rate}."""
+    if not spec:
+        return {}
+    items = spec.split(",") if isinstance(spec, str) else [part for s in spec for part in s.split(",")]
+    rates = {}
+    for item in items:
+        if "=" not in item:
+            continue
+        module, rate = item.split("=", 1)
+        rates[module.strip()] = max(0.0, min(1.0, float(rate)))
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with timestamp, level, module, message and structured fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        obj = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "msg": record.getMessage(),
+        }
+        for key in STRUCTURED_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                obj[key] = value
+        if record.exc_info:
+            obj["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            obj["exc"] = record.exc_text
+        return json.dumps(obj, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep roughly `rate` of INFO/DEBUG records per module; warnings and errors always pass.
+
+    Sampling is counter based (every Nth record) so it is deterministic and cheap.
+    A '*' entry sets the rate for modules not listed explicitly.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._counters: dict[str, int] = {}
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.module, self.rates.get("*", 1.0))
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            self.dropped += 1
+            return False
+        every = max(1, round(1 / rate))
+        n = self._counters.get(record.module, 0)
+        self._counters[record.module] = n + 1
+        if n % every == 0:
+            return True
+        self.dropped += 1
+        return False
+
+
 class LoggerFactory:
-    import logging
-    from pathlib import Path
+    _listener: logging.handlers.QueueListener | None = None
+    _lock = threading.Lock()
 
     @staticmethod
-    def create(name: str = "scraper", level: int = __import__("logging").INFO):
-        logging = __import__("logging")
+    def create(name: str = "scraper", level: int = logging.INFO, json_format: bool = False,
+               async_mode: bool = False, sample: dict[str, float] | None = None):
+        """Return the named logger, configuring handlers on first use.
+
+        async_mode routes records through a QueueHandler; formatting and file I/O then
+        happen on a background QueueListener thread instead of the event loop.
+        """
         logger = logging.getLogger(name)
         if logger.handlers:
             return logger
-        logger.setLevel(level)
-        fmt = logging.Formatter("[%(asctime)s] %(levelname)s %(name)s: %(message)s")
-        stream = logging.StreamHandler()
-        stream.setFormatter(fmt)
-        logger.addHandler(stream)
-        path_cls = __import__("pathlib").Path
-        log_dir = path_cls("logs")
-        log_dir.mkdir(exist_ok=True)
-        fh = logging.FileHandler(log_dir / "scraper.log")
-        fh.setFormatter(fmt)
-        logger.addHandler(fh)
-        return logger
+        with LoggerFactory._lock:
+            if logger.handlers:
+                return logger
+            logger.setLevel(level)
+            if json_format:
+                fmt = JsonFormatter()
+            else:
+                fmt = logging.Formatter("[%(asctime)s] %(levelname)s %(name)s: %(message)s")
+            stream = logging.StreamHandler()
+            stream.setFormatter(fmt)
+            log_dir = Path("logs")
+            log_dir.mkdir(exist_ok=True)
+            fh = logging.FileHandler(log_dir / ("scraper.jsonl" if json_format else "scraper.log"))
+            fh.setFormatter(fmt)
+            if sample:
+                logger.addFilter(SamplingFilter(sample))
+            if async_mode:
+                q: queue.SimpleQueue = queue.SimpleQueue()
+                logger.addHandler(logging.handlers.QueueHandler(q))
+                listener = logging.handlers.QueueListener(q, stream, fh, respect_handler_level=True)
+                listener.start()
+                LoggerFactory._listener = listener
+                atexit.register(LoggerFactory.shutdown)
+            else:
+                logger.addHandler(stream)
+                logger.addHandler(fh)
+            return logger
+
+    @staticmethod
+    def shutdown():
+        """Flush and stop the background listener (no-op in synchronous mode)."""
+        listener = LoggerFactory._listener
+        if listener is not None:
+            LoggerFactory._listener = None
+            listener.stop()
@@ -1,75 +1,73 @@
 import asyncio
 import argparse
-import random
 from pathlib import Path
+from typing import Iterator
 import os
+import re
 import sys
 from config import Config
-from logging_utils import LoggerFactory
+from logging_utils import LoggerFactory, parse_sample_rates
 from tor_proxy import TorProxyManager
 from tor_rotation import TorRotator
 from captcha import CaptchaSolver
 from models import ScrapeTask
+from extraction import compile_specs
 from cleaner import DataCleaner
 from storage import DataStorage
 from fingerprint import Fingerprint
 from backend_playwright import PlaywrightBackend
 from backend_selenium import SeleniumBackend
 from scraper import Scraper
-from crawler import Crawler
+from postprocess import PostProcessor
+from retry_queue import RetryScheduler
+from url_runner import UrlRunner
+from url_source import MemorySeenStore, SqliteSeenStore, dedup, iter_url_file
+from crawler import Crawler, make_url_filter
+from distributed import CrawlCoordinator, CrawlWorker, parse_address
+from server import ScrapeServer
+from jobs import JobRunner
+from manifest import load_manifest, run_manifest
+from replay import replay_parse
+from warc import WarcIndex
+from timeouts import HostTimeouts, JobBudget
+from profiling import LoopLagMonitor, SamplingProfiler
+from link_classifier import DownloadSink, LinkClassifier, SocksHttp
 from rate_limiter import RateLimiter
+from concurrency import ConcurrencyController
+from block_detector import DEFAULT_BLOCK_PATTERNS
+from readiness import LADDER, ReadinessRules, ReadinessStrategy, ReadinessTuner
 
 
-# New helper to load seed file
-def _load_seed_file(path: str) -> list[str]:
-    p = Path(path)
-    if not p.exists():
-        raise FileNotFoundError(f"Seed file not found: {p}")
-    urls: list[str] = []
-    for line in p.read_text(encoding="utf-8").splitlines():
-        line = line.strip()
-        if not line or line.startswith('#'):
-            continue
-        # Auto-correct accidental backslashes in scheme
-        if line.startswith('http:\\') or line.startswith('https:\\'):
-            line = line.replace('\\', '/')
-        urls.append(line)
-    return urls
-
-
-def _load_urls(args) -> list[str]:
-    urls = []
-    if args.url:
-        urls.extend(args.url)
+def _iter_sources(args) -> Iterator[str]:
+    """All input URLs in order (positional, --url-file, --seeds-file, else seeds.txt), read lazily."""
+    yield from args.url or []
     if args.url_file:
-        p = Path(args.url_file)
-        if not p.exists():
-            raise FileNotFoundError(f"URL file not found: {p}")
-        for line in p.read_text(encoding="utf-8").splitlines():
-            line = line.strip()
-            if line and not line.startswith('#'):
-                urls.append(line)
-    # de-dup preserve order
-    seen = set()
-    deduped = []
-    for u in urls:
-        if u not in seen:
-            seen.add(u)
-            deduped.append(u)
-    return deduped
+        yield from iter_url_file(args.url_file)
+    if args.seeds_file:
+        yield from iter_url_file(args.seeds_file, fix_backslashes=True)
+    if not (args.url or args.url_file or args.seeds_file) and Path('seeds.txt').exists():
+        yield from iter_url_file('seeds.txt', fix_backslashes=True)
 
 async def main():
     p = argparse.ArgumentParser(description="Modular scraper (Tor mandatory) with optional site crawl + concurrency + rate limiting.")
     p.add_argument("url", nargs="*", help="One or more seed URLs (optional if --url-file or --seeds-file used)")
-    p.add_argument("-s", "--selector", action="append", required=True, help="CSS selector(s) to extract (repeat)")
+    p.add_argument("-s", "--selector", action="append",
+                   help="Extraction spec (repeat): CSS | '@text CSS' | '@html CSS' | '@attr:NAME[,NAME] CSS' | JSON item template")
     p.add_argument("--wait", help="Selector to wait for before extraction")
+    p.add_argument("--ready", help="Navigation readiness: commit|domcontentloaded|load|networkidle[:ms]|selector:<css>|js:<predicate>")
+    p.add_argument("--ready-for", nargs=2, action="append", metavar=("REGEX", "STRATEGY"), help="Readiness override for URLs matching REGEX (repeatable)")
+    p.add_argument("--auto-ready", action="store_true", help="Crawl: per host, switch to the cheapest readiness strategy that still yields results")
     p.add_argument("--engine", choices=["playwright", "selenium"], default="playwright")
     p.add_argument("--use-proxy", action="store_true", help="(Deprecated) always on unless SCRAPER_PROXY=0")
     p.add_argument("--no-random", action="store_true", help="Disable fingerprint randomization (deterministic)")
     p.add_argument("--url-file", help="Path to file with newline-separated URLs")
+    p.add_argument("--seen-db", help="SQLite file for URL de-duplication (constant memory); reuse it to skip URLs completed by earlier runs")
+    p.add_argument("--queue-size", type=int, default=0, help="Bounded input queue size for multi-URL mode (default 4x workers)")
     p.add_argument("--aggregate", action="store_true", help="Save a single aggregated JSON of all results (non-crawl mode)")
-    p.add_argument("--retries", type=int, default=1, help="Retries per URL on failure (non-crawl mode)")
-    p.add_argument("--retry-delay", type=float, default=2.0, help="Base seconds between retries")
+    p.add_argument("--retries", type=int, default=1, help="Total attempts per URL on failure")
+    p.add_argument("--retry-delay", type=float, default=2.0, help="Base seconds between retries (doubles per failure)")
+    p.add_argument("--retry-max-delay", type=float, default=60.0, help="Cap for exponential retry backoff")
+    p.add_argument("--host-failure-budget", type=int, default=0, help="Stop retrying a host after this many failures (0 = unlimited)")
     p.add_argument("--jitter", type=float, default=0.5, help="Random jitter (+/-) seconds added to delay between tasks")
     p.add_argument("--stem", default="scrape", help="Base filename stem for outputs")
     # Crawling options
@@ -81,12 +79,64 @@ async def main():
     p.add_argument("--include", action="append", help="Regex URL include pattern (repeatable)")
     p.add_argument("--exclude", action="append", help="Regex URL exclude pattern (repeatable)")
     p.add_argument("--seeds-file", help="File containing seed URLs (one per line)")
+    p.add_argument("--skip-non-html", action="store_true", help="Crawl: skip links to PDFs, images, archives etc. before navigating")
+    p.add_argument("--probe-links", action="store_true", help="Crawl: HEAD-probe links of unknown type over the SOCKS proxy (implies --skip-non-html)")
+    p.add_argument("--non-html-sink", metavar="DIR", help="Crawl: download skipped non-HTML targets into DIR over the SOCKS proxy (implies --skip-non-html)")
+    # Static asset cache
+    p.add_argument("--cache-dir", metavar="DIR", help="Persistent per-site cache of CSS/JS/fonts/images shared by all contexts and runs (Playwright)")
+    p.add_argument("--cache-max-mb", type=int, help="LRU size bound for --cache-dir")
+    # WARC capture / offline replay
+    p.add_argument("--warc", metavar="DIR", help="Record every fetched response into gzipped WARC files in DIR (Playwright)")
+    p.add_argument("--replay", action="append", metavar="WARC", help="Re-extract archived pages from WARC file(s)/dir(s) instead of fetching (repeatable)")
+    p.add_argument("--replay-engine", choices=["parser", "browser"], default="parser",
+                   help="parser: static HTML parser across all cores; browser: Playwright fed from the archive (JS pages)")
+    p.add_argument("--replay-workers", type=int, help="Worker processes for --replay-engine parser (default: CPU count)")
+    # Multi-job manifest
+    p.add_argument("--manifest", help="YAML/JSON manifest of job groups run concurrently in this process")
+    # Daemon mode
+    p.add_argument("--serve", metavar="ADDR", help="Run as a warm scrape server on HOST:PORT or unix:/path (jobs via POST /jobs)")
+    p.add_argument("--job-quota", type=int, default=0, help="Max concurrent pages per server job / manifest group (0 = fair share only)")
+    # Distributed crawl
+    p.add_argument("--coordinate", metavar="HOST:PORT", help="Serve the crawl frontier to --worker processes instead of fetching locally")
+    p.add_argument("--worker", action="store_true", help="Fetch tasks leased from a --coordinate process")
+    p.add_argument("--coordinator", metavar="HOST:PORT", help="Coordinator address for --worker")
+    p.add_argument("--lease-ttl", type=float, default=60.0, help="Seconds before an unreported lease is re-queued (coordinator)")
+    p.add_argument("--host-delay", type=float, default=0.0, help="Min seconds between leases for the same host (coordinator)")
     # Concurrency & rate limiting
     p.add_argument("--concurrency", type=int, help="Override max concurrency (default from env or 1)")
+    p.add_argument("--adaptive", action="store_true", help="AIMD concurrency: grow while healthy, back off on timeouts/blocks")
+    p.add_argument("--adaptive-min", type=int, help="Lower bound for adaptive concurrency")
+    p.add_argument("--adaptive-max", type=int, help="Upper bound for adaptive concurrency (default 4x --concurrency)")
+    p.add_argument("--per-host-max", type=int, help="Max parallel requests per host (0 = unlimited)")
     p.add_argument("--rate-max", type=int, help="Max requests per interval (set 0 to disable)")
     p.add_argument("--rate-interval", type=float, help="Interval seconds for --rate-max window")
     p.add_argument("--rate-min-delay", type=float, help="Minimum delay seconds between requests")
+    # Timeouts & budget
+    p.add_argument("--adaptive-timeout", action="store_true", help="Per-host timeouts from observed latency quantiles (p99 x factor, clamped)")
+    p.add_argument("--timeout-factor", type=float, help="Multiplier on the per-host latency quantile")
+    p.add_argument("--timeout-max", type=int, help="Ceiling ms for adaptive timeouts (default 4x SCRAPER_TIMEOUT_MS)")
+    p.add_argument("--time-budget", type=float, help="Stop dispatching new pages after this many seconds")
+    # Post-processing
+    p.add_argument("--process-pool", type=int, help="Clean/serialise results in N worker processes (0 = inline)")
+    p.add_argument("--process-batch", type=int, help="Max results per process-pool round trip")
+    # Block detection
+    p.add_argument("--block-pattern", action="append", help="Extra case-insensitive block page marker (repeatable)")
+    p.add_argument("--block-window", type=int, help="Max characters of markup scanned for block markers")
+    p.add_argument("--include-html", action="store_true", help="Store the full rendered document in __page_html__")
+    # Logging
+    p.add_argument("--log-json", action="store_true", help="Emit structured JSON log lines (logs/scraper.jsonl)")
+    p.add_argument("--log-async", action="store_true", help="Log through a background queue listener")
+    p.add_argument("--log-sample", action="append", help="Per-module INFO sampling MODULE=RATE (repeatable, '*' = default)")
+    # Diagnostics
+    p.add_argument("--profile", nargs="?", const="logs/profile.folded", metavar="PATH",
+                   help="Sample all thread stacks during the run; write folded stacks for flamegraph tools")
+    p.add_argument("--profile-interval", type=float, help="Profiler sampling interval in ms")
+    p.add_argument("--loop-lag", type=float, metavar="MS", help="Log event-loop stalls longer than MS with the blocking stack (0 = off)")
     args = p.parse_args()
+    if args.worker and not args.coordinator:
+        p.error("--worker requires --coordinator HOST:PORT")
+    if not args.selector and not (args.worker or args.serve or args.manifest):
+        p.error("-s/--selector is required (except with --worker, --serve or --manifest)")
 
     # Config (respect deterministic flag)
     if args.no_random:
@@ -108,72 +158,254 @@ async def main():
     # Override concurrency / rate settings if provided
     if args.concurrency is not None:
         cfg.max_concurrency = max(1, args.concurrency)
+    if args.adaptive:
+        cfg.adaptive_concurrency = True
+    if args.adaptive_min is not None:
+        cfg.adaptive_min = max(1, args.adaptive_min)
+    if args.adaptive_max is not None:
+        cfg.adaptive_max = max(0, args.adaptive_max)
+    if args.per_host_max is not None:
+        cfg.per_host_max = max(0, args.per_host_max)
     if args.rate_max is not None:
         cfg.rate_max_per_interval = (args.rate_max if args.rate_max > 0 else None)
     if args.rate_interval is not None:
         cfg.rate_interval_seconds = args.rate_interval
     if args.rate_min_delay is not None:
         cfg.rate_min_delay_seconds = args.rate_min_delay
+    if args.process_pool is not None:
+        cfg.postprocess_workers = max(0, args.process_pool)
+    if args.process_batch is not None:
+        cfg.postprocess_batch = max(1, args.process_batch)
+    if args.adaptive_timeout:
+        cfg.adaptive_timeout = True
+    if args.timeout_factor is not None:
+        cfg.timeout_factor = max(1.0, args.timeout_factor)
+    if args.timeout_max is not None:
+        cfg.timeout_max_ms = max(0, args.timeout_max)
+    if args.time_budget is not None:
+        cfg.time_budget_s = max(0.0, args.time_budget)
+    if args.probe_links:
+        cfg.probe_links = True
+    if args.non_html_sink:
+        cfg.non_html_dir = args.non_html_sink
+    if args.skip_non_html or cfg.probe_links or cfg.non_html_dir:
+        cfg.skip_non_html = True
+    if args.cache_dir:
+        cfg.cache_dir = args.cache_dir
+    if args.cache_max_mb is not None:
+        cfg.cache_max_mb = max(1, args.cache_max_mb)
+    if args.warc:
+        cfg.warc_dir = args.warc
+    if args.block_window is not None:
+        cfg.block_window_chars = max(256, args.block_window)
+    if args.include_html:
+        cfg.include_html = True
+    block_patterns = (list(DEFAULT_BLOCK_PATTERNS) + args.block_pattern) if args.block_pattern else None
+    try:
+        readiness = ReadinessRules.from_args(args.ready, args.ready_for)
+        if cfg.engine == "selenium" and not args.replay:
+            # Fail here rather than on every page.
+            readiness.validate_for_selenium()
+    except (ValueError, re.error) as e:
+        print(f"Invalid readiness strategy: {e}")
+        sys.exit(1)
+    try:
+        compile_specs(tuple(args.selector or ()))
+        coordinator_addr = parse_address(args.coordinator or args.coordinate) if (args.worker or args.coordinate) else None
+    except ValueError as e:
+        print(f"Invalid argument: {e}")
+        sys.exit(1)
+    if args.log_json:
+        cfg.log_json = True
+    if args.log_async:
+        cfg.log_async = True
+    if args.log_sample:
+        cfg.log_sample = ",".join(args.log_sample)
+    if args.loop_lag is not None:
+        cfg.loop_lag_ms = max(0, args.loop_lag)
+    if args.profile_interval is not None:
+        cfg.profile_interval_ms = max(1.0, args.profile_interval)
 
-    logger = LoggerFactory.create()
+    logger = LoggerFactory.create(
+        json_format=cfg.log_json,
+        async_mode=cfg.log_async,
+        sample=parse_sample_rates(cfg.log_sample),
+    )
+    profiler = None
+    if args.profile:
+        profiler = SamplingProfiler(args.profile, interval=cfg.profile_interval_ms / 1000, logger=logger)
+        profiler.start()
+    lag_monitor = None
+    if cfg.loop_lag_ms > 0:
+        lag_monitor = LoopLagMonitor(cfg.loop_lag_ms, logger=logger)
+        lag_monitor.start()
+    try:
+        await run(args, cfg, logger, block_patterns, readiness, coordinator_addr, lag_monitor)
+    finally:
+        if lag_monitor:
+            lag_monitor.stop()
+        if profiler:
+            profiler.stop()
+        LoggerFactory.shutdown()
 
-    urls = _load_urls(args)
-    # Merge seeds from file if provided
-    if getattr(args, 'seeds_file', None):
-        try:
-            urls.extend(_load_seed_file(args.seeds_file))
-        except FileNotFoundError as e:
-            logger = LoggerFactory.create()
-            logger.error(str(e))
-            sys.exit(3)
-    # Fallback to seeds.txt if still empty and file exists
-    if not urls and Path('seeds.txt').exists():
-        urls = _load_seed_file('seeds.txt')
 
-    if not urls:
-        logger = LoggerFactory.create()
+async def run(args, cfg, logger, block_patterns, readiness, coordinator_addr, lag_monitor=None):
+    for path in (args.url_file, args.seeds_file):
+        if path and not Path(path).exists():
+            logger.error(f"URL file not found: {path}")
+            sys.exit(3)
+    # CLI flags double as defaults for server jobs and manifest groups.
+    job_defaults = {
+        "selectors": args.selector, "wait": args.wait, "stem": args.stem, "ready": args.ready,
+        "ready_for": args.ready_for, "block_patterns": block_patterns, "retries": args.retries,
+        "max_pages": args.max_pages, "max_depth": args.max_depth, "include_html": cfg.include_html,
+    }
+    manifest_specs = None
+    if args.manifest:
+        try:
+            manifest_specs = load_manifest(args.manifest, job_defaults)
+        except (OSError, ValueError) as e:
+            logger.error(f"Invalid manifest: {e}")
+            sys.exit(1)
+    if args.replay and (args.crawl or args.coordinate or args.worker or args.serve or args.manifest):
+        logger.error("--replay only works with plain multi-URL extraction (no crawl/coordinator/worker/server/manifest).")
+        sys.exit(1)
+    replay_index = None
+    if args.replay:
+        try:
+            replay_index = WarcIndex(args.replay)
+        except (OSError, ValueError) as e:
+            logger.error(f"Cannot read WARC: {e}")
+            sys.exit(1)
+        logger.info(f"[REPLAY] indexed {len(replay_index)} response(s), {len(replay_index.page_urls())} page(s)")
+        if not replay_index.page_urls():
+            # Never fall through to live fetching: replay must stay offline.
+            logger.error(f"No archived pages to replay in {', '.join(args.replay)}")
+            sys.exit(1)
+    if not (args.worker or args.serve or args.manifest or args.replay) and not (args.url or args.url_file or args.seeds_file or Path('seeds.txt').exists()):
         logger.error("No URLs provided (positional, --seeds-file, seeds.txt, or --url-file).")
         return
 
-    # De-duplicate after aggregating all sources
-    dedup = []
-    seen = set()
-    for u in urls:
-        if u not in seen:
-            seen.add(u)
-            dedup.append(u)
-    urls = dedup
+    # Dedup store: in-memory digests spilling to sqlite when large, or a resumable sqlite file.
+    seen = SqliteSeenStore(args.seen_db) if args.seen_db else MemorySeenStore(cfg.seen_memory_max, logger=logger)
+    url_stream = dedup(_iter_sources(args), seen)
+    if args.crawl or args.coordinate:
+        # Crawl seeds are few; materialise them. Multi-URL mode consumes the stream lazily.
+        urls = list(url_stream)
+        if not urls:
+            logger.error("No URLs provided (positional, --seeds-file, seeds.txt, or --url-file).")
+            return
+
+    if args.coordinate:
+        # The coordinator only schedules; workers own browsers and Tor circuits.
+        coordinator = CrawlCoordinator(
+            urls,
+            {"selectors": args.selector, "wait_selector": args.wait, "stem": args.stem, "block_patterns": block_patterns,
+             "include_html": cfg.include_html},
+            url_filter=make_url_filter(urls, not args.cross_domain, args.allow_subdomains, args.include, args.exclude),
+            max_pages=args.max_pages,
+            max_depth=args.max_depth,
+            lease_ttl=args.lease_ttl,
+            host_delay=args.host_delay,
+            per_host_max=cfg.per_host_max,
+            readiness=readiness,
+            retry_scheduler=RetryScheduler(
+                max_attempts=args.retries, base_delay=args.retry_delay, max_delay=args.retry_max_delay,
+                jitter=args.jitter, host_budget=args.host_failure_budget, logger=logger,
+            ),
+            logger=logger,
+        )
+        try:
+            aggregated = await coordinator.serve(*coordinator_addr)
+            out_path = DataStorage(cfg.storage_dir, logger).save_json(aggregated, stem=f"{args.stem}_crawl")
+            logger.info(f"Distributed crawl complete. Pages: {len(aggregated)} saved: {out_path}")
+        finally:
+            seen.close()
+        return
+
+    if replay_index is not None and args.replay_engine == "parser":
+        # Offline: no browser, no Tor; extraction fans out over worker processes.
+        storage = DataStorage(cfg.storage_dir, logger)
+        try:
+            aggregated = await replay_parse(replay_index, args.selector, workers=args.replay_workers, logger=logger)
+            out_path = storage.save_json(aggregated, stem=f"{args.stem}_replay")
+            logger.info(f"Replay complete. Pages: {len(aggregated)} saved: {out_path}")
+        except RuntimeError as e:
+            logger.error(f"Replay failed: {e}")
+        finally:
+            seen.close()
+        return
 
     Fingerprint(cfg, LoggerFactory.create()).summary()
 
-    tor_proxy = TorProxyManager(cfg.tor_socks_host, cfg.tor_socks_port, logger)
-    proxy_settings = tor_proxy.playwright_proxy_settings()
-    if not proxy_settings:
-        logger.error("Tor SOCKS proxy unreachable. Ensure Tor is running on host:port.")
-        sys.exit(2)
+    if replay_index is not None:
+        # Browser replay never touches the network: every request is answered from the archive.
+        cfg.engine = "playwright"
+        cfg.warc_dir = ""
+        proxy_settings = None
+        tor_rotator = None
+        url_stream = dedup(iter(replay_index.page_urls()), seen)
+    else:
+        tor_proxy = TorProxyManager(cfg.tor_socks_host, cfg.tor_socks_port, logger)
+        proxy_settings = tor_proxy.playwright_proxy_settings()
+        if not proxy_settings:
+            logger.error("Tor SOCKS proxy unreachable. Ensure Tor is running on host:port.")
+            sys.exit(2)
 
-    tor_rotator = TorRotator(
-        host=cfg.tor_socks_host,
-        control_port=cfg.tor_control_port,
-        password=cfg.tor_control_password,
-        min_interval_s=cfg.tor_rotation_min_interval_s,
-        request_threshold=cfg.tor_request_threshold,
-        logger=logger
-    )
+        tor_rotator = TorRotator(
+            host=cfg.tor_socks_host,
+            control_port=cfg.tor_control_port,
+            password=cfg.tor_control_password,
+            min_interval_s=cfg.tor_rotation_min_interval_s,
+            request_threshold=cfg.tor_request_threshold,
+            logger=logger
+        )
 
     CaptchaSolver(cfg.captcha_api_key, logger)  # placeholder retained
 
     if cfg.engine == "playwright":
-        backend = PlaywrightBackend(cfg, logger, proxy_settings)
+        backend = PlaywrightBackend(cfg, logger, proxy_settings, replay=replay_index)
     else:
         if cfg.max_concurrency > 1:
             logger.warning("Selenium backend does not support >1 concurrency reliably; forcing concurrency=1.")
             cfg.max_concurrency = 1
-        backend = SeleniumBackend(cfg, logger, proxy_settings)
+        if cfg.adaptive_concurrency:
+            logger.warning("Adaptive concurrency disabled for Selenium backend.")
+            cfg.adaptive_concurrency = False
+        if cfg.warc_dir:
+            logger.warning("WARC capture needs the Playwright backend; --warc ignored for Selenium.")
+        if cfg.cache_dir:
+            logger.warning("The asset cache needs the Playwright backend; --cache-dir ignored for Selenium.")
+        backend = SeleniumBackend(cfg, logger, proxy_settings, phase=ReadinessStrategy.parse(readiness.default).phase)
 
     cleaner = DataCleaner()
     storage = DataStorage(cfg.storage_dir, logger)
-    scraper = Scraper(backend, cleaner, storage, logger, tor_rotator=tor_rotator)
+    postprocessor = None
+    if cfg.postprocess_workers > 0:
+        postprocessor = PostProcessor(cfg.postprocess_workers, batch_size=cfg.postprocess_batch, logger=logger)
+    timeouts = None
+    if cfg.adaptive_timeout:
+        timeouts = HostTimeouts(
+            cfg.timeout_ms,
+            quantile=cfg.timeout_quantile,
+            factor=cfg.timeout_factor,
+            min_ms=cfg.timeout_min_ms,
+            max_ms=cfg.timeout_max_ms or None,
+            logger=logger,
+        )
+    budget = None
+    if cfg.time_budget_s > 0:
+        if args.serve:
+            logger.warning("--time-budget is ignored in server mode.")
+        else:
+            budget = JobBudget(cfg.time_budget_s)
+    scraper = Scraper(backend, cleaner, storage, logger, tor_rotator=tor_rotator, postprocessor=postprocessor,
+                      timeouts=timeouts, budget=budget)
+
+    async def save_output(payload: dict, stem: str):
+        if postprocessor:
+            return storage.save_bytes(await postprocessor.serialize(payload), stem=stem)
+        return storage.save_json(payload, stem=stem)
 
     rate_limiter = None
     if cfg.rate_max_per_interval or cfg.rate_min_delay_seconds > 0:
@@ -184,8 +416,69 @@ async def main():
             logger=logger,
         )
 
-    if args.crawl:
+    controller = ConcurrencyController(
+        cfg.max_concurrency,
+        minimum=cfg.adaptive_min,
+        maximum=cfg.adaptive_max or None,
+        per_host_max=cfg.per_host_max or None,
+        adaptive=cfg.adaptive_concurrency,
+        latency_factor=cfg.adaptive_latency_factor,
+        logger=logger,
+    )
+
+    retry_scheduler = RetryScheduler(
+        max_attempts=args.retries,
+        base_delay=args.retry_delay,
+        max_delay=args.retry_max_delay,
+        jitter=args.jitter,
+        host_budget=args.host_failure_budget,
+        logger=logger,
+    )
+
+    if args.serve:
+        server = ScrapeServer(
+            scraper, logger, controller,
+            timeout_ms=cfg.timeout_ms,
+            rate_limiter=rate_limiter,
+            job_quota=max(0, args.job_quota),
+            job_defaults=job_defaults,
+            lag_monitor=lag_monitor,
+        )
+        try:
+            await server.serve(args.serve)
+        except asyncio.CancelledError:
+            logger.info("Server stopping.")
+    elif manifest_specs:
+        jobs = JobRunner(scraper, logger, controller, timeout_ms=cfg.timeout_ms, rate_limiter=rate_limiter,
+                         job_quota=max(0, args.job_quota), budget=budget)
+        logger.info(f"Running manifest {args.manifest}: {len(manifest_specs)} group(s)")
+        summary = await run_manifest(jobs, manifest_specs, save_output, logger)
+        out_path = await save_output(summary, f"{Path(args.manifest).stem}_summary")
+        logger.info(f"Manifest complete: {summary['pages']} page(s), {summary['failed_groups']} failed group(s); summary: {out_path}")
+    elif args.worker:
+        worker = CrawlWorker(scraper, logger, controller, timeout_ms=cfg.timeout_ms, rate_limiter=rate_limiter)
+        try:
+            stats = await worker.run(*coordinator_addr)
+            logger.info(f"Worker finished: {stats}")
+        except (OSError, RuntimeError) as e:
+            logger.error(f"Worker stopped: {e}")
+    elif args.crawl:
         crawler = Crawler(scraper, logger, cfg.timeout_ms)
+        link_classifier = None
+        if cfg.skip_non_html:
+            http = SocksHttp(cfg.tor_socks_host, cfg.tor_socks_port, cfg.user_agent, timeout=cfg.link_probe_timeout_s)
+            sink = None
+            if cfg.non_html_dir:
+                sink = DownloadSink(cfg.non_html_dir, http, max_bytes=cfg.non_html_max_mb * 1024 * 1024, logger=logger)
+            link_classifier = LinkClassifier(http=http if cfg.probe_links else None, sink=sink, logger=logger)
+        tuner = None
+        if args.auto_ready:
+            if cfg.engine != "playwright":
+                logger.warning("--auto-ready needs the Playwright backend; ignored for Selenium.")
+            elif readiness.default in LADDER:
+                tuner = ReadinessTuner(readiness.default, logger=logger)
+            else:
+                logger.warning(f"--auto-ready ignored: job strategy '{readiness.default}' is not one of {', '.join(LADDER)}")
         logger.info(
             f"Starting crawl: seeds={len(urls)} max_pages={args.max_pages} max_depth={args.max_depth} concurrency={cfg.max_concurrency}"
         )
@@ -202,54 +495,54 @@ async def main():
             exclude_patterns=args.exclude,
             concurrency=cfg.max_concurrency,
             rate_limiter=rate_limiter,
+            controller=controller,
+            block_patterns=block_patterns,
+            readiness=readiness,
+            tuner=tuner,
+            retry_scheduler=retry_scheduler,
+            budget=budget,
+            link_classifier=link_classifier,
+            include_html=cfg.include_html,
         )
-        out_path = storage.save_json(aggregated, stem=f"{args.stem}_crawl")
+        if link_classifier:
+            await link_classifier.close()
+        out_path = await save_output(aggregated, f"{args.stem}_crawl")
         logger.info(f"Crawl complete. Pages: {len(aggregated)} saved: {out_path}")
     else:
-        # Non-crawl multi-URL mode with optional concurrency.
+        # Non-crawl multi-URL mode: worker pool + delayed retry queue.
         aggregated = {} if args.aggregate else None
-        sem = asyncio.Semaphore(cfg.max_concurrency)
-        results = []
-        async def process(url: str, index: int):
-            async with sem:
-                if rate_limiter:
-                    await rate_limiter.acquire()
-                logger.info(f"Processing {index}/{len(urls)}: {url}")
-                task = ScrapeTask(url=url, selectors=args.selector, wait_selector=args.wait, stem=args.stem)
-                attempt = 0
-                last_error = None
-                while attempt < args.retries:
-                    attempt += 1
-                    try:
-                        path, cleaned, _links = await scraper.run_task(task, cfg.timeout_ms, gather_links=False)
-                        if aggregated is not None:
-                            aggregated[url] = cleaned
-                        logger.info(f"Success {url} (attempt {attempt}) saved {path}")
-                        return True
-                    except Exception as e:
-                        last_error = e
-                        logger.warning(f"Error scraping {url} attempt {attempt}: {e}")
-                        if attempt < args.retries:
-                            delay = args.retry_delay + random.uniform(-args.jitter, args.jitter)
-                            delay = max(0.0, delay)
-                            logger.info(f"Retrying in {delay:.2f}s...")
-                            await asyncio.sleep(delay)
-                logger.error(f"Failed {url} after {args.retries} attempts: {last_error}")
-                return False
-        if cfg.max_concurrency > 1:
-            tasks = [process(u, i+1) for i, u in enumerate(urls)]
-            await asyncio.gather(*tasks)
-        else:
-            for i, u in enumerate(urls):
-                await process(u, i+1)
-                if i < len(urls)-1 and cfg.max_concurrency == 1 and not rate_limiter:
-                    pause = args.jitter + random.uniform(0, args.jitter)
-                    await asyncio.sleep(pause)
+
+        def on_result(url: str, cleaned: dict, _links):
+            if aggregated is not None:
+                aggregated[url] = cleaned
+            if not (cleaned.get('__error__') or cleaned.get('__blocked__')):
+                # Only completed URLs are skipped when a --seen-db run is resumed.
+                seen.mark_done(url)
+
+        sequential = controller.maximum == 1 and not rate_limiter
+        runner = UrlRunner(
+            scraper, logger, controller, retry_scheduler,
+            timeout_ms=cfg.timeout_ms,
+            rate_limiter=rate_limiter,
+            pacing=args.jitter if sequential else None,
+            on_result=on_result,
+            budget=budget,
+        )
+        tasks = (
+            ScrapeTask(
+                url=u, selectors=args.selector, wait_selector=args.wait, stem=args.stem,
+                block_patterns=block_patterns, ready=readiness.for_url(u), include_html=cfg.include_html,
+            )
+            for u in url_stream
+        )
+        stats = await runner.run(tasks, queue_size=args.queue_size)
+        logger.info(f"Multi-URL run complete: {stats}")
         if aggregated is not None:
-            out_path = storage.save_json(aggregated, stem=f"{args.stem}_aggregate")
+            out_path = await save_output(aggregated, f"{args.stem}_aggregate")
             logger.info(f"Aggregated output saved: {out_path}")
 
     try:
+        seen.close()
         await scraper.close()
     finally:
         logger.info("Done.")
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from jobs import JobSpec
+from url_source import iter_url_file
+
+
+def load_manifest(path: str, cli_defaults: dict | None = None) -> list[JobSpec]:
+    """Parse a YAML/JSON manifest into one JobSpec per group.
+
+    Layout: {"defaults": {...}, "groups": [{"name", "urls" | "url_file", "selectors", ...}]}.
+    Group fields are the JobSpec fields; precedence is group > manifest defaults > CLI flags.
+    """
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(f"Manifest not found: {p}")
+    text = p.read_text(encoding="utf-8")
+    if p.suffix.lower() in (".yml", ".yaml"):
+        if yaml is None:
+            raise ValueError("PyYAML is required for YAML manifests (pip install pyyaml); JSON works without it")
+        doc = yaml.safe_load(text)
+    else:
+        doc = json.loads(text)
+    if isinstance(doc, list):
+        doc = {"groups": doc}
+    if not isinstance(doc, dict) or not isinstance(doc.get("groups"), list) or not doc["groups"]:
+        raise ValueError("Manifest needs a non-empty 'groups' list")
+    defaults = {**(cli_defaults or {}), **(doc.get("defaults") or {})}
+    specs, names = [], set()
+    for i, group in enumerate(doc["groups"], 1):
+        if not isinstance(group, dict):
+            raise ValueError(f"Group #{i} must be a mapping")
+        group = dict(group)
+        name = str(group.get("name") or f"group{i}")
+        if name in names:
+            raise ValueError(f"Duplicate group name '{name}'")
+        names.add(name)
+        url_file = group.pop("url_file", None)
+        if url_file:
+            # Relative to the manifest so manifests can ship with their URL lists.
+            url_path = Path(url_file) if Path(url_file).is_absolute() else p.parent / url_file
+            group["urls"] = list(group.get("urls") or []) + list(iter_url_file(str(url_path), fix_backslashes=True))
+        group.setdefault("stem", name)
+        group["name"] = name
+        try:
+            specs.append(JobSpec.from_dict(group, defaults))
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Group '{name}': {e}") from e
+    return specs
+
+
+async def run_manifest(jobs, specs: list[JobSpec], save_output, logger) -> dict:
+    """Run all groups concurrently on one JobRunner; one result file per group plus a summary."""
+
+    async def run_group(spec: JobSpec) -> dict:
+        results: dict = {}
+        started = time.monotonic()
+        entry = {"name": spec.name, "stem": spec.stem, "urls": len(spec.urls), "crawl": spec.crawl}
+        try:
+            stats = await jobs.run(spec, lambda ev: results.__setitem__(ev["url"], ev["data"]))
+            entry.update({k: v for k, v in stats.items() if k != "job"})
+        except Exception as e:  # noqa
+            logger.error(f"[MANIFEST] group {spec.name} failed: {e}")
+            entry["error"] = str(e)
+        entry["pages"] = len(results)
+        entry["elapsed_s"] = round(time.monotonic() - started, 2)
+        if results:
+            suffix = "crawl" if spec.crawl else "aggregate"
+            entry["output"] = str(await save_output(results, f"{spec.stem}_{suffix}"))
+        logger.info(f"[MANIFEST] group {spec.name} done: {entry}")
+        return entry
+
+    started = time.monotonic()
+    groups = await asyncio.gather(*(run_group(s) for s in specs))
+    return {
+        "groups": groups,
+        "pages": sum(g["pages"] for g in groups),
+        "failed_groups": sum(1 for g in groups if "error" in g),
+        "elapsed_s": round(time.monotonic() - started, 2),
+    }
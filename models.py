@@ -7,3 +7,11 @@ class ScrapeTask:
     selectors: List[str]
     wait_selector: str | None = None
     stem: str = "scrape"
+    # Extra/override anti-bot patterns for this job (None = backend defaults)
+    block_patterns: List[str] | None = None
+    # Readiness strategy spec (see readiness.ReadinessStrategy); None = 'load'
+    ready: str | None = None
+    # Anti-bot attempt number (1 = first try); backends bump it via RetryLater
+    attempt: int = 1
+    # Keep the full document in __page_html__ (otherwise only the block-check window)
+    include_html: bool = False
@@ -0,0 +1,89 @@
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from cleaner import DataCleaner
+
+
+def _clean_and_write(batch: list[tuple[dict, tuple, str]]) -> list[dict]:
+    """Worker-side: normalise, JSON-encode and write a batch of (raw, specs, path) results.
+
+    Module level so it pickles. The bytes never travel back; only the cleaned dict does.
+    """
+    cleaner = DataCleaner()
+    out = []
+    for raw, specs, path in batch:
+        cleaned = cleaner.normalize(raw, specs)
+        with open(path, "wb") as f:
+            f.write(_serialize(cleaned))
+        out.append(cleaned)
+    return out
+
+
+def _serialize(payload: dict) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+class PostProcessor:
+    """Runs DataCleaner.normalize, JSON serialisation and the result write in a ProcessPoolExecutor.
+
+    Results arriving within `batch_wait_ms` of each other (up to `batch_size`) share one
+    executor round trip to amortise pickling/IPC. The event loop only awaits futures.
+    """
+
+    def __init__(self, workers: int, batch_size: int = 8, batch_wait_ms: float = 5.0, logger=None):
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait_ms / 1000.0
+        self.logger = logger
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        self._pending: list[tuple[tuple, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self.batches = 0
+        self.items = 0
+
+    async def process(self, raw: dict, specs, path) -> dict:
+        """Clean one raw backend result, write it as JSON to `path` in a worker; returns the cleaned dict."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append(((raw, tuple(specs or ()), str(path)), fut))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.batch_wait, self._flush)
+        return await fut
+
+    async def serialize(self, payload: dict) -> bytes:
+        """JSON-encode one large payload (aggregates, crawl output) off the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._pool, _serialize, payload)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self.batches += 1
+        self.items += len(batch)
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(self._pool, _clean_and_write, [item for item, _ in batch])
+        job.add_done_callback(lambda f: self._deliver(f, batch))
+
+    @staticmethod
+    def _deliver(job: asyncio.Future, batch: list[tuple[tuple, asyncio.Future]]):
+        if job.cancelled() or job.exception() is not None:
+            err = job.exception() if not job.cancelled() else asyncio.CancelledError()
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(err)
+            return
+        for (_, fut), result in zip(batch, job.result()):
+            if not fut.done():
+                fut.set_result(result)
+
+    async def close(self):
+        self._flush()
+        if self.logger and self.batches:
+            self.logger.info(f"[POST] {self.items} results in {self.batches} batches ({self.items / self.batches:.1f}/batch)")
+        await asyncio.get_running_loop().run_in_executor(None, self._pool.shutdown)
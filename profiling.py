@@ -0,0 +1,179 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from logging_utils import log_fields
+
+# Frames from this file and its own threads are bookkeeping, not the code being profiled.
+_SELF = os.path.abspath(__file__)
+_OWN_THREADS = {"profiler", "loop-lag"}
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _frames(frame) -> list:
+    """Outermost-first list of frames ending at `frame`."""
+    out = []
+    while frame is not None:
+        out.append(frame)
+        frame = frame.f_back
+    out.reverse()
+    return out
+
+
+def format_stack(frame, limit: int = 12) -> str:
+    """Innermost `limit` frames as 'file:line func' joined outer -> inner, for one-line logs."""
+    parts = [f"{os.path.basename(f.f_code.co_filename)}:{f.f_lineno} {f.f_code.co_name}" for f in _frames(frame)]
+    if len(parts) > limit:
+        parts = ["..."] + parts[-limit:]
+    return " > ".join(parts)
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler for the whole process.
+
+    A daemon thread snapshots every thread's stack each `interval` seconds and aggregates them
+    as folded stacks ('thread;outer;...;inner count'), the input format of flamegraph.pl,
+    inferno and speedscope. Wall clock rather than CPU time, so a loop thread stuck in a
+    blocking call shows up exactly like one burning CPU.
+    """
+
+    def __init__(self, path: str, interval: float = 0.01, logger=None):
+        self.path = Path(path)
+        self.interval = max(0.001, interval)
+        self.logger = logger
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started = 0.0
+
+    def start(self):
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me or names.get(tid) in _OWN_THREADS:
+                    continue
+                stack = [f for f in _frames(frame) if f.f_code.co_filename != _SELF]
+                if not stack:
+                    continue
+                key = ";".join([names.get(tid, f"thread-{tid}")] + [_label(f) for f in stack])
+                self._stacks[key] += 1
+            self.samples += 1
+
+    def stop(self) -> Path | None:
+        """Stop sampling and write the folded stacks; returns the output path."""
+        if self._thread is None:
+            return None
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w", encoding="utf-8") as f:
+            for stack, count in sorted(self._stacks.items()):
+                f.write(f"{stack} {count}\n")
+        if self.logger:
+            leaves = Counter()
+            for stack, count in self._stacks.items():
+                leaves[stack.rsplit(";", 1)[-1]] += count
+            top = ", ".join(f"{name} x{n}" for name, n in leaves.most_common(5))
+            self.logger.info(
+                f"[PROFILE] {self.samples} samples over {time.monotonic() - self._started:.1f}s "
+                f"-> {self.path} (hottest leaves: {top})"
+            )
+        return self.path
+
+
+class LoopLagMonitor:
+    """Reports event-loop stalls longer than `threshold_ms`.
+
+    A heartbeat coroutine ticks on the loop; a watchdog thread notices when a tick is overdue
+    and captures the loop thread's stack while it is still blocked, i.e. inside the offending
+    callback. The stall is logged ('[LAG]', stage=loop_lag) once the loop gets going again.
+    """
+
+    def __init__(self, threshold_ms: float = 250, logger=None):
+        self.threshold = threshold_ms / 1000
+        self.interval = min(0.1, max(0.01, self.threshold / 4))
+        self.logger = logger
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self._beat = 0.0
+        self._captured: str | None = None
+        self._loop_tid: int | None = None
+        self._task: asyncio.Task | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        """Call from the running loop."""
+        self._loop_tid = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watchdog, name="loop-lag", daemon=True)
+        self._thread.start()
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._beat = now
+            lag = now - expected
+            if lag >= self.threshold:
+                self._record(lag)
+            else:
+                self._captured = None
+
+    def _watchdog(self):
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            if self._captured is None and time.monotonic() - beat - self.interval >= self.threshold:
+                frame = sys._current_frames().get(self._loop_tid)
+                # The heartbeat may have run meanwhile; only keep the stack of a stall still in progress.
+                if frame is not None and beat == self._beat:
+                    self._captured = format_stack(frame)
+
+    def _record(self, lag: float):
+        self.stalls += 1
+        self.max_lag = max(self.max_lag, lag)
+        self.total_lag += lag
+        stack, self._captured = self._captured, None
+        if self.logger:
+            self.logger.warning(
+                f"[LAG] event loop blocked {lag * 1000:.0f} ms; stack: {stack or 'not captured'}",
+                extra=log_fields(stage="loop_lag", duration=lag),
+            )
+
+    def snapshot(self) -> dict:
+        return {
+            "stalls": self.stalls,
+            "max_ms": round(self.max_lag * 1000, 1),
+            "total_ms": round(self.total_lag * 1000, 1),
+            "threshold_ms": round(self.threshold * 1000),
+        }
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self.logger and self.stalls:
+            self.logger.info(f"[LAG] {self.snapshot()}")
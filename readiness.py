@@ -0,0 +1,175 @@
+import re
+from dataclasses import dataclass, field
+
+# Built-in navigation strategies ordered cheapest first; used by ReadinessTuner.
+LADDER: tuple[str, ...] = ("commit", "domcontentloaded", "load", "networkidle:5000")
+_KINDS = ("commit", "domcontentloaded", "load", "networkidle", "selector", "js")
+# Navigation phases in order, and the Selenium pageLoadStrategy that stops at each.
+PHASES: tuple[str, ...] = ("commit", "domcontentloaded", "load")
+PAGE_LOAD_STRATEGY = {"commit": "none", "domcontentloaded": "eager", "load": "normal"}
+
+
+@dataclass(frozen=True)
+class ReadinessStrategy:
+    """When a page counts as ready for extraction.
+
+    Spec strings: 'commit', 'domcontentloaded', 'load', 'networkidle[:cap_ms]',
+    'selector:<css>' and 'js:<predicate expression or function>'.
+    """
+    kind: str = "load"
+    arg: str | None = None
+    cap_ms: int | None = None
+
+    @classmethod
+    def parse(cls, spec: str | None) -> "ReadinessStrategy":
+        if not spec:
+            return cls()
+        kind, _, arg = spec.partition(":")
+        kind = kind.strip().lower()
+        if kind not in _KINDS:
+            raise ValueError(f"Unknown readiness strategy '{spec}' (expected one of {', '.join(_KINDS)})")
+        if kind == "networkidle":
+            return cls(kind, cap_ms=int(arg) if arg.strip() else None)
+        if kind in ("selector", "js"):
+            if not arg.strip():
+                raise ValueError(f"Readiness strategy '{kind}' needs an argument, e.g. {kind}:...")
+            return cls(kind, arg.strip())
+        return cls(kind)
+
+    @property
+    def spec(self) -> str:
+        if self.kind == "networkidle" and self.cap_ms:
+            return f"networkidle:{self.cap_ms}"
+        if self.arg:
+            return f"{self.kind}:{self.arg}"
+        return self.kind
+
+    @property
+    def goto_wait_until(self) -> str:
+        """Playwright `wait_until` for the goto itself; extra waiting happens afterwards."""
+        if self.kind in ("commit", "domcontentloaded", "load"):
+            return self.kind
+        if self.kind == "selector":
+            return "commit"
+        return "domcontentloaded"
+
+    @property
+    def phase(self) -> str:
+        """Navigation phase in PHASES to reach before any extra waiting (Selenium has no networkidle)."""
+        if self.kind == "networkidle":
+            raise ValueError("Readiness 'networkidle' needs the Playwright backend")
+        return self.goto_wait_until
+
+
+@dataclass
+class ReadinessRules:
+    """Job default plus ordered (regex, strategy) overrides matched against the URL."""
+    default: str = "load"
+    rules: list[tuple[re.Pattern, str]] = field(default_factory=list)
+
+    @classmethod
+    def from_args(cls, default: str | None, pairs: list[list[str]] | None) -> "ReadinessRules":
+        ReadinessStrategy.parse(default)  # validate early
+        rules = []
+        for pattern, spec in pairs or []:
+            ReadinessStrategy.parse(spec)
+            rules.append((re.compile(pattern), spec))
+        return cls(default or "load", rules)
+
+    def explicit_for(self, url: str) -> str | None:
+        for rx, spec in self.rules:
+            if rx.search(url):
+                return spec
+        return None
+
+    def for_url(self, url: str) -> str:
+        return self.explicit_for(url) or self.default
+
+    def specs(self) -> list[str]:
+        return [self.default] + [spec for _, spec in self.rules]
+
+    def validate_for_selenium(self):
+        """Raise ValueError if any strategy needs Playwright (Selenium has no networkidle)."""
+        for spec in self.specs():
+            if ReadinessStrategy.parse(spec).kind == "networkidle":
+                raise ValueError(
+                    f"'{spec}' needs the Playwright backend; Selenium supports commit, domcontentloaded, load, selector: and js:"
+                )
+
+
+class _HostReadiness:
+    def __init__(self, chosen: int):
+        self.chosen = chosen
+        self.rejected: set[int] = set()
+        self.confirmations = 0
+        self.empty_streak = 0
+        self.pages = 0
+
+
+class ReadinessTuner:
+    """Per-host search for the cheapest ladder strategy that still yields selector results.
+
+    Every `probe_every`-th page of a host is fetched with the next cheaper strategy; after
+    `confirm` consecutive non-empty probes the host switches to it. An empty probe rejects
+    that strategy for the host; `confirm` empty pages in a row on the chosen strategy
+    escalate to the next more expensive one. Ready times are tracked per strategy.
+    """
+
+    def __init__(self, default: str = "load", probe_every: int = 3, confirm: int = 2, logger=None):
+        self.start = LADDER.index(default) if default in LADDER else LADDER.index("load")
+        self.probe_every = max(1, probe_every)
+        self.confirm = max(1, confirm)
+        self.logger = logger
+        self._hosts: dict[str, _HostReadiness] = {}
+        self._timings: dict[str, list[float]] = {}  # spec -> [count, total ms]
+
+    def _state(self, host: str) -> _HostReadiness:
+        st = self._hosts.get(host)
+        if st is None:
+            st = self._hosts[host] = _HostReadiness(self.start)
+        return st
+
+    def pick(self, host: str) -> str:
+        st = self._state(host)
+        st.pages += 1
+        cheaper = st.chosen - 1
+        if cheaper >= 0 and cheaper not in st.rejected and st.pages % self.probe_every == 0:
+            return LADDER[cheaper]
+        return LADDER[st.chosen]
+
+    def record(self, host: str, spec: str, ready_ms: float | None, nonempty: bool):
+        if ready_ms is not None:
+            t = self._timings.setdefault(spec, [0, 0.0])
+            t[0] += 1
+            t[1] += ready_ms
+        if spec not in LADDER:
+            return
+        st = self._state(host)
+        idx = LADDER.index(spec)
+        if idx < st.chosen:
+            if not nonempty:
+                st.rejected.add(idx)
+                st.confirmations = 0
+                return
+            st.confirmations += 1
+            if st.confirmations >= self.confirm:
+                self._switch(host, st, idx, "cheaper strategy confirmed")
+            return
+        if idx == st.chosen:
+            st.empty_streak = 0 if nonempty else st.empty_streak + 1
+            if st.empty_streak >= self.confirm and st.chosen < len(LADDER) - 1:
+                st.rejected.update(range(0, st.chosen + 1))
+                self._switch(host, st, st.chosen + 1, "empty results")
+
+    def _switch(self, host: str, st: _HostReadiness, idx: int, reason: str):
+        if self.logger:
+            self.logger.info(f"[READY] {host}: {LADDER[st.chosen]} -> {LADDER[idx]} ({reason})")
+        st.chosen = idx
+        st.confirmations = 0
+        st.empty_streak = 0
+
+    def report(self) -> dict:
+        return {
+            "hosts": {h: LADDER[st.chosen] for h, st in self._hosts.items()},
+            "avg_ready_ms": {s: round(total / n, 1) for s, (n, total) in self._timings.items() if n},
+        }
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from cleaner import DataCleaner
+import extraction
+from extraction import extract_html
+from warc import WarcIndex, parse_http_response, read_record
+
+_CHARSET = re.compile(r"charset=([\w-]+)", re.IGNORECASE)
+
+
+def _decode(headers: list[tuple[str, str]], body: bytes) -> str:
+    ctype = next((v for k, v in headers if k.lower() == "content-type"), "")
+    m = _CHARSET.search(ctype)
+    try:
+        return body.decode(m.group(1) if m else "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def _extract_batch(batch: list[tuple[str, str, int]], specs: tuple[str, ...]) -> list[tuple[str, dict | None, dict]]:
+    # Runs in a worker process: inflate, parse, extract and clean without the parent touching bodies.
+    cleaner = DataCleaner()
+    out = []
+    for url, path, offset in batch:
+        rec = read_record(path, offset)
+        if rec is None:
+            out.append((url, None, {"__error__": "unreadable record"}))
+            continue
+        status, headers, body = parse_http_response(rec.block)
+        extracted = extract_html(_decode(headers, body), specs)
+        data = cleaner.normalize(extracted["data"], specs)
+        data["__status__"] = status
+        out.append((url, data, extracted["errors"]))
+    return out
+
+
+async def replay_parse(index: WarcIndex, specs: list[str], *, workers: int | None = None, batch_size: int = 16,
+                       logger=None, on_result=None) -> dict:
+    """Re-run extraction specs over archived pages with an HTML parser, in parallel across cores.
+
+    Only (url, file, offset) triples cross the process boundary; at most 2 batches per
+    worker are in flight so huge archives stream through in constant memory.
+    """
+    if extraction.BeautifulSoup is None:
+        raise RuntimeError("--replay-engine parser needs beautifulsoup4 (pip install beautifulsoup4); or use --replay-engine browser")
+    workers = max(1, workers or os.cpu_count() or 1)
+    urls = index.page_urls()
+    loop = asyncio.get_running_loop()
+    results: dict = {}
+    errors = 0
+    pending: set[asyncio.Future] = set()
+
+    def collect(done):
+        nonlocal errors
+        for fut in done:
+            for url, data, errs in fut.result():
+                if errs:
+                    errors += 1
+                    if logger:
+                        logger.warning(f"[REPLAY] {url}: {errs}")
+                if data is not None:
+                    results[url] = data
+                    if on_result:
+                        on_result(url, data)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        frozen = tuple(specs)
+        try:
+            for i in range(0, len(urls), batch_size):
+                batch = [(u, *index.entry(u)) for u in urls[i:i + batch_size]]
+                pending.add(loop.run_in_executor(pool, _extract_batch, batch, frozen))
+                if len(pending) >= workers * 2:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    collect(done)
+            if pending:
+                done, pending = await asyncio.wait(pending)
+                collect(done)
+        finally:
+            for fut in pending:
+                fut.cancel()
+    if logger:
+        logger.info(f"[REPLAY] parsed {len(results)}/{len(urls)} archived page(s) with {workers} worker(s); {errors} with extraction errors")
+    return results
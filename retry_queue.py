@@ -0,0 +1,120 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+
+
+class DelayedQueue:
+    """Time-ordered asyncio queue: items become available `delay` seconds after put.
+
+    Waiting happens here, not in the caller's concurrency slot.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, object]] = []
+        self._seq = itertools.count()
+        self._changed = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def put(self, item, delay: float):
+        heapq.heappush(self._heap, (time.monotonic() + max(0.0, delay), next(self._seq), item))
+        self._changed.set()
+
+    def ready_in(self) -> float | None:
+        """Seconds until the earliest item is ready (0 if ready now, None if empty)."""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
+
+    def get_ready_nowait(self):
+        """Pop the earliest item if it is due, else return None."""
+        if self._heap and self._heap[0][0] <= time.monotonic():
+            return heapq.heappop(self._heap)[2]
+        return None
+
+    async def get(self):
+        """Wait for and pop the next due item."""
+        while True:
+            wait = self.ready_in()
+            if wait == 0:
+                return heapq.heappop(self._heap)[2]
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def drain(self) -> list:
+        """Remove and return every queued item regardless of due time."""
+        items = [entry[2] for entry in sorted(self._heap)]
+        self._heap.clear()
+        self._changed.set()
+        return items
+
+    async def wait_changed(self):
+        """Block until the next put (used by workers idling on another queue)."""
+        self._changed.clear()
+        await self._changed.wait()
+
+
+class RetryScheduler:
+    """Retry policy on top of a DelayedQueue.
+
+    schedule() applies exponential backoff (base_delay * 2^(n-1), capped at max_delay)
+    with +/- jitter, stops after max_attempts total attempts per key, and stops retrying a
+    host once it has used up host_budget failures (0 = unlimited). defer() is for
+    backend-directed delays (RetryLater) that are not charged against the budgets.
+    """
+
+    def __init__(self, *, max_attempts: int = 1, base_delay: float = 2.0, max_delay: float = 60.0,
+                 jitter: float = 0.5, host_budget: int = 0, logger=None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.host_budget = host_budget
+        self.logger = logger
+        self.queue = DelayedQueue()
+        self._failures: dict[str, int] = {}
+        self._host_failures: dict[str, int] = {}
+        self.scheduled = 0
+        self.exhausted = 0
+
+    def backoff(self, failures: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, failures - 1)))
+        return max(0.0, delay + random.uniform(-self.jitter, self.jitter))
+
+    def failures(self, key: str) -> int:
+        return self._failures.get(key, 0)
+
+    def schedule(self, key: str, host: str, item) -> float | None:
+        """Record a failure for key/host; queue item and return its delay, or None if out of budget."""
+        n = self._failures[key] = self._failures.get(key, 0) + 1
+        h = self._host_failures[host] = self._host_failures.get(host, 0) + 1
+        if n >= self.max_attempts:
+            self.exhausted += 1
+            self._failures.pop(key, None)
+            return None
+        if self.host_budget and h > self.host_budget:
+            if self.logger and h == self.host_budget + 1:
+                self.logger.warning(f"[RETRY] failure budget ({self.host_budget}) exhausted for host {host}; no further retries")
+            self.exhausted += 1
+            self._failures.pop(key, None)
+            return None
+        delay = self.backoff(n)
+        self.queue.put(item, delay)
+        self.scheduled += 1
+        return delay
+
+    def defer(self, item, delay: float):
+        self.queue.put(item, delay)
+        self.scheduled += 1
+
+    def forget(self, key: str):
+        self._failures.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self.queue)
@@ -1,20 +1,77 @@
+import time
+from urllib.parse import urlparse
+
+from backend_base import RetryLater
+from concurrency import is_timeout
+
+
 class Scraper:
-    def __init__(self, backend, cleaner, storage, logger, tor_rotator=None):
+    def __init__(self, backend, cleaner, storage, logger, tor_rotator=None, postprocessor=None,
+                 timeouts=None, budget=None):
         self.backend = backend
         self.cleaner = cleaner
         self.storage = storage
         self.logger = logger
         self.tor_rotator = tor_rotator
+        self.postprocessor = postprocessor
+        # Optional timeouts.HostTimeouts (per-host adaptive timeouts) and timeouts.JobBudget.
+        self.timeouts = timeouts
+        self.budget = budget
+
+    def _observe(self, host: str, data: dict | None, elapsed_ms: float, timeout_ms: int, error=None):
+        if not self.timeouts:
+            return
+        err = error if error is not None else (data or {}).get('__error__')
+        if err is not None:
+            if is_timeout(err):
+                self.timeouts.observe(host, timeout_ms, timed_out=True)
+            return
+        # Navigation + readiness is what the timeout guards; fall back to the whole grab.
+        ready_ms = ((data or {}).get('__timings__') or {}).get('ready_ms')
+        self.timeouts.observe(host, ready_ms if ready_ms is not None else elapsed_ms)
 
     async def run_task(self, task, timeout_ms: int, gather_links: bool = False):
-        raw = await self.backend.grab(task, timeout_ms, gather_links=gather_links)
+        host = urlparse(task.url).netloc.lower()
+        if self.timeouts:
+            timeout_ms = self.timeouts.timeout_ms(host)
+        if self.budget:
+            timeout_ms = self.budget.clamp_ms(timeout_ms)
+        started = time.monotonic()
+        try:
+            raw = await self.backend.grab(task, timeout_ms, gather_links=gather_links)
+        except RetryLater as r:
+            self._observe(host, r.data, (time.monotonic() - started) * 1000, timeout_ms)
+            raise
+        except Exception as e:
+            self._observe(host, None, (time.monotonic() - started) * 1000, timeout_ms, error=e)
+            raise
+        self._observe(host, raw, (time.monotonic() - started) * 1000, timeout_ms)
         links = raw.pop('__links__', []) if isinstance(raw, dict) else []
-        cleaned = self.cleaner.normalize(raw)
-        path = self.storage.save_json(cleaned, stem=task.stem)
+        if self.postprocessor:
+            # Cleaning, serialisation and the write happen in a worker; only the cleaned dict comes back.
+            started = time.monotonic()
+            path = self.storage.path_for(task.stem)
+            cleaned = await self.postprocessor.process(raw, task.selectors, path)
+            self.logger.info(f"Saved: {path}", extra={"stage": "save", "duration": round(time.monotonic() - started, 4)})
+        else:
+            cleaned = self.cleaner.normalize(raw, task.selectors)
+            path = self.storage.save_json(cleaned, stem=task.stem)
         if self.tor_rotator:
             self.tor_rotator.incr()
             await self.tor_rotator.maybe_rotate()
         return path, cleaned, links
 
+    async def warm(self):
+        """Launch the browser (and check Tor control) before the first task; used by the server."""
+        started = time.monotonic()
+        await self.backend.warm()
+        if self.tor_rotator:
+            await self.tor_rotator.warm()
+        self.logger.info(f"Backend warm in {time.monotonic() - started:.1f}s")
+
     async def close(self):
+        if self.timeouts:
+            self.logger.info(f"[TIMEOUT] per-host timeouts (ms): {self.timeouts.snapshot()}; {self.timeouts.timeouts} timed out")
+        if self.postprocessor:
+            await self.postprocessor.close()
         await self.backend.close()
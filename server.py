@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+import re
+
+from distributed import parse_address
+from jobs import JobRunner, JobSpec
+from readiness import ReadinessRules
+
+_MAX_BODY = 16 * 1024 * 1024
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+class ScrapeServer:
+    """Daemon keeping one warm Scraper (backend, Tor rotator, storage) for many jobs.
+
+    POST /jobs streams NDJSON: one {"event": "result"} line per page as it completes, then a
+    final {"event": "done"} line with the job stats. GET /health reports active jobs. A client
+    that disconnects cancels its job.
+    """
+
+    def __init__(self, scraper, logger, controller, *, timeout_ms: int, rate_limiter=None,
+                 job_defaults: dict | None = None, job_quota: int = 0, lag_monitor=None):
+        self.logger = logger
+        self.lag_monitor = lag_monitor
+        self.controller = controller
+        self.job_defaults = job_defaults or {}
+        self.jobs = JobRunner(scraper, logger, controller, timeout_ms=timeout_ms, rate_limiter=rate_limiter,
+                              job_quota=job_quota)
+
+    # -- HTTP -----------------------------------------------------------------------------
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        method, path, _version = line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while (h := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            k, _, v = h.decode("latin-1").partition(":")
+            headers[k.strip().lower()] = v.strip()
+        length = int(headers.get("content-length") or 0)
+        if length > _MAX_BODY:
+            raise ValueError("payload too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path.split("?", 1)[0], body
+
+    @staticmethod
+    async def _respond(writer, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def _stream_job(self, reader, writer, spec: JobSpec):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+            b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n"
+        )
+        lines: asyncio.Queue = asyncio.Queue()
+        job = asyncio.create_task(self.jobs.run(spec, lines.put_nowait))
+        # EOF from the client means it went away: cancel the job instead of scraping for nobody.
+        gone = asyncio.create_task(reader.read())
+        try:
+            while True:
+                getter = asyncio.create_task(lines.get())
+                done, _ = await asyncio.wait({getter, job, gone}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    await self._chunk(writer, getter.result())
+                    continue
+                getter.cancel()
+                if gone in done:
+                    self.logger.warning("[SERVE] client disconnected; cancelling job")
+                    job.cancel()
+                    break
+                while not lines.empty():
+                    await self._chunk(writer, lines.get_nowait())
+                try:
+                    await self._chunk(writer, {"event": "done", **job.result()})
+                except Exception as e:  # noqa
+                    self.logger.error(f"[SERVE] job failed: {e}")
+                    await self._chunk(writer, {"event": "error", "error": str(e)})
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+                break
+        except ConnectionError:
+            job.cancel()
+        finally:
+            gone.cancel()
+            await asyncio.gather(job, gone, return_exceptions=True)
+
+    @staticmethod
+    async def _chunk(writer, payload: dict):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n"
+        writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                req = await self._read_request(reader)
+            except ValueError as e:
+                await self._respond(writer, 413 if "large" in str(e) else 400, {"error": str(e)})
+                return
+            if req is None:
+                return
+            method, path, body = req
+            if path == "/health":
+                health = {
+                    "status": "ok", "jobs": self.jobs.fair.snapshot(), "completed": self.jobs.completed,
+                    "concurrency": self.controller.snapshot(),
+                }
+                if self.lag_monitor:
+                    health["loop_lag"] = self.lag_monitor.snapshot()
+                await self._respond(writer, 200, health)
+            elif path == "/jobs":
+                if method != "POST":
+                    await self._respond(writer, 405, {"error": "use POST"})
+                    return
+                try:
+                    spec = JobSpec.from_dict(json.loads(body or b"{}"), self.job_defaults)
+                    ReadinessRules.from_args(spec.ready, spec.ready_for)
+                except (ValueError, TypeError, re.error) as e:
+                    await self._respond(writer, 400, {"error": str(e)})
+                    return
+                await self._stream_job(reader, writer, spec)
+            else:
+                await self._respond(writer, 404, {"error": f"no route {path}"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, address: str):
+        """Serve until cancelled. `address` is HOST:PORT or unix:/path/to.sock."""
+        # Pay the browser launch before accepting connections, not inside the first job.
+        await self.jobs.scraper.warm()
+        if address.startswith("unix:"):
+            path = address[len("unix:"):]
+            if os.path.exists(path):
+                os.unlink(path)
+            server = await asyncio.start_unix_server(self._handle, path)
+        else:
+            server = await asyncio.start_server(self._handle, *parse_address(address))
+        self.logger.info(f"[SERVE] listening on {address} (warm backend, {self.controller.maximum} max concurrency)")
+        async with server:
+            await server.serve_forever()
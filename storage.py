@@ -9,12 +9,27 @@ class DataStorage:
         self.base.mkdir(parents=True, exist_ok=True)
         self.logger = logger
 
-    def save_json(self, payload: dict, stem: str):
-        json = __import__("json")
+    def path_for(self, stem: str):
+        """Timestamped output path for `stem` (also handed to post-processing workers that write themselves)."""
         dt = __import__("datetime").datetime
         ts = dt.utcnow().strftime("%Y%m%dT%H%M%SZ")
-        path = self.base / f"{stem}_{ts}.json"
+        return self.base / f"{stem}_{ts}.json"
+
+    def save_json(self, payload: dict, stem: str):
+        json = __import__("json")
+        time = __import__("time")
+        started = time.monotonic()
+        path = self.path_for(stem)
         with path.open("w", encoding="utf-8") as f:
             json.dump(payload, f, ensure_ascii=False, indent=2)
-        self.logger.info(f"Saved: {path}")
+        self.logger.info(f"Saved: {path}", extra={"stage": "save", "duration": round(time.monotonic() - started, 4)})
+        return path
+
+    def save_bytes(self, payload: bytes, stem: str):
+        """Write an already-serialised JSON payload (see postprocess.PostProcessor)."""
+        time = __import__("time")
+        started = time.monotonic()
+        path = self.path_for(stem)
+        path.write_bytes(payload)
+        self.logger.info(f"Saved: {path}", extra={"stage": "save", "duration": round(time.monotonic() - started, 4)})
         return path
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules live flat in the repo root.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
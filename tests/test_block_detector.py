@@ -0,0 +1,47 @@
+import pytest
+
+from block_detector import BlockDetector
+
+
+@pytest.mark.parametrize("status, headers, reason", [
+    (429, {}, "status:429"),
+    (200, {"CF-Mitigated": "challenge"}, "header:cf-mitigated"),
+    (403, {"Server": "cloudflare"}, "status:403:cloudflare"),
+    (503, {"server": "AkamaiGHost"}, "status:503:akamaighost"),
+])
+def test_response_checks_block(status, headers, reason):
+    verdict = BlockDetector().check_response(status, headers)
+    assert verdict.blocked and verdict.reason == reason
+
+
+@pytest.mark.parametrize("status, headers", [(200, {}), (403, {"server": "nginx"}), (None, None), (503, {})])
+def test_response_checks_pass(status, headers):
+    assert not BlockDetector().check_response(status, headers).blocked
+
+
+def test_text_matches_case_insensitively():
+    verdict = BlockDetector().check_text("<title>Just a Moment...</title>")
+    assert verdict.blocked and verdict.reason == "pattern:just a moment..."
+
+
+def test_text_only_scans_the_window():
+    d = BlockDetector(window_chars=100)
+    assert not d.check_text("x" * 100 + "captcha").blocked
+    assert d.check_text("x" * 90 + "captcha").blocked
+
+
+def test_patterns_are_literal_and_per_job():
+    d = BlockDetector()
+    assert not d.check_text("a.c").blocked
+    assert d.check_text("robot check", ["Robot Check"]).blocked
+    assert not d.check_text("aXc", ["a.c"]).blocked  # escaped, not a regex
+    assert d.matcher(["a.c"]) is d.matcher(("a.c",))  # compiled once per pattern set
+
+
+def test_empty_text_and_stats():
+    d = BlockDetector()
+    assert not d.check_text("").blocked
+    assert not d.check_text(None).blocked
+    d.check_response(429, {})
+    stats = d.stats()
+    assert (stats["checks"], stats["blocked"]) == (3, 1)
@@ -0,0 +1,42 @@
+import json
+
+from cleaner import DataCleaner
+
+
+def test_default_plan_keeps_markup_and_collapses_text():
+    raw = {"h1": [{"text": "  A   title ", "html": "<b>A</b>\n  title"}, {"text": "A title", "html": "<b>A</b>\n  title"}]}
+    assert DataCleaner().normalize(raw) == {"h1": [{"text": "A title", "html": "<b>A</b>\n  title"}]}
+
+
+def test_text_mode_collapses_even_a_key_named_html():
+    spec = json.dumps({"name": "p", "container": ".p", "fields": {"html": "@text .code", "body": "@html .body"}})
+    raw = {"p": [{"html": " a \n b ", "body": "<p>\n x </p>"}]}
+    assert DataCleaner().normalize(raw, [spec]) == {"p": [{"html": "a b", "body": "<p>\n x </p>"}]}
+
+
+def test_text_and_attr_modes():
+    raw = {
+        "@text h1": [{"text": " Hello \n world "}, {"text": "Hello world"}],
+        "@attr:href,title a": [{"href": " /a ", "title": "A\tlink"}],
+    }
+    out = DataCleaner().normalize(raw, ["@text h1", "@attr:href,title a"])
+    assert out == {"@text h1": [{"text": "Hello world"}], "@attr:href,title a": [{"href": "/a", "title": "A link"}]}
+
+
+def test_html_mode_keeps_markup():
+    raw = {"@html .x": [{"html": "<pre>a\n  b</pre>"}]}
+    assert DataCleaner().normalize(raw, ["@html .x"]) == raw
+
+
+def test_nested_template_records_are_cleaned_and_deduplicated():
+    spec = json.dumps({"name": "p", "container": ".p", "fields": {
+        "title": "@text h2", "tags": {"container": ".tag", "fields": {"label": "@text", "raw": "@html"}},
+    }})
+    raw = {"p": [{"title": " Mug ", "tags": [{"label": " red ", "raw": "<i> red </i>"}, {"label": "red", "raw": "<i> red </i>"}]}]}
+    assert DataCleaner().normalize(raw, [spec]) == {"p": [{"title": "Mug", "tags": [{"label": "red", "raw": "<i> red </i>"}]}]}
+
+
+def test_non_record_values():
+    raw = {"__links__": [" /a ", "/a", "", "/b", 3], "__blocked__": False, "__timings__": {"ready_ms": 1.0}}
+    out = DataCleaner().normalize(raw, ["h1"])
+    assert out == {"__links__": ["/a", "/b"], "__blocked__": False, "__timings__": {"ready_ms": 1.0}}
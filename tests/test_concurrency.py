@@ -0,0 +1,60 @@
+import asyncio
+
+from concurrency import ConcurrencyController, classify_outcome
+
+
+def test_fixed_controller_has_no_host_limits():
+    c = ConcurrencyController(4)
+    c.record("a", 0.1)
+    assert c.snapshot() == {"global": 4, "inflight": 0, "hosts": {}}
+
+
+def test_fixed_per_host_cap():
+    async def main():
+        c = ConcurrencyController(4, per_host_max=1)
+        order = []
+
+        async def fetch(host, i):
+            async with c.slot(host):
+                order.append((host, i, c.snapshot()["inflight"]))
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(fetch("a", 1), fetch("a", 2), fetch("b", 1))
+        # The second request to a waits for the first; b runs alongside.
+        assert [(h, i) for h, i, _ in order] == [("a", 1), ("b", 1), ("a", 2)]
+
+    asyncio.run(main())
+
+
+def test_adaptive_tracks_each_host_without_per_host_max():
+    async def main():
+        c = ConcurrencyController(4, maximum=8, adaptive=True, cooldown_s=0)
+        c.record("slow", 1.0, ok=False)
+        c.record("fast", 0.1)
+        hosts = c.snapshot()["hosts"]
+        assert hosts["slow"] == 2
+        assert hosts["fast"] == 2  # created from the (already lowered) global limit
+        for _ in range(20):
+            c.record("fast", 0.1)
+        assert c.snapshot()["hosts"]["fast"] > c.snapshot()["hosts"]["slow"]
+
+    asyncio.run(main())
+
+
+def test_adaptive_host_limit_capped():
+    async def main():
+        c = ConcurrencyController(2, maximum=8, per_host_max=3, adaptive=True)
+        for _ in range(100):
+            c.record("a", 0.1)
+        snap = c.snapshot()
+        assert snap["hosts"]["a"] == 3
+        assert snap["global"] == 8
+
+    asyncio.run(main())
+
+
+def test_classify_outcome():
+    assert classify_outcome({"title": "x"}) == (True, False, False)
+    assert classify_outcome({"__blocked__": True}) == (True, True, False)
+    assert classify_outcome({"__error__": "Timeout 15000ms exceeded"}) == (False, False, True)
+    assert classify_outcome(None, asyncio.TimeoutError()) == (False, False, True)
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import socket
+
+from concurrency import ConcurrencyController
+from distributed import CrawlCoordinator, CrawlWorker
+
+logger = logging.getLogger("test_distributed")
+
+
+class FakeScraper:
+    def __init__(self, delay: float = 0.0, links: dict | None = None):
+        self.delay = delay
+        self.links = links or {}
+        self.urls: list[str] = []
+
+    async def run_task(self, task, timeout_ms, gather_links=False):
+        self.urls.append(task.url)
+        await asyncio.sleep(self.delay)
+        return None, {"title": task.url}, self.links.get(task.url, [])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _coordinator(seeds, lease_ttl):
+    return CrawlCoordinator(seeds, {"selectors": ["title=title"]}, url_filter=lambda u: True,
+                            max_pages=10, max_depth=1, lease_ttl=lease_ttl, logger=logger)
+
+
+async def _crawl(coord, scraper, port):
+    worker = CrawlWorker(scraper, logger, ConcurrencyController(2), timeout_ms=1000, worker_id="w1")
+    serving = asyncio.create_task(coord.serve("127.0.0.1", port, linger_s=1.0))
+    stats = await asyncio.wait_for(worker.run("127.0.0.1", port, connect_wait_s=5.0), timeout=10)
+    return await asyncio.wait_for(serving, timeout=5), stats
+
+
+def test_expired_lease_is_requeued_to_live_worker():
+    async def main():
+        coord = _coordinator(["https://a.test/p", "https://b.test/p"], lease_ttl=0.3)
+        # A worker that leases a page and vanishes without reporting or renewing.
+        lost = coord.lease("dead", 1)["tasks"][0]["url"]
+        scraper = FakeScraper(links={"https://a.test/p": ["next"]})
+        aggregated, stats = await _crawl(coord, scraper, _free_port())
+        assert coord.stats["expired"] == 1
+        assert lost in scraper.urls
+        assert set(aggregated) == {"https://a.test/p", "https://b.test/p", "https://a.test/next"}
+        assert stats == {"succeeded": 3, "failed": 0}
+
+    asyncio.run(main())
+
+
+def test_heartbeat_keeps_slow_tasks_leased():
+    async def main():
+        coord = _coordinator(["https://a.test/p"], lease_ttl=0.6)
+        scraper = FakeScraper(delay=1.5)
+        aggregated, _ = await _crawl(coord, scraper, _free_port())
+        assert coord.stats["expired"] == 0
+        assert scraper.urls == ["https://a.test/p"]
+        assert list(aggregated) == ["https://a.test/p"]
+
+    asyncio.run(main())
+
+
+def test_worker_stops_when_heartbeat_fails():
+    async def main():
+        coord = _coordinator(["https://a.test/p"], lease_ttl=0.6)
+
+        def renew(leases):
+            raise KeyError("renew")
+
+        coord.renew = renew
+        port = _free_port()
+        worker = CrawlWorker(FakeScraper(delay=5.0), logger, ConcurrencyController(1), timeout_ms=1000, worker_id="w1")
+        serving = asyncio.create_task(coord.serve("127.0.0.1", port))
+        try:
+            await asyncio.wait_for(worker.run("127.0.0.1", port, connect_wait_s=5.0), timeout=3)
+        except RuntimeError as e:
+            assert "bad request" in str(e)
+        else:
+            raise AssertionError("worker kept running without lease renewals")
+        finally:
+            serving.cancel()
+
+    asyncio.run(main())
+
+
+def test_two_workers_share_the_frontier_exactly_once():
+    async def main():
+        pages = [f"https://a.test/p{i}" for i in range(31)]
+        links = {pages[i]: [f"p{2 * i + 1}", f"p{2 * i + 2}"] for i in range(15)}
+        coord = CrawlCoordinator([pages[0]], {"selectors": ["title=title"]}, url_filter=lambda u: True,
+                                 max_pages=100, max_depth=4, lease_ttl=0.3, logger=logger)
+        leased: list[tuple[str, str]] = []
+        lease = coord.lease
+
+        def spy(worker, n):
+            reply = lease(worker, n)
+            leased.extend((worker, t["url"]) for t in reply["tasks"])
+            return reply
+
+        coord.lease = spy
+        # The only seed goes to a worker that dies; the live ones can start once it expires.
+        coord.lease("dead", 1)
+        port = _free_port()
+        scrapers = [FakeScraper(delay=0.1, links=links) for _ in range(2)]
+        workers = [
+            CrawlWorker(s, logger, ConcurrencyController(2), timeout_ms=1000, worker_id=f"w{i}")
+            for i, s in enumerate(scrapers)
+        ]
+        serving = asyncio.create_task(coord.serve("127.0.0.1", port, linger_s=1.0))
+        stats = await asyncio.wait_for(
+            asyncio.gather(*(w.run("127.0.0.1", port, connect_wait_s=5.0) for w in workers)), timeout=15
+        )
+        aggregated = await asyncio.wait_for(serving, timeout=5)
+
+        fetched = scrapers[0].urls + scrapers[1].urls
+        assert sorted(fetched) == sorted(pages)  # every page once, none twice
+        assert all(s.urls for s in scrapers)  # both workers took part
+        assert set(aggregated) == set(pages)
+        assert sum(s["succeeded"] for s in stats) == len(pages)
+        live = [url for worker, url in leased if worker != "dead"]
+        assert len(live) == len(set(live)) == len(pages)
+        assert [url for worker, url in leased if worker == "dead"] == [pages[0]]
+        assert coord.stats["expired"] == 1
+
+    asyncio.run(main())
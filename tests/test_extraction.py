@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from extraction import compile_specs, extract_html, output_keys
+
+
+def test_plain_css_keeps_text_and_html():
+    (plan,) = compile_specs(("h1.title",))
+    assert plan == {"key": "h1.title", "sel": "h1.title", "mode": "both"}
+
+
+def test_mode_prefixes():
+    text, html, attr = compile_specs(("@text h1", "@HTML  .body", "@attr:href,title a.link"))
+    assert text == {"key": "@text h1", "sel": "h1", "mode": "text"}
+    assert html == {"key": "@HTML  .body", "sel": ".body", "mode": "html"}
+    assert attr == {"key": "@attr:href,title a.link", "sel": "a.link", "mode": "attr", "attrs": ["href", "title"]}
+
+
+def test_css_that_looks_like_a_mode_is_a_selector():
+    (plan,) = compile_specs(("html:lang(en) p",))
+    assert plan["mode"] == "both" and plan["sel"] == "html:lang(en) p"
+
+
+@pytest.mark.parametrize("spec", ["@bogus h1", "@attr: a", "@text:x h1", "@text", "  ", '{"fields": {}}', "{nope"])
+def test_invalid_specs(spec):
+    with pytest.raises(ValueError):
+        compile_specs((spec,))
+
+
+def test_json_template():
+    tpl = {
+        "name": "products",
+        "container": ".product",
+        "fields": {
+            "title": "@text h2",
+            "url": "@attr:href a",
+            "self": "@attr:data-id",
+            "tags": {"container": ".tag", "fields": {"label": "@text"}},
+        },
+    }
+    (plan,) = compile_specs((json.dumps(tpl),))
+    assert plan["key"] == "products"
+    assert plan["sel"] == ".product"
+    fields = plan["fields"]
+    assert fields["title"] == {"sel": "h2", "mode": "text"}
+    assert fields["url"] == {"sel": "a", "mode": "attr", "attrs": ["href"]}
+    assert fields["self"] == {"sel": "", "mode": "attr", "attrs": ["data-id"]}  # the container itself
+    assert fields["tags"]["fields"]["label"] == {"sel": "", "mode": "text"}
+
+
+def test_template_needs_container():
+    with pytest.raises(ValueError, match="container"):
+        compile_specs((json.dumps({"fields": {"t": "h1"}}),))
+
+
+def test_output_keys():
+    assert output_keys(["h1", '{"container": ".p", "fields": {"t": "h2"}}']) == ["h1", ".p"]
+
+
+def test_extract_html_matches_plans():
+    pytest.importorskip("bs4")
+    html = (
+        '<div class="product" data-id="1"><h2> Mug </h2><a href="/mug">x</a><span class="tag">red</span></div>'
+        '<div class="product" data-id="2"><h2>Cup</h2></div>'
+    )
+    tpl = json.dumps({"name": "p", "container": ".product", "fields": {
+        "title": "@text h2", "id": "@attr:data-id", "url": "@attr:href a",
+        "tags": {"container": ".tag", "fields": {"label": "@text"}},
+    }})
+    out = extract_html(html, [tpl, "@text h2"])
+    assert out["errors"] == {}
+    assert out["data"]["@text h2"] == [{"text": "Mug"}, {"text": "Cup"}]
+    assert out["data"]["p"] == [
+        {"title": "Mug", "id": "1", "url": "/mug", "tags": [{"label": "red"}]},
+        {"title": "Cup", "id": "2", "url": "", "tags": []},
+    ]
@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from jobs import FairShare, JobSpec
+
+
+def _fair(limit, **quotas):
+    fair = FairShare(SimpleNamespace(limit=limit))
+    for job, quota in quotas.items():
+        fair.add(job, quota)
+    return fair
+
+
+def test_single_job_gets_everything():
+    assert _fair(8, a=0).share("a") == 8
+
+
+def test_equal_split():
+    fair = _fair(8, a=0, b=0)
+    assert (fair.share("a"), fair.share("b")) == (4, 4)
+    assert _fair(8, a=0, b=0, c=0).share("a") == 3
+
+
+def test_unused_quota_goes_to_the_others():
+    fair = _fair(8, small=2, big=0)
+    assert (fair.share("small"), fair.share("big")) == (2, 6)
+    fair = _fair(12, a=1, b=2, c=0, d=0)
+    assert [fair.share(j) for j in "abcd"] == [1, 2, 5, 5]
+
+
+def test_quota_above_fair_share_is_not_granted():
+    fair = _fair(8, a=10, b=0)
+    assert (fair.share("a"), fair.share("b")) == (4, 4)
+
+
+def test_share_never_below_one():
+    fair = _fair(1, a=0, b=0, c=0)
+    assert fair.share("c") == 1
+
+
+def test_share_follows_the_limit():
+    controller = SimpleNamespace(limit=4)
+    fair = FairShare(controller)
+    fair.add("a", 0)
+    fair.add("b", 0)
+    controller.limit = 10
+    assert fair.share("a") == 5
+
+
+def test_remove_grows_the_remaining_share():
+    async def main():
+        fair = _fair(6, a=0, b=0)
+        assert fair.share("a") == 3
+        await fair.remove("b")
+        assert fair.share("a") == 6
+
+    asyncio.run(main())
+
+
+def test_slot_waits_for_share():
+    async def main():
+        fair = _fair(2, a=0, b=0)
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            async with fair.slot("a"):
+                peak = max(peak, fair.snapshot()["a"]["inflight"])
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work() for _ in range(5)))
+        assert peak == 1
+
+    asyncio.run(main())
+
+
+def test_job_spec_validation():
+    spec = JobSpec.from_dict({"urls": "https://a.test/"}, {"selectors": ["h1"], "retries": None})
+    assert spec.urls == ["https://a.test/"] and spec.selectors == ["h1"]
+    with pytest.raises(ValueError, match="unknown"):
+        JobSpec.from_dict({"urls": ["x"], "bogus": 1}, {"selectors": ["h1"]})
+    with pytest.raises(ValueError, match="selectors"):
+        JobSpec.from_dict({"urls": ["x"]}, {})
@@ -0,0 +1,66 @@
+import re
+
+import pytest
+
+from readiness import LADDER, ReadinessRules, ReadinessStrategy, ReadinessTuner
+
+
+def test_parse_specs():
+    assert ReadinessStrategy.parse(None) == ReadinessStrategy("load")
+    assert ReadinessStrategy.parse("networkidle:3000").cap_ms == 3000
+    assert ReadinessStrategy.parse("selector: .item ").arg == ".item"
+    assert ReadinessStrategy.parse("js:() => window.ready").spec == "js:() => window.ready"
+    with pytest.raises(ValueError):
+        ReadinessStrategy.parse("idle")
+    with pytest.raises(ValueError):
+        ReadinessStrategy.parse("selector:")
+
+
+def test_phases():
+    assert ReadinessStrategy.parse("selector:.a").phase == "commit"
+    assert ReadinessStrategy.parse("js:x").phase == "domcontentloaded"
+    with pytest.raises(ValueError):
+        ReadinessStrategy.parse("networkidle").phase
+
+
+def test_rules_match_in_order():
+    rules = ReadinessRules.from_args("domcontentloaded", [["/search", "selector:.result"], ["/s", "load"]])
+    assert rules.for_url("https://a.test/search?q=1") == "selector:.result"
+    assert rules.for_url("https://a.test/s/1") == "load"
+    assert rules.for_url("https://a.test/") == "domcontentloaded"
+    assert rules.explicit_for("https://a.test/") is None
+    with pytest.raises(re.error):
+        ReadinessRules.from_args(None, [["(", "load"]])
+
+
+def test_validate_for_selenium():
+    ReadinessRules.from_args("selector:.a", [["/x", "commit"]]).validate_for_selenium()
+    with pytest.raises(ValueError, match="Playwright"):
+        ReadinessRules.from_args("load", [["/x", "networkidle:5000"]]).validate_for_selenium()
+
+
+def test_tuner_switches_to_cheaper_strategy_after_confirmations():
+    tuner = ReadinessTuner("load", probe_every=2, confirm=2)
+    picks = []
+    for _ in range(8):
+        spec = tuner.pick("a.test")
+        picks.append(spec)
+        tuner.record("a.test", spec, 10.0, nonempty=True)
+    assert picks[:4] == ["load", "domcontentloaded", "load", "domcontentloaded"]
+    assert tuner.report()["hosts"]["a.test"] in LADDER[:2]
+
+
+def test_tuner_escalates_on_empty_results():
+    tuner = ReadinessTuner("load", confirm=2)
+    for _ in range(2):
+        tuner.record("a.test", "load", 10.0, nonempty=False)
+    assert tuner.report()["hosts"]["a.test"] == "networkidle:5000"
+
+
+def test_tuner_timings_are_running_averages():
+    tuner = ReadinessTuner("load")
+    for ms in (10.0, 20.0, 30.0):
+        tuner.record("a.test", "load", ms, nonempty=True)
+    tuner.record("a.test", "load", None, nonempty=True)
+    assert tuner.report()["avg_ready_ms"] == {"load": 20.0}
+    assert tuner._timings["load"] == [3, 60.0]
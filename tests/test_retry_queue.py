@@ -0,0 +1,76 @@
+import asyncio
+
+from retry_queue import DelayedQueue, RetryScheduler
+
+
+def test_backoff_doubles_and_caps():
+    s = RetryScheduler(base_delay=2.0, max_delay=10.0, jitter=0.0)
+    assert [s.backoff(n) for n in range(1, 6)] == [2.0, 4.0, 8.0, 10.0, 10.0]
+
+
+def test_backoff_jitter_bounds():
+    s = RetryScheduler(base_delay=2.0, jitter=0.5)
+    assert all(1.5 <= s.backoff(1) <= 2.5 for _ in range(100))
+    assert RetryScheduler(base_delay=0.1, jitter=1.0).backoff(1) >= 0.0
+
+
+def test_attempt_budget_per_key():
+    s = RetryScheduler(max_attempts=3, jitter=0.0)
+    assert s.schedule("u", "h", "u") == 2.0
+    assert s.schedule("u", "h", "u") == 4.0
+    assert s.schedule("u", "h", "u") is None  # third failure uses up the attempts
+    assert s.failures("u") == 0
+    assert (s.scheduled, s.exhausted, len(s)) == (2, 1, 2)
+
+
+def test_single_attempt_never_retries():
+    s = RetryScheduler()
+    assert s.schedule("u", "h", "u") is None
+    assert not len(s)
+
+
+def test_host_budget():
+    s = RetryScheduler(max_attempts=5, host_budget=2, jitter=0.0)
+    assert s.schedule("a", "h", "a") is not None
+    assert s.schedule("b", "h", "b") is not None
+    assert s.schedule("c", "h", "c") is None
+    assert s.schedule("d", "other", "d") is not None
+
+
+def test_forget_resets_key():
+    s = RetryScheduler(max_attempts=2, jitter=0.0)
+    s.schedule("u", "h", "u")
+    s.forget("u")
+    assert s.failures("u") == 0
+
+
+def test_defer_is_not_charged():
+    s = RetryScheduler(max_attempts=1)
+    s.defer("u", 0.0)
+    assert s.failures("u") == 0
+    assert s.queue.get_ready_nowait() == "u"
+
+
+def test_delayed_queue_orders_by_due_time():
+    async def main():
+        q = DelayedQueue()
+        q.put("late", 0.05)
+        q.put("now", 0.0)
+        assert q.get_ready_nowait() == "now"
+        assert q.get_ready_nowait() is None
+        assert 0 < q.ready_in() <= 0.05
+        assert await asyncio.wait_for(q.get(), timeout=1) == "late"
+        assert q.ready_in() is None
+
+    asyncio.run(main())
+
+
+def test_delayed_queue_drain():
+    async def main():
+        q = DelayedQueue()
+        q.put("b", 10)
+        q.put("a", 5)
+        assert q.drain() == ["a", "b"]
+        assert not len(q)
+
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+from timeouts import HostTimeouts, LatencyWindow
+
+
+def test_latency_window_quantiles():
+    w = LatencyWindow(size=100)
+    for ms in range(1, 101):
+        w.add(ms)
+    assert w.quantile(0.5) == 50
+    assert w.quantile(0.99) == 99
+    assert w.quantile(1.0) == 100
+
+
+def test_latency_window_keeps_last_samples():
+    w = LatencyWindow(size=3)
+    for ms in (1000, 1, 2, 3):
+        w.add(ms)
+    assert len(w) == 3
+    assert w.quantile(1.0) == 3
+
+
+def test_default_until_enough_samples():
+    t = HostTimeouts(10_000, min_samples=5)
+    for _ in range(4):
+        t.observe("a", 100)
+    assert t.timeout_ms("a") == 10_000
+    t.observe("a", 100)
+    assert t.timeout_ms("a") == 2000  # 100 ms x 3, raised to min_ms
+
+
+def test_slow_healthy_host_exceeds_fixed_timeout():
+    t = HostTimeouts(10_000, factor=3.0)
+    assert t.max_ms == 40_000
+    for _ in range(5):
+        t.observe("slow", 12_000)
+    assert t.timeout_ms("slow") == 36_000
+
+
+def test_explicit_ceiling():
+    t = HostTimeouts(10_000, max_ms=20_000)
+    for _ in range(5):
+        t.observe("slow", 12_000)
+    assert t.timeout_ms("slow") == 20_000
+
+
+def test_timeouts_are_censored_not_samples():
+    t = HostTimeouts(10_000, factor=2.0, min_ms=0)
+    for _ in range(5):
+        t.observe("a", 1000)
+    assert t.timeout_ms("a") == 2000
+    t.observe("a", 2000, timed_out=True)
+    assert t.timeout_ms("a") == 4000
+    t.observe("a", 4000, timed_out=True)
+    assert t.timeout_ms("a") == 8000
+    assert t.timeouts == 2
+    # The window still only holds real latencies; a success drops the stretch.
+    t.observe("a", 1000)
+    assert t.timeout_ms("a") == 2000
+
+
+def test_stretch_capped_by_ceiling():
+    t = HostTimeouts(1000, factor=1.0, min_ms=0)
+    for _ in range(5):
+        t.observe("a", 500)
+    for _ in range(10):
+        t.observe("a", 0, timed_out=True)
+    assert t.timeout_ms("a") == 4000
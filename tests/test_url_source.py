@@ -0,0 +1,54 @@
+import os
+
+from url_source import MemorySeenStore, SqliteSeenStore, dedup, iter_url_file
+
+
+def test_iter_url_file_skips_comments_and_fixes_backslashes(tmp_path):
+    path = tmp_path / "urls.txt"
+    path.write_text("# list\nhttps://a.test/1\n\nhttps:\\\\b.test\\2\n", encoding="utf-8")
+    assert list(iter_url_file(str(path), fix_backslashes=True)) == ["https://a.test/1", "https://b.test/2"]
+
+
+def test_memory_store_dedups():
+    seen = MemorySeenStore()
+    assert list(dedup(["a", "b", "a", "c", "b"], seen)) == ["a", "b", "c"]
+    assert len(seen) == 3
+
+
+def test_memory_store_spills_past_max_entries():
+    seen = MemorySeenStore(max_entries=3)
+    urls = [f"https://a.test/{i}" for i in range(10)]
+    assert list(dedup(urls + urls, seen)) == urls
+    assert len(seen) == 10
+    assert not seen._seen
+    path = seen._spill.path
+    seen.close()
+    assert not os.path.exists(path)
+
+
+def test_sqlite_store_batches_writes(tmp_path):
+    seen = SqliteSeenStore(str(tmp_path / "seen.sqlite"), batch=4)
+    assert list(dedup(["a", "b", "a", "c"], seen)) == ["a", "b", "c"]
+    assert seen._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0] == 0
+    assert seen.add("d")
+    assert seen._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0] == 4
+    assert not seen.add("a")
+    assert len(seen) == 4
+    seen.close()
+
+
+def test_sqlite_store_resumes_from_done_table(tmp_path):
+    db = str(tmp_path / "seen.sqlite")
+    first = SqliteSeenStore(db)
+    assert list(dedup(["a", "b", "c"], first)) == ["a", "b", "c"]
+    first.mark_done("a")  # b failed, c was never dispatched
+    first.close()
+
+    second = SqliteSeenStore(db)
+    assert list(dedup(["a", "b", "c", "b"], second)) == ["b", "c"]
+    second.mark_done("b")
+    second.close()
+
+    third = SqliteSeenStore(db)
+    assert list(dedup(["a", "b", "c"], third)) == ["c"]
+    third.close()
@@ -0,0 +1,67 @@
+import asyncio
+
+from warc import WarcIndex, WarcWriter, iter_records, warc_files
+
+PAGE = "https://a.test/p"
+CSS = "https://a.test/s.css"
+
+
+def _capture(directory, **kwargs):
+    w = WarcWriter(str(directory), **kwargs)
+
+    async def main():
+        await w.write_response(PAGE, 200, {"content-type": "text/html", "set-cookie": "a=1\nb=2",
+                                           "content-encoding": "gzip"}, b"<h1>Hi</h1>", page=True)
+        await w.write_response(CSS, 200, {"content-type": "text/css"}, b"h1{}")
+        await w.write_response(PAGE, 200, {"content-type": "text/html"}, b"<h1>Again</h1>", page=True)
+
+    asyncio.run(main())
+    w.close()
+    return w
+
+
+def test_write_index_lookup_roundtrip(tmp_path):
+    w = _capture(tmp_path)
+    assert w.records == 3
+    index = WarcIndex([str(tmp_path)])
+    assert len(index) == 2
+    assert index.page_urls() == [PAGE]
+    status, headers, body = index.lookup(PAGE)
+    assert (status, body) == (200, b"<h1>Again</h1>")  # the last capture wins
+    assert index.lookup(CSS)[2] == b"h1{}"
+    assert index.lookup("https://a.test/missing") is None
+    assert (index.hits, index.misses) == (2, 1)
+
+
+def test_repeated_headers_are_separate_lines(tmp_path):
+    _capture(tmp_path)
+    first = next(r for r in iter_records([str(tmp_path)]) if r.target_uri == PAGE)
+    head = first.block.split(b"\r\n\r\n", 1)[0].decode("iso-8859-1")
+    assert "set-cookie: a=1\r\nset-cookie: b=2" in head
+    assert "\n" not in head.replace("\r\n", "")
+    assert "content-encoding" not in head  # bodies are stored decoded
+    assert "Content-Length: 11" in head
+
+
+def test_files_rotate(tmp_path):
+    _capture(tmp_path, max_bytes=1)
+    files = warc_files([str(tmp_path)])
+    assert len(files) == 3
+    assert WarcIndex(files).page_urls() == [PAGE]
+
+
+def test_empty_index_is_falsy_but_present(tmp_path):
+    index = WarcIndex([str(tmp_path)])
+    # Callers must test `is not None`; an empty archive is still an index.
+    assert index is not None and not index
+    assert index.page_urls() == []
+    assert index.lookup(PAGE) is None
+
+
+def test_archives_without_page_marker_fall_back_to_html(tmp_path):
+    w = WarcWriter(str(tmp_path))
+    w._write_response(PAGE, 200, {"content-type": "text/html"}, b"<h1>x</h1>", page=False)
+    w._write_response(CSS, 200, {"content-type": "text/css"}, b"h1{}", page=False)
+    w._write_response("https://a.test/404", 404, {"content-type": "text/html"}, b"no", page=False)
+    w.close()
+    assert WarcIndex([str(tmp_path)]).page_urls() == [PAGE]
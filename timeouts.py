@@ -0,0 +1,101 @@
+import asyncio
+import math
+import time
+from collections import deque
+
+
+class LatencyWindow:
+    """Last `size` latency samples (ms) with a lazily re-sorted copy for quantile queries."""
+
+    def __init__(self, size: int = 256):
+        self._samples: deque[float] = deque(maxlen=size)
+        self._sorted: list[float] | None = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, ms: float):
+        self._samples.append(ms)
+        self._sorted = None
+
+    def quantile(self, q: float) -> float | None:
+        if not self._samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        idx = min(len(self._sorted) - 1, max(0, math.ceil(q * len(self._sorted)) - 1))
+        return self._sorted[idx]
+
+
+class HostTimeouts:
+    """Per-host timeouts from streaming latency quantiles: quantile(q) x factor, clamped.
+
+    Hosts start at `default_ms` until `min_samples` successes are in. The ceiling `max_ms`
+    defaults to 4x `default_ms`, so slow but healthy hosts can get more than the fixed value.
+    Timeouts are censored observations, not samples: each one doubles the host's timeout (up
+    to the ceiling) until a success resets it, so a limit that proved too tight recovers.
+    """
+
+    def __init__(self, default_ms: int, *, quantile: float = 0.99, factor: float = 3.0, min_ms: int = 2000,
+                 max_ms: int | None = None, min_samples: int = 5, window: int = 256, logger=None):
+        self.default_ms = default_ms
+        self.quantile = quantile
+        self.factor = factor
+        self.max_ms = max_ms or 4 * default_ms
+        self.min_ms = min(min_ms, self.max_ms)
+        self.min_samples = max(1, min_samples)
+        self.window = window
+        self.logger = logger
+        self._hosts: dict[str, LatencyWindow] = {}
+        self._stretch: dict[str, int] = {}
+        self._logged: dict[str, int] = {}
+        self.timeouts = 0
+
+    def timeout_ms(self, host: str) -> int:
+        w = self._hosts.get(host)
+        if w is None or len(w) < self.min_samples:
+            return min(self.default_ms, self.max_ms)
+        base = w.quantile(self.quantile) * self.factor * self._stretch.get(host, 1)
+        value = int(min(self.max_ms, max(self.min_ms, base)))
+        last = self._logged.get(host, self.default_ms)
+        if self.logger and abs(value - last) > 0.25 * last:
+            self._logged[host] = value
+            self.logger.info(f"[TIMEOUT] {host}: {last} -> {value} ms (p{self.quantile * 100:g} of {len(w)} samples x{self.factor:g})")
+        return value
+
+    def observe(self, host: str, latency_ms: float, timed_out: bool = False):
+        if timed_out:
+            # Only a lower bound on the real latency; widen the limit instead of polluting the window.
+            self.timeouts += 1
+            self._stretch[host] = min(16, self._stretch.get(host, 1) * 2)
+            return
+        self._stretch.pop(host, None)
+        w = self._hosts.get(host)
+        if w is None:
+            w = self._hosts[host] = LatencyWindow(self.window)
+        w.add(latency_ms)
+
+    def snapshot(self) -> dict:
+        return {h: self.timeout_ms(h) for h in self._hosts}
+
+
+class JobBudget:
+    """Wall-clock budget for a whole run; runners stop dispatching once it is spent."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def exhausted(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+    def clamp_ms(self, timeout_ms: int) -> int:
+        """Cap a per-request timeout so in-flight work ends with the budget."""
+        return max(1, min(timeout_ms, int(self.remaining() * 1000)))
+
+    async def wait(self):
+        await asyncio.sleep(self.remaining())
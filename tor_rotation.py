@@ -27,6 +27,27 @@ class TorRotator:
     def incr(self):
         self._count += 1
 
+    async def warm(self) -> bool:
+        """Check once that the control port accepts us, so a broken setup shows before the first rotation."""
+        if not Controller:
+            self.logger.warning("stem not available; Tor rotation disabled.")
+            return False
+
+        def check():
+            with Controller.from_port(address=self.host, port=self.control_port) as c:
+                if self.password:
+                    c.authenticate(password=self.password)
+                else:
+                    c.authenticate()
+
+        try:
+            await asyncio.to_thread(check)
+            self.logger.info("Tor control port ready.")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Tor control port check failed: {e}")
+            return False
+
     async def force_rotate(self):
         """Force a NEWNYM regardless of counters/interval."""
         async with self._lock:
@@ -0,0 +1,199 @@
+import asyncio
+import random
+import time
+from urllib.parse import urlparse
+
+from backend_base import RetryLater
+from concurrency import classify_outcome
+from logging_utils import log_fields
+
+
+class UrlRunner:
+    """Multi-URL job executor.
+
+    A fixed pool of workers takes ready retries first, then fresh tasks from the main
+    queue. Failed tasks go to the RetryScheduler's delay queue and anti-bot retries
+    (RetryLater) are deferred there too, so nobody sleeps while holding a concurrency slot.
+    """
+
+    def __init__(self, scraper, logger, controller, scheduler, *, timeout_ms: int, rate_limiter=None,
+                 gather_links: bool = False, pacing: float | None = None, on_result=None, budget=None):
+        self.scraper = scraper
+        self.logger = logger
+        self.controller = controller
+        self.scheduler = scheduler
+        self.timeout_ms = timeout_ms
+        self.rate_limiter = rate_limiter
+        self.gather_links = gather_links
+        # Sequential politeness pause (seconds +/- up to the same again) between tasks.
+        self.pacing = pacing
+        self.on_result = on_result
+        self.budget = budget
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self._pending = 0
+        self._dispatched = 0
+        self._producer_done = False
+        self._all_done = asyncio.Event()
+
+    def submit_nowait(self, task):
+        self._pending += 1
+        self.queue.put_nowait(task)
+
+    async def submit(self, task):
+        """Enqueue, waiting while the (bounded) queue is full."""
+        self._pending += 1
+        await self.queue.put(task)
+
+    async def _produce(self, tasks):
+        try:
+            for i, task in enumerate(tasks, 1):
+                if self.budget and self.budget.exhausted:
+                    break
+                await self.submit(task)
+                if i % 256 == 0:
+                    await asyncio.sleep(0)  # let workers run even when the queue never fills
+        finally:
+            self.close_input()
+
+    def close_input(self):
+        """No more submissions; run() returns once pending work drains."""
+        self._producer_done = True
+        self._check_done()
+
+    def _check_done(self):
+        if self._producer_done and self._pending == 0:
+            self._all_done.set()
+
+    def _resolve(self, ok: bool | None):
+        if ok:
+            self.succeeded += 1
+        elif ok is None:
+            self.skipped += 1
+        else:
+            self.failed += 1
+        self._pending -= 1
+        self._check_done()
+
+    async def _budget_watch(self):
+        """At the deadline: stop input and drop queued work; in-flight tasks end via clamped timeouts."""
+        await self.budget.wait()
+        dropped = self.scheduler.queue.drain()
+        while True:
+            try:
+                dropped.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        self.logger.warning(f"[BUDGET] {self.budget.seconds:g}s job budget spent; skipping {len(dropped)} queued task(s)")
+        self._producer_done = True
+        for _ in dropped:
+            self._resolve(None)
+        self._check_done()
+
+    async def _next(self):
+        while True:
+            task = self.scheduler.queue.get_ready_nowait()
+            if task is not None:
+                return task
+            try:
+                return self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            getter = asyncio.ensure_future(self.queue.get())
+            changed = asyncio.ensure_future(self.scheduler.queue.wait_changed())
+            done, pending = await asyncio.wait(
+                {getter, changed}, timeout=self.scheduler.queue.ready_in(), return_when=asyncio.FIRST_COMPLETED
+            )
+            for fut in pending:
+                fut.cancel()
+            if getter in done:
+                return getter.result()
+
+    async def _process(self, task, index: int) -> bool | None:
+        """One attempt; True/False when resolved, None when re-queued for later."""
+        url = task.url
+        host = urlparse(url).netloc.lower()
+        async with self.controller.slot(host):
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
+            attempt = self.scheduler.failures(url) + 1
+            self.logger.info(f"Processing #{index}: {url}", extra=log_fields(url=url, attempt=attempt, stage="process"))
+            started = time.monotonic()
+            try:
+                path, cleaned, links = await self.scraper.run_task(task, self.timeout_ms, gather_links=self.gather_links)
+            except RetryLater as r:
+                self.controller.record(host, time.monotonic() - started, blocked=True)
+                if self.budget and self.budget.exhausted:
+                    return False
+                self.scheduler.defer(r.task, r.delay)
+                self.logger.info(
+                    f"Deferred {url}: anti-bot attempt {r.task.attempt} in {r.delay:.1f}s",
+                    extra=log_fields(url=url, attempt=r.task.attempt, stage="retry_scheduled"),
+                )
+                return None
+            except Exception as e:
+                self.controller.record(host, time.monotonic() - started, *classify_outcome(None, e))
+                self.logger.warning(
+                    f"Error scraping {url} attempt {attempt}: {e}",
+                    extra=log_fields(url=url, attempt=attempt, stage="error", duration=time.monotonic() - started),
+                )
+                delay = None if self.budget and self.budget.exhausted else self.scheduler.schedule(url, host, task)
+                if delay is None:
+                    self.logger.error(f"Failed {url} after {attempt} attempts: {e}", extra=log_fields(url=url, attempt=attempt, stage="failed"))
+                    return False
+                self.logger.info(f"Retrying {url} in {delay:.2f}s...", extra=log_fields(url=url, attempt=attempt + 1, stage="retry_scheduled"))
+                return None
+        self.controller.record(host, time.monotonic() - started, *classify_outcome(cleaned))
+        self.scheduler.forget(url)
+        if self.on_result:
+            self.on_result(url, cleaned, links)
+        self.logger.info(
+            f"Success {url} (attempt {attempt}) saved {path}",
+            extra=log_fields(url=url, attempt=attempt, stage="success", duration=time.monotonic() - started),
+        )
+        return True
+
+    async def _worker(self):
+        while True:
+            task = await self._next()
+            if self.budget and self.budget.exhausted:
+                self._resolve(None)
+                continue
+            self._dispatched += 1
+            try:
+                outcome = await self._process(task, self._dispatched)
+            except Exception as e:  # noqa
+                self.logger.error(f"Unexpected error for {task.url}: {e}")
+                outcome = False
+            if outcome is not None:
+                self._resolve(outcome)
+            if self.pacing and not self._all_done.is_set():
+                await asyncio.sleep(self.pacing + random.uniform(0, self.pacing))
+
+    async def run(self, tasks=None, workers: int | None = None, queue_size: int = 0) -> dict:
+        """Run until input is closed and every task is resolved.
+
+        `tasks` (any iterable, consumed lazily) is streamed through a bounded queue of
+        `queue_size` (default 4x workers), so memory stays flat for huge inputs and the first
+        task starts immediately. Without it the caller feeds submit()/close_input() itself.
+        """
+        n_workers = max(1, workers or self.controller.maximum)
+        if tasks is not None:
+            self.queue = asyncio.Queue(maxsize=queue_size or n_workers * 4)
+        pool = [asyncio.create_task(self._worker()) for _ in range(n_workers)]
+        if tasks is not None:
+            pool.append(asyncio.create_task(self._produce(tasks)))
+        if self.budget:
+            pool.append(asyncio.create_task(self._budget_watch()))
+        try:
+            await self._all_done.wait()
+        finally:
+            for w in pool:
+                w.cancel()
+            await asyncio.gather(*pool, return_exceptions=True)
+        stats = {"succeeded": self.succeeded, "failed": self.failed, "retries_scheduled": self.scheduler.scheduled}
+        if self.budget:
+            stats["skipped_budget"] = self.skipped
+        return stats
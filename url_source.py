@@ -0,0 +1,149 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator
+
+
+def iter_url_file(path: str, fix_backslashes: bool = False) -> Iterator[str]:
+    """Lazily yield URLs from a newline-separated file, skipping blanks and '#' comments."""
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(f"URL file not found: {p}")
+    with p.open(encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            # Auto-correct accidental backslashes in scheme
+            if fix_backslashes and (line.startswith('http:\\') or line.startswith('https:\\')):
+                line = line.replace('\\', '/')
+            yield line
+
+
+def _digest(url: str) -> int:
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+class MemorySeenStore:
+    """In-memory dedup keyed by 64-bit blake2b digests instead of full URL strings.
+
+    A set still costs ~70 bytes per digest, so past `max_entries` (0 = never) the digests
+    spill to a temporary SqliteSeenStore and memory stays bounded for any input size.
+    """
+
+    def __init__(self, max_entries: int = 1_000_000, logger=None):
+        self.max_entries = max_entries
+        self.logger = logger
+        self._seen: set[int] = set()
+        self._spill: SqliteSeenStore | None = None
+
+    def add(self, url: str) -> bool:
+        """True if url was not seen before."""
+        if self._spill is not None:
+            return self._spill.add(url)
+        h = _digest(url)
+        if h in self._seen:
+            return False
+        self._seen.add(h)
+        if self.max_entries and len(self._seen) > self.max_entries:
+            self._spill_to_disk()
+        return True
+
+    def _spill_to_disk(self):
+        fd, path = tempfile.mkstemp(prefix="seen_", suffix=".sqlite")
+        os.close(fd)
+        self._spill = SqliteSeenStore(path)
+        self._spill.add_digests(self._seen)
+        if self.logger:
+            self.logger.info(f"[SEEN] {len(self._seen)} URLs seen; moving dedup to {path}")
+        self._seen = set()
+
+    def __len__(self) -> int:
+        return len(self._spill) if self._spill is not None else len(self._seen)
+
+    def mark_done(self, url: str):
+        """Nothing outlives the process here; see SqliteSeenStore for resumable runs."""
+
+    def close(self):
+        self._seen.clear()
+        if self._spill is not None:
+            self._spill.close()
+            for suffix in ("", "-wal", "-shm"):
+                Path(self._spill.path + suffix).unlink(missing_ok=True)
+            self._spill = None
+
+
+class SqliteSeenStore:
+    """Disk-backed dedup (constant memory) that also makes runs resumable.
+
+    `seen` is this run's dedup set and is emptied on open; `done` persists and only gets a URL
+    once it completed successfully (mark_done), so a rerun skips finished URLs but retries
+    everything that failed or was never dispatched. New digests are buffered and written
+    `batch` at a time, so the event loop does one lookup per URL but no per-URL writes.
+    """
+
+    def __init__(self, path: str, batch: int = 4096):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS seen (h INTEGER PRIMARY KEY)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS done (h INTEGER PRIMARY KEY)")
+        self._conn.execute("DELETE FROM seen")
+        self._conn.commit()
+        self._batch = max(1, batch)
+        self._new_seen: set[int] = set()
+        self._new_done: set[int] = set()
+
+    def _known(self, h: int) -> bool:
+        if h in self._new_seen:
+            return True
+        row = self._conn.execute(
+            "SELECT 1 FROM seen WHERE h = ? UNION ALL SELECT 1 FROM done WHERE h = ? LIMIT 1", (h, h)
+        ).fetchone()
+        return row is not None
+
+    def add(self, url: str) -> bool:
+        """True if url is new in this run and was not completed by an earlier one."""
+        h = _digest(url)
+        if self._known(h):
+            return False
+        self._new_seen.add(h)
+        if len(self._new_seen) >= self._batch:
+            self.flush()
+        return True
+
+    def add_digests(self, digests: Iterable[int]):
+        self.flush()
+        self._conn.executemany("INSERT OR IGNORE INTO seen (h) VALUES (?)", ((h,) for h in digests))
+        self._conn.commit()
+
+    def mark_done(self, url: str):
+        self._new_done.add(_digest(url))
+        if len(self._new_done) >= self._batch:
+            self.flush()
+
+    def flush(self):
+        if self._new_seen:
+            self._conn.executemany("INSERT OR IGNORE INTO seen (h) VALUES (?)", ((h,) for h in self._new_seen))
+            self._new_seen.clear()
+        if self._new_done:
+            self._conn.executemany("INSERT OR IGNORE INTO done (h) VALUES (?)", ((h,) for h in self._new_done))
+            self._new_done.clear()
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0] + len(self._new_seen)
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
+def dedup(urls: Iterable[str], seen) -> Iterator[str]:
+    """Yield each URL the first time `seen` reports it as new (order preserved)."""
+    for u in urls:
+        if seen.add(u):
+            yield u
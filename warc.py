@@ -0,0 +1,264 @@
+import asyncio
+import base64
+import gzip
+import hashlib
+import threading
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http import HTTPStatus
+from pathlib import Path
+from typing import Iterator
+
+# Headers describing the wire encoding; bodies are stored decoded, so these would lie on replay.
+_HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+# Extension header marking the navigation (main document) response of a scraped page.
+PAGE_HEADER = "WARC-Scraper-Page"
+
+
+@dataclass
+class WarcRecord:
+    type: str
+    target_uri: str | None
+    headers: dict
+    block: bytes
+    path: str = ""
+    offset: int = 0
+
+    @property
+    def is_page(self) -> bool:
+        return self.headers.get(PAGE_HEADER.lower()) == "1"
+
+
+def parse_http_response(block: bytes) -> tuple[int, list[tuple[str, str]], bytes]:
+    """Split an application/http response block into (status, headers, body)."""
+    head, _, body = block.partition(b"\r\n\r\n")
+    lines = head.decode("iso-8859-1").split("\r\n")
+    parts = lines[0].split(" ", 2)
+    status = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+    headers = []
+    for line in lines[1:]:
+        k, sep, v = line.partition(":")
+        if sep:
+            headers.append((k.strip(), v.strip()))
+    return status, headers, body
+
+
+def _record_bytes(warc_headers: list[tuple[str, str]], block: bytes) -> bytes:
+    head = "WARC/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in warc_headers)
+    head += f"Content-Length: {len(block)}\r\n\r\n"
+    return head.encode("utf-8") + block + b"\r\n\r\n"
+
+
+class WarcWriter:
+    """Streaming WARC/1.1 writer: one gzip member per record, files rotated at `max_bytes`.
+
+    Writes run in a worker thread (ordered by a lock) so large bodies never stall the loop.
+    """
+
+    def __init__(self, directory: str, prefix: str = "capture", max_bytes: int = 1024 ** 3, logger=None):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._fh = None
+        self._path: Path | None = None
+        self._serial = 0
+        self.records = 0
+        self.bytes_written = 0
+
+    def _open(self):
+        self._serial += 1
+        ts = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        self._path = self.dir / f"{self.prefix}-{ts}-{self._serial:05d}.warc.gz"
+        self._fh = self._path.open("ab")
+        info = b"software: scraper\r\nformat: WARC File Format 1.1\r\n"
+        self._write_member([
+            ("WARC-Type", "warcinfo"), ("WARC-Record-ID", f"<urn:uuid:{uuid.uuid4()}>"),
+            ("WARC-Date", _now()), ("WARC-Filename", self._path.name), ("Content-Type", "application/warc-fields"),
+        ], info)
+
+    def _write_member(self, warc_headers: list[tuple[str, str]], block: bytes):
+        data = gzip.compress(_record_bytes(warc_headers, block), compresslevel=6)
+        self._fh.write(data)
+        self.bytes_written += len(data)
+
+    def _write_response(self, url: str, status: int, headers: dict, body: bytes, page: bool):
+        reason = _reason(status)
+        lines = [f"HTTP/1.1 {status} {reason}"]
+        lines += [f"{k}: {v}" for k, v in _header_lines(headers) if k.lower() not in _HOP_HEADERS]
+        lines.append(f"Content-Length: {len(body)}")
+        block = ("\r\n".join(lines) + "\r\n\r\n").encode("iso-8859-1", "replace") + body
+        warc_headers = [
+            ("WARC-Type", "response"), ("WARC-Record-ID", f"<urn:uuid:{uuid.uuid4()}>"),
+            ("WARC-Date", _now()), ("WARC-Target-URI", url),
+            ("WARC-Payload-Digest", "sha1:" + base64.b32encode(hashlib.sha1(body).digest()).decode("ascii")),
+            ("Content-Type", "application/http;msgtype=response"),
+        ]
+        if page:
+            warc_headers.append((PAGE_HEADER, "1"))
+        with self._lock:
+            if self._fh is None or self._fh.tell() >= self.max_bytes:
+                self._close_file()
+                self._open()
+            self._write_member(warc_headers, block)
+            self._fh.flush()
+            self.records += 1
+
+    async def write_response(self, url: str, status: int, headers: dict, body: bytes, page: bool = False):
+        await asyncio.to_thread(self._write_response, url, status, headers or {}, body or b"", page)
+
+    def _close_file(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+    def close(self):
+        with self._lock:
+            self._close_file()
+        if self.logger:
+            self.logger.info(f"[WARC] {self.records} record(s), {self.bytes_written / 1e6:.1f} MB compressed in {self.dir}")
+
+
+def _header_lines(headers: dict) -> list[tuple[str, str]]:
+    """One (name, value) per line: Playwright joins repeated headers (set-cookie) with newlines."""
+    out = []
+    for k, v in headers.items():
+        for part in str(v).replace("\r", "").split("\n"):
+            if part.strip():
+                out.append((k, part.strip()))
+    return out
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _reason(status: int) -> str:
+    try:
+        return HTTPStatus(status).phrase
+    except ValueError:
+        return "Unknown"
+
+
+def _iter_members(path: str, chunk_size: int = 1 << 16) -> Iterator[tuple[int, bytes]]:
+    """Yield (offset, decompressed bytes) per gzip member without inflating the whole file."""
+    with open(path, "rb") as f:
+        offset = 0
+        pending = b""
+        while True:
+            d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            out = []
+            data = pending or f.read(chunk_size)
+            consumed = 0
+            while data:
+                out.append(d.decompress(data))
+                if d.eof:
+                    consumed += len(data) - len(d.unused_data)
+                    pending = d.unused_data
+                    break
+                consumed += len(data)
+                data = f.read(chunk_size)
+            else:
+                return
+            yield offset, b"".join(out)
+            offset += consumed
+
+
+def _parse_record(raw: bytes, path: str = "", offset: int = 0) -> WarcRecord | None:
+    head, _, rest = raw.partition(b"\r\n\r\n")
+    lines = head.decode("utf-8", "replace").split("\r\n")
+    if not lines or not lines[0].startswith("WARC/"):
+        return None
+    headers = {}
+    for line in lines[1:]:
+        k, _, v = line.partition(":")
+        headers[k.strip().lower()] = v.strip()
+    length = int(headers.get("content-length", len(rest)))
+    return WarcRecord(headers.get("warc-type", ""), headers.get("warc-target-uri"), headers, rest[:length], path, offset)
+
+
+def _is_html_ok(block: bytes) -> bool:
+    head = block[:4096].split(b"\r\n\r\n", 1)[0].lower()
+    return head.startswith((b"http/1.1 200", b"http/1.0 200", b"http/2 200")) and b"content-type: text/html" in head
+
+
+def warc_files(paths: list[str]) -> list[str]:
+    """Expand directories into their *.warc.gz files (sorted)."""
+    out = []
+    for p in paths:
+        pp = Path(p)
+        if pp.is_dir():
+            out.extend(str(f) for f in sorted(pp.glob("*.warc.gz")))
+        elif pp.exists():
+            out.append(str(pp))
+        else:
+            raise FileNotFoundError(f"WARC not found: {pp}")
+    return out
+
+
+def iter_records(paths: list[str]) -> Iterator[WarcRecord]:
+    for path in warc_files(paths):
+        for offset, raw in _iter_members(path):
+            rec = _parse_record(raw, path, offset)
+            if rec is not None:
+                yield rec
+
+
+def read_record(path: str, offset: int) -> WarcRecord | None:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        out = []
+        while not d.eof and (chunk := f.read(1 << 16)):
+            out.append(d.decompress(chunk))
+    return _parse_record(b"".join(out), path, offset)
+
+
+class WarcIndex:
+    """URL -> (file, offset) index of response records; the last capture of a URL wins.
+
+    Only offsets are kept in memory; bodies are inflated on lookup.
+    """
+
+    def __init__(self, paths: list[str]):
+        self._entries: dict[str, tuple[str, int]] = {}
+        self.pages: list[str] = []
+        self._html: list[str] = []
+        seen_pages = set()
+        for rec in iter_records(paths):
+            if rec.type != "response" or not rec.target_uri:
+                continue
+            self._entries[rec.target_uri] = (rec.path, rec.offset)
+            if rec.is_page and rec.target_uri not in seen_pages:
+                seen_pages.add(rec.target_uri)
+                self.pages.append(rec.target_uri)
+            elif not self.pages and _is_html_ok(rec.block):
+                self._html.append(rec.target_uri)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def page_urls(self) -> list[str]:
+        """Navigated pages; archives from other tools (no page marker) fall back to 200 HTML responses."""
+        return self.pages or list(dict.fromkeys(self._html))
+
+    def entry(self, url: str) -> tuple[str, int] | None:
+        return self._entries.get(url)
+
+    def lookup(self, url: str) -> tuple[int, list[tuple[str, str]], bytes] | None:
+        entry = self._entries.get(url)
+        if entry is None:
+            self.misses += 1
+            return None
+        rec = read_record(*entry)
+        if rec is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return parse_http_response(rec.block)